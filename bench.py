@@ -0,0 +1,202 @@
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from bot.config import settings
+from bot.state import STATE
+from bot.analysis import _MACD_SERIES, calculate_indicator_panel, calculate_macd, calculate_macd_panel, find_signals
+from bot.charting import generate_chart_image
+from bot.data import _split_download
+from bot.indicators import MACDSpec
+from bot.yahoo import parse_chart
+
+REPORT_VERSION = 1
+
+# name -> (symbols, candles, timeframe)
+FIXTURES: Dict[str, Tuple[int, int, str]] = {
+    "5d_15m": (1, 5 * 96, settings.TIMEFRAME_15M),
+    "1y_1d": (1, 365, settings.TIMEFRAME_1D),
+    "5y_15m": (1, 5 * 365 * 96, settings.TIMEFRAME_15M),
+    "500sym_5d_15m": (500, 5 * 96, settings.TIMEFRAME_15M),
+}
+
+# A 50-configuration MACD parameter sweep for the indicator pipeline
+SWEEP = [MACDSpec(fast, slow, signal) for fast in (5, 8, 10, 12, 15) for slow in (21, 26, 30, 35, 40) for signal in (7, 9)]
+
+def make_ohlcv(symbols: int, candles: int, timeframe: str, seed: int = 7) -> Dict[str, pd.DataFrame]:
+    """Deterministic random-walk OHLCV candles per symbol, ending at a fixed UTC time."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(end="2024-06-28", periods=candles, freq=pd.Timedelta(timeframe), tz="UTC", name="Date")
+    frames = {}
+    for i in range(symbols):
+        close = 100 + np.cumsum(rng.normal(0, 1, candles))
+        spread = np.abs(rng.normal(0, 0.5, candles))
+        frames[f"SYM{i}-USD"] = pd.DataFrame({
+            "open": np.roll(close, 1),
+            "high": close + spread,
+            "low": close - spread,
+            "close": close,
+            "volume": rng.integers(1, 1000, candles).astype(float),
+        }, index=index)
+    return frames
+
+def yahoo_shaped(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """The frames as yf.download(group_by='ticker') returns them: title-case columns, (ticker, field) for several."""
+    renamed = {s: df.rename(columns=str.title).assign(**{"Adj Close": df["close"]}) for s, df in frames.items()}
+    if len(renamed) == 1:
+        return next(iter(renamed.values()))
+    return pd.concat(renamed.values(), axis=1, keys=renamed.keys())
+
+def chart_payload(df: pd.DataFrame) -> dict:
+    """The candles as Yahoo's /v8/finance/chart endpoint returns them (decoded JSON)."""
+    return {"chart": {"result": [{
+        "meta": {"exchangeTimezoneName": "UTC", "instrumentType": "CRYPTOCURRENCY"},
+        "timestamp": (df.index.asi8 // 1_000_000_000).tolist(),
+        "indicators": {"quote": [{column: df[column].tolist() for column in df.columns}]},
+    }], "error": None}}
+
+def measure(fn: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """
+    Times `fn` `repeat` times and records the peak traced memory of one extra run.
+
+    Returns:
+        median/min wall time in seconds and peak memory in KiB.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"median_s": statistics.median(times), "min_s": min(times), "peak_kib": peak / 1024, "runs": repeat}
+
+def _reset_engine():
+    STATE.signal_engine = None
+
+def run_suite(fixtures: List[str], repeat: int, charts: bool) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name in fixtures:
+        symbols, candles, timeframe = FIXTURES[name]
+        frames = make_ohlcv(symbols, candles, timeframe)
+        first = next(iter(frames.values()))
+        print(f"{name}: {symbols} symbol(s) x {candles} candles", file=sys.stderr)
+
+        def bench(label: str, fn: Callable[[], object], setup: Optional[Callable[[], None]] = None, n: int = repeat):
+            results[f"{label}/{name}"] = stats = measure(fn, n, setup)
+            print(f"  {label:<24} {stats['median_s'] * 1000:10.2f} ms  peak {stats['peak_kib']:10.0f} KiB", file=sys.stderr)
+
+        raw = yahoo_shaped(frames)
+        bench("fetch_postprocess", lambda: _split_download(raw, list(frames)))
+        payloads = {symbol: chart_payload(df) for symbol, df in frames.items()}
+        bench("chart_parse", lambda: {symbol: parse_chart(p, timeframe) for symbol, p in payloads.items()})
+
+        if symbols == 1:
+            bench("calculate_macd", lambda: calculate_macd(first))
+            # Steady state of the live loop: state is kept, one new candle per call
+            key = ("bench", name)
+            bench("calculate_macd_incremental", lambda: calculate_macd(first, key=key),
+                  setup=lambda: (_MACD_SERIES.pop(key, None), calculate_macd(first.iloc[:-1], key=key)))
+
+        bench("calculate_macd_panel", lambda: calculate_macd_panel(frames))
+        bench("indicator_sweep_50", lambda: calculate_indicator_panel(frames, SWEEP), n=max(1, repeat // 2))
+
+        panel = calculate_macd_panel(frames)
+        panels = {timeframe: panel}
+        bench("find_signals", lambda: find_signals(panels, {timeframe: frames}), setup=_reset_engine)
+
+        if charts:
+            chart_df = panel.frame_for(next(iter(frames)), first.tail(100))
+            bench("generate_chart_image", lambda: generate_chart_image(chart_df.copy(), "bench"), n=max(1, repeat // 2))
+    _reset_engine()
+    return results
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            time_threshold: float, memory_threshold: float, noise_floor: float) -> List[str]:
+    """
+    Returns a description of every regression against `baseline`.
+
+    A benchmark regresses when its best time grew by more than `time_threshold`
+    (a fraction) and by more than `noise_floor` seconds, or its peak memory grew
+    by more than `memory_threshold`. Best-of-N is compared rather than the median
+    because it is the least sensitive to other load on the machine.
+    """
+    regressions = []
+    for key, base in sorted(baseline.items()):
+        current = results.get(key)
+        if current is None:
+            continue
+        slower = current["min_s"] - base["min_s"]
+        if base["min_s"] > 0 and slower > noise_floor and current["min_s"] / base["min_s"] > 1 + time_threshold:
+            regressions.append(f"{key}: {base['min_s'] * 1000:.2f} ms -> {current['min_s'] * 1000:.2f} ms")
+        if base["peak_kib"] > 0 and current["peak_kib"] / base["peak_kib"] > 1 + memory_threshold:
+            regressions.append(f"{key}: peak {base['peak_kib']:.0f} KiB -> {current['peak_kib']:.0f} KiB")
+    return regressions
+
+def main():
+    """
+    Benchmarks the analysis, charting and data post-processing hot paths on
+    synthetic candles and writes a JSON report. With --baseline, exits non-zero
+    if anything regressed beyond the thresholds.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the MACD bot's hot paths.")
+    parser.add_argument("--fixtures", default=",".join(FIXTURES), help="Comma-separated fixture names")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--no-charts", action="store_true", help="Skip generate_chart_image")
+    parser.add_argument("--out", default="bench-report.json", help="Where to write the JSON report")
+    parser.add_argument("--baseline", help="Report to compare against")
+    parser.add_argument("--time-threshold", type=float, default=0.25, help="Allowed slowdown of the best run (fraction)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="Allowed peak memory growth (fraction)")
+    parser.add_argument("--noise-floor", type=float, default=0.002, help="Slowdowns below this many seconds are ignored")
+    args = parser.parse_args()
+
+    fixtures = [f.strip() for f in args.fixtures.split(",") if f.strip()]
+    unknown = [f for f in fixtures if f not in FIXTURES]
+    if unknown:
+        parser.error(f"Unknown fixture(s): {', '.join(unknown)}. Choose from {', '.join(FIXTURES)}.")
+
+    results = run_suite(fixtures, args.repeat, charts=not args.no_charts)
+    report = {
+        "version": REPORT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Wrote {len(results)} result(s) to {args.out}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline.get("results", {}), args.time_threshold, args.memory_threshold, args.noise_floor)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
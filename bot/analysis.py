@@ -1,102 +1,285 @@
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 import logging
-from typing import List, Tuple
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Optional
 from .config import settings
+from .indicators import IndicatorBlock, IndicatorSpec, MACDSeries, compute_indicators
+from .signals import SignalEngine, SignalSpec
 from .state import STATE
+from .yahoo import exchange_timezone
 
-def calculate_macd(df: pd.DataFrame) -> pd.DataFrame:
-    """Calculates MACD indicators and appends them to the DataFrame."""
+# Incremental MACD state per (symbol, timeframe), advanced as candles close
+_MACD_SERIES: Dict[Hashable, MACDSeries] = {}
+
+def _verify_macd(df: pd.DataFrame, tail: int = 3):
+    """Compares the last streamed MACD values with a full pandas_ta recomputation."""
+    import pandas_ta as ta  # Reference implementation, only needed when MACD_VERIFY is on
+
+    reference = ta.macd(df["close"], fast=settings.MACD_FAST, slow=settings.MACD_SLOW, signal=settings.MACD_SIGNAL)
+    if reference is None or reference.empty:
+        return
+    expected = reference.to_numpy()[-tail:]
+    actual = df[['macd', 'macd_histogram', 'macd_signal']].to_numpy()[-tail:]
+    scale = max(1.0, float(np.nanmax(np.abs(expected)))) if np.isfinite(expected).any() else 1.0
+    error = float(np.nanmax(np.abs(actual - expected), initial=0.0)) / scale
+    if error > settings.MACD_VERIFY_TOLERANCE:
+        logging.warning(f"Streaming MACD deviates from pandas_ta by {error:.2e} (tolerance {settings.MACD_VERIFY_TOLERANCE:.0e}).")
+
+def calculate_macd(df: pd.DataFrame, key: Optional[Hashable] = None) -> pd.DataFrame:
+    """
+    Calculates MACD indicators and appends them to the DataFrame.
+
+    With a `key` (e.g. `(symbol, timeframe)`) the EMA state is kept between calls,
+    so each call only advances newly closed candles and re-evaluates the open one.
+    """
     if df.empty or 'close' not in df.columns:
         return df
 
     try:
-        # Use the MACD parameters from the config
-        macd = ta.macd(
-            df["close"],
-            fast=settings.MACD_FAST,
-            slow=settings.MACD_SLOW,
-            signal=settings.MACD_SIGNAL
-        )
-        if macd is None or macd.empty:
-            raise ValueError("pandas_ta.macd returned None or empty DataFrame.")
-            
-        # Standardize column names based on parameters
-        base_name = f"MACD_{settings.MACD_FAST}_{settings.MACD_SLOW}_{settings.MACD_SIGNAL}"
-        macd.columns = ['macd', 'macd_histogram', 'macd_signal']
-        
-        return pd.concat([df, macd], axis=1)
+        series = _MACD_SERIES.get(key) if key is not None else None
+        if series is None:
+            # Use the MACD parameters from the config
+            series = MACDSeries(settings.MACD_FAST, settings.MACD_SLOW, settings.MACD_SIGNAL)
+            if key is not None:
+                _MACD_SERIES[key] = series
+
+        values = series.compute(df.index, df["close"].to_numpy(dtype=float))
+        result = df.assign(macd=values[:, 0], macd_histogram=values[:, 1], macd_signal=values[:, 2])
+
+        if settings.MACD_VERIFY:
+            _verify_macd(result)
+        return result
     except Exception as e:
         logging.error(f"Error calculating MACD: {e}")
         return df
 
-def _check_cross(
-    series: pd.Series,
-    prev_state: str,
-    lookback_idx_curr: int = -1, # -1 is the current, unclosed candle
-    lookback_idx_prev: int = -2  # -2 is the last closed candle
-) -> Tuple[bool, str]:
-    """Generic function to check for a zero-line cross."""
-    if len(series) < abs(lookback_idx_prev):
-        return False, prev_state
-    
-    prev_val = series.iloc[lookback_idx_prev]
-    curr_val = series.iloc[lookback_idx_curr]
-    
-    new_state = "above_zero" if curr_val > 0 else "below_zero"
-    
-    crossed_up = prev_val <= 0 and curr_val > 0
-    crossed_down = prev_val >= 0 and curr_val < 0
-    
-    did_cross = (crossed_up or crossed_down) and new_state != prev_state
-    
-    return did_cross, new_state
-
-def find_signals(df_15m: pd.DataFrame, df_1d: pd.DataFrame) -> List[dict]:
-    """Analyzes dataframes for all required MACD signals."""
-    signals = []
-    
-    # --- 15-Minute Timeframe Analysis ---
-    if not df_15m.empty and all(c in df_15m.columns for c in ['macd', 'macd_signal']):
-        # 1. EARLY WARNING: MACD line cross (intra-candle)
-        # Compares the current unclosed candle (-1) with the last closed one (-2)
-        macd_crossed, new_state = _check_cross(df_15m['macd'], STATE.last_15m_macd_early_state)
-        if macd_crossed:
-            direction = "ABOVE" if new_state == 'above_zero' else "BELOW"
-            signals.append({
-                "title": f"{settings.SYMBOL} 15m (Early Warning): MACD Line Crossing {direction} Zero",
-                "description": "The MACD line is crossing the zero level on the current, unclosed 15-minute candle.",
-                "dataframe": df_15m.tail(100)
-            })
-            STATE.last_15m_macd_early_state = new_state
-        # Reset early warning state if the candle closes without a signal, allowing re-trigger
-        elif len(df_15m) > 2 and STATE.last_15m_macd_early_state is not None:
-             STATE.last_15m_macd_early_state = None
+@dataclass
+class MACDPanel:
+    """
+    MACD outputs for many symbols, one column per symbol.
+
+    Rows count back from every symbol's newest candle: row -1 is each symbol's
+    open candle and row -2 its last closed one, even when the symbols trade on
+    different clocks. `times` holds the open time (ns) of every cell's candle,
+    0 above a symbol's first one.
+    """
+    symbols: List[str]
+    times: np.ndarray           # (time, symbol)
+    close: np.ndarray           # (time, symbol)
+    macd: np.ndarray            # (time, symbol)
+    macd_histogram: np.ndarray  # (time, symbol)
+    macd_signal: np.ndarray     # (time, symbol)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def frame_for(self, symbol: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Returns `df` (one symbol's candles) with that symbol's MACD columns attached."""
+        col = self.symbols.index(symbol)
+        rows = self.times[:, col] != 0
+        index = pd.DatetimeIndex(self.times[rows, col].view("datetime64[ns]"))
+        if df.index.tz is not None:
+            index = index.tz_localize("UTC")
+        macd = pd.DataFrame(
+            {"macd": self.macd[rows, col], "macd_histogram": self.macd_histogram[rows, col], "macd_signal": self.macd_signal[rows, col]},
+            index=index,
+        )
+        return df.join(macd.reindex(df.index))
+
+def _clock_groups(symbols: List[str]) -> Dict[Optional[str], List[str]]:
+    """
+    Symbols grouped by exchange timezone. Wall-clock candles (e.g. 15m, see
+    yahoo.wall_clock_interval) of different exchanges cannot share a time grid:
+    a stock's newest candle would sit hours behind a coin's.
+    """
+    groups: Dict[Optional[str], List[str]] = {}
+    for symbol in symbols:
+        groups.setdefault(exchange_timezone(symbol), []).append(symbol)
+    return groups
+
+def calculate_macd_panel(frames: Dict[str, pd.DataFrame], key: Optional[Hashable] = None) -> Optional[MACDPanel]:
+    """
+    Calculates MACD for every symbol at once, one (time x symbol) close matrix per exchange timezone.
+
+    Within a timezone, symbols are aligned on the union of their candle times;
+    a symbol without a candle at some time keeps its previous indicator values
+    there. The groups are then stacked aligned at their newest candle.
+    """
+    symbols = [s for s, df in frames.items() if not df.empty and 'close' in df.columns]
+    if not symbols:
+        return None
+
+    try:
+        groups = []
+        for tz, group in _clock_groups(symbols).items():
+            closes = pd.concat({s: frames[s]["close"] for s in group}, axis=1)
+            series_key = (key, tz, tuple(group)) if key is not None else None
+            series = _MACD_SERIES.get(series_key) if series_key is not None else None
+            if series is None:
+                series = MACDSeries(settings.MACD_FAST, settings.MACD_SLOW, settings.MACD_SIGNAL)
+                if series_key is not None:
+                    _MACD_SERIES[series_key] = series
+
+            close = closes.to_numpy(dtype=float)
+            groups.append((group, closes.index.asi8, close, series.compute(closes.index, close)))
 
+        n = max(len(times) for _, times, _, _ in groups)
+        times = np.zeros((n, len(symbols)), dtype=np.int64)
+        close, values = np.full((n, len(symbols)), np.nan), np.full((n, 3, len(symbols)), np.nan)
+        col = 0
+        for group, group_times, group_close, group_values in groups:
+            cols = slice(col, col + len(group))
+            times[n - len(group_times):, cols] = group_times[:, None]
+            close[n - len(group_times):, cols] = group_close
+            values[n - len(group_times):, :, cols] = group_values
+            col += len(group)
+        ordered = [s for group, _, _, _ in groups for s in group]
+        return MACDPanel(ordered, times, close, values[:, 0], values[:, 1], values[:, 2])
+    except Exception as e:
+        logging.error(f"Error calculating MACD panel: {e}")
+        return None
+
+@dataclass
+class IndicatorPanel:
+    """Outputs of an indicator pipeline for many symbols on a shared (time x symbol) grid."""
+    symbols: List[str]
+    index: pd.DatetimeIndex
+    block: IndicatorBlock  # values shaped (time, column, symbol)
+
+    def frame_for(self, symbol: str) -> pd.DataFrame:
+        """One symbol's indicator columns as a DataFrame."""
+        col = self.symbols.index(symbol)
+        return pd.DataFrame(self.block.values[:, :, col], index=self.index, columns=self.block.columns)
+
+def calculate_indicator_panel(frames: Dict[str, pd.DataFrame], specs: Iterable[IndicatorSpec]) -> Optional[IndicatorPanel]:
+    """
+    Runs the indicator pipeline (see indicators.compute_indicators) for every symbol at once.
+
+    Symbols are aligned on the union of their candle times.
+    """
+    symbols = [s for s, df in frames.items() if not df.empty and 'close' in df.columns]
+    if not symbols:
+        return None
+
+    try:
+        closes = pd.concat({s: frames[s]["close"] for s in symbols}, axis=1)
+        return IndicatorPanel(symbols, closes.index, compute_indicators(closes.to_numpy(dtype=float), specs))
+    except Exception as e:
+        logging.error(f"Error calculating indicator panel: {e}")
+        return None
+
+def cross_history(values: np.ndarray, band: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Zero-line crosses over a whole series, using the same rule as SignalEngine.
+
+    Args:
+        values: The watched series (e.g. the MACD line).
+        band: Optional dead band around zero per row, like SignalSpec.hysteresis
+            times the close: values[t] must leave it on the other side to cross.
 
+    Returns:
+        An int8 array aligned with `values`: 1 where values[t] crossed above
+        zero from values[t-1], -1 where it crossed below, 0 otherwise.
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.zeros(len(values), dtype=np.int8)
+    if len(values) < 2:
+        return out
+    band = np.zeros(len(values)) if band is None else np.nan_to_num(np.asarray(band, dtype=float))
+    prev_val, curr_val, curr_band = values[:-1], values[1:], band[1:]
+    out[1:][(prev_val <= curr_band) & (curr_val > curr_band)] = 1
+    out[1:][(prev_val >= -curr_band) & (curr_val < -curr_band)] = -1
+    return out
+
+def gate_crosses(directions: np.ndarray, initial_state: int = 0) -> np.ndarray:
+    """
+    Drops crosses that repeat the direction of the previous one.
+
+    This is what SignalEngine's regime does live: a cross only fires when its
+    direction differs from the regime recorded by the last cross that fired.
+    """
+    out = directions.copy()
+    idx = np.flatnonzero(directions)
+    if len(idx):
+        dirs = directions[idx]
+        previous = np.concatenate(([initial_state], dirs[:-1]))
+        out[idx[dirs == previous]] = 0
+    return out
+
+def default_signal_specs() -> List[SignalSpec]:
+    """The built-in signals, plus a MACD line check for every resampled timeframe."""
+    hysteresis = settings.SIGNAL_HYSTERESIS
+    specs = [
+        # 1. EARLY WARNING: MACD line cross (intra-candle)
+        # Compares the current unclosed candle (-1) with the last closed one (-2);
+        # fires at most once per direction per candle.
+        SignalSpec(
+            name="15m_macd_early", timeframe=settings.TIMEFRAME_15M, column="macd",
+            title="{symbol} 15m (Early Warning): MACD Line Crossing {direction} Zero",
+            description="The MACD line is crossing the zero level on the current, unclosed 15-minute candle.",
+            per_candle=True, hysteresis=hysteresis, debounce=settings.EARLY_WARNING_DEBOUNCE,
+            label="Early Warning",
+        ),
         # 2. CONFIRMATION: Signal line cross (after candle close)
         # Compares the last closed candle (-2) with the one before it (-3)
-        signal_crossed, new_state = _check_cross(df_15m['macd_signal'], STATE.last_15m_signal_confirm_state, -2, -3)
-        if signal_crossed:
-            direction = "ABOVE" if new_state == 'above_zero' else "BELOW"
-            signals.append({
-                "title": f"{settings.SYMBOL} 15m (Confirmation): Signal Line Crossed {direction} Zero",
-                "description": "The Signal line crossed the zero level on the recently closed 15-minute candle.",
-                "dataframe": df_15m.tail(100)
-            })
-            STATE.last_15m_signal_confirm_state = new_state
-
-    # --- 1-Day Timeframe Analysis ---
-    if not df_1d.empty and 'macd' in df_1d.columns:
+        SignalSpec(
+            name="15m_signal_confirm", timeframe=settings.TIMEFRAME_15M, column="macd_signal",
+            title="{symbol} 15m (Confirmation): Signal Line Crossed {direction} Zero",
+            description="The Signal line crossed the zero level on the recently closed 15-minute candle.",
+            curr_idx=-2, prev_idx=-3, hysteresis=hysteresis, label="Confirmation",
+        ),
         # 3. MACD Line cross on closed daily candle
-        macd_crossed_1d, new_state_1d = _check_cross(df_1d['macd'], STATE.last_1d_macd_state, -2, -3)
-        if macd_crossed_1d:
-            direction = "ABOVE" if new_state_1d == 'above_zero' else "BELOW"
-            signals.append({
-                "title": f"{settings.SYMBOL} 1D: MACD Line Crossed {direction} Zero",
-                "description": "The MACD line crossed the zero level on the daily chart.",
-                "dataframe": df_1d.tail(200)
-            })
-            STATE.last_1d_macd_state = new_state_1d
-            
-    return signals
\ No newline at end of file
+        SignalSpec(
+            name="1d_macd", timeframe=settings.TIMEFRAME_1D, column="macd",
+            title="{symbol} 1D: MACD Line Crossed {direction} Zero",
+            description="The MACD line crossed the zero level on the daily chart.",
+            curr_idx=-2, prev_idx=-3, hysteresis=hysteresis, window=200, label="MACD Cross",
+        ),
+    ]
+    # Resampled timeframes (built from the 15m candles)
+    for timeframe in settings.RESAMPLED_TIMEFRAMES:
+        specs.append(SignalSpec(
+            name=f"{timeframe}_macd", timeframe=timeframe, column="macd",
+            title=f"{{symbol}} {timeframe}: MACD Line Crossed {{direction}} Zero",
+            description=f"The MACD line crossed the zero level on the {timeframe} chart.",
+            curr_idx=-2, prev_idx=-3, hysteresis=hysteresis, label=f"{timeframe} MACD Cross",
+        ))
+    return specs
+
+def _get_engine() -> SignalEngine:
+    if STATE.signal_engine is None:
+        STATE.signal_engine = SignalEngine(default_signal_specs())
+    return STATE.signal_engine
+
+def find_signals(
+    panels: Dict[str, Optional[MACDPanel]],
+    frames: Dict[str, Dict[str, pd.DataFrame]],
+    names: Optional[Iterable[str]] = None,
+) -> List[dict]:
+    """
+    Analyzes every watched symbol for the registered MACD signals.
+
+    Args:
+        panels: MACD panel per timeframe.
+        frames: Candles per timeframe and symbol, used for the alert charts.
+        names: Only check these signals (default: every signal with a panel).
+    """
+    events = _get_engine().evaluate({tf: p for tf, p in panels.items() if p is not None and len(p)}, names)
+
+    signals = []
+    for event in events:
+        spec = event.spec
+        direction = "ABOVE" if event.direction > 0 else "BELOW"
+        df = frames[spec.timeframe][event.symbol].tail(spec.window)
+        signals.append({
+            "symbol": event.symbol,
+            "signal": spec.name,
+            "timeframe": spec.timeframe,
+            "title": spec.title.format(symbol=event.symbol, direction=direction),
+            "description": spec.description,
+            "label": spec.label,
+            "candle_time": event.candle_time,
+            "dataframe": panels[spec.timeframe].frame_for(event.symbol, df)
+        })
+    return signals
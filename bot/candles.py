@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+from .config import settings
+from .store import OHLCV_COLUMNS
+
+class CandleRing:
+    """
+    Fixed-capacity buffer of candles: int64 open times (ns, UTC) and an OHLCV matrix.
+
+    The newest `capacity` candles are always one contiguous slice, so `view`
+    never copies or reorders. New candles go into a little spare room after
+    that slice; once it is used up, the window is moved back to the front of
+    the arrays, which costs one copy per `slack` appends.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float64, slack: Optional[int] = None):
+        if capacity < 1:
+            raise ValueError("Ring capacity must be at least 1.")
+        self.capacity = capacity
+        length = capacity + (slack if slack is not None else max(16, capacity // 8))
+        self._ts = np.zeros(length, dtype=np.int64)
+        self._ohlcv = np.zeros((length, len(OHLCV_COLUMNS)), dtype=dtype)
+        self._end = 0   # One past the newest candle
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        return int(self._ts[self._end - 1]) if self._size else None
+
+    def extend(self, ts: np.ndarray, rows: np.ndarray):
+        """Appends candles (ascending times, all newer than `last_ts`)."""
+        k = len(ts)
+        if k > self.capacity:
+            ts, rows, k = ts[-self.capacity:], rows[-self.capacity:], self.capacity
+        if self._end + k > len(self._ts):
+            # Out of spare room: move the candles that stay in the window to the front
+            keep = min(self._size, self.capacity - k)
+            self._ts[:keep] = self._ts[self._end - keep:self._end]
+            self._ohlcv[:keep] = self._ohlcv[self._end - keep:self._end]
+            self._end, self._size = keep, keep
+        self._ts[self._end:self._end + k] = ts
+        self._ohlcv[self._end:self._end + k] = rows
+        self._end += k
+        self._size = min(self.capacity, self._size + k)
+
+    def upsert(self, ts: np.ndarray, rows: np.ndarray) -> int:
+        """
+        Merges candles into the ring: a candle with the newest stored time replaces
+        it (the open candle moved on), newer ones are appended, older ones ignored.
+
+        Returns:
+            The number of candles appended.
+        """
+        last = self.last_ts
+        if last is not None:
+            if len(ts) and ts[0] < last:
+                keep = ts >= last
+                ts, rows = ts[keep], rows[keep]
+            if len(ts) and ts[0] == last:
+                self._ohlcv[self._end - 1] = rows[0]
+                ts, rows = ts[1:], rows[1:]
+        self.extend(ts, rows)
+        return len(ts)
+
+    def view(self, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """The newest `n` (default: all) candles as zero-copy (times, OHLCV) array views."""
+        n = self._size if n is None else min(n, self._size)
+        return self._ts[self._end - n:self._end], self._ohlcv[self._end - n:self._end]
+
+    def frame(self, n: Optional[int] = None) -> pd.DataFrame:
+        """
+        The newest `n` candles as a DataFrame over the ring's memory.
+
+        The values are not copied, so the frame is only valid until the ring is
+        next written to; call .copy() on anything that has to outlive that.
+        """
+        ts, ohlcv = self.view(n)
+        index = pd.DatetimeIndex(ts.view("datetime64[ns]"), name="Date").tz_localize("UTC")
+        return pd.DataFrame(ohlcv, index=index, columns=OHLCV_COLUMNS, copy=False)
+
+def _as_arrays(df: pd.DataFrame, dtype) -> Tuple[np.ndarray, np.ndarray]:
+    index = df.index if df.index.tz is not None else df.index.tz_localize("UTC")
+    return index.asi8, df[OHLCV_COLUMNS].to_numpy(dtype=dtype)
+
+class CandleBook:
+    """
+    One CandleRing per (symbol, interval), created on first use.
+
+    Frames handed out by `frames` are views over the rings, so the cycle that
+    reads them does not allocate a new copy of every symbol's history.
+    """
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = dtype
+        self._rings: Dict[Tuple[str, str], CandleRing] = {}
+
+    def ring(self, symbol: str, interval: str) -> Optional[CandleRing]:
+        return self._rings.get((symbol, interval))
+
+    def ensure_ring(self, symbol: str, interval: str, capacity: int) -> CandleRing:
+        ring = self._rings.get((symbol, interval))
+        if ring is None:
+            ring = self._rings[(symbol, interval)] = CandleRing(capacity, self.dtype)
+        return ring
+
+    def last_timestamps(self, symbols: Iterable[str], interval: str) -> Dict[str, pd.Timestamp]:
+        """Open time of the newest candle per symbol that has any."""
+        out = {}
+        for symbol in symbols:
+            ring = self._rings.get((symbol, interval))
+            if ring is not None and len(ring):
+                out[symbol] = pd.Timestamp(ring.last_ts, tz="UTC")
+        return out
+
+    def ingest(self, interval: str, frames: Dict[str, pd.DataFrame], capacity: int) -> int:
+        """
+        Merges fetched candles into the rings (see CandleRing.upsert).
+
+        Returns:
+            The number of new candles across all symbols.
+        """
+        added = 0
+        for symbol, df in frames.items():
+            if df.empty:
+                continue
+            added += self.ensure_ring(symbol, interval, capacity).upsert(*_as_arrays(df, self.dtype))
+        return added
+
+    def frames(self, interval: str, symbols: Iterable[str], n: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+        """Zero-copy frames of the newest `n` candles for every symbol with data."""
+        out = {}
+        for symbol in symbols:
+            ring = self._rings.get((symbol, interval))
+            if ring is not None and len(ring):
+                out[symbol] = ring.frame(n)
+        return out
+
+    def symbols(self, interval: str) -> List[str]:
+        return [s for (s, i) in self._rings if i == interval]
+
+    def nbytes(self) -> int:
+        """Memory held by all rings."""
+        return sum(r._ts.nbytes + r._ohlcv.nbytes for r in self._rings.values())
+
+_BOOK: Optional[CandleBook] = None
+
+def get_book() -> CandleBook:
+    """The process-wide candle book (float32 if CANDLE_FLOAT32 is set)."""
+    global _BOOK
+    if _BOOK is None:
+        _BOOK = CandleBook(np.float32 if settings.CANDLE_FLOAT32 else np.float64)
+    return _BOOK
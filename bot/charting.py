@@ -1,16 +1,46 @@
 import io
-import pandas as pd
-import mplfinance as mpf
+import time
+import asyncio
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Hashable, List, Optional, Tuple
 from .config import settings
+from .metrics import CHART_RENDERS, STAGE_SECONDS
 
-def generate_chart_image(df: pd.DataFrame, title: str) -> bytes:
+if TYPE_CHECKING:
+    import pandas as pd
+
+# matplotlib and mplfinance are imported on first use (normally only inside the
+# render processes), so the bot process does not pay their import time or memory.
+_STYLE = None
+
+def _plotting():
+    """Imports the plotting stack with the headless Agg backend selected."""
+    import matplotlib
+    matplotlib.use("Agg")  # Must be selected before pyplot is imported
+    import matplotlib.pyplot as plt
+    import mplfinance as mpf
+    return plt, mpf
+
+def _get_style():
+    # Built once per process instead of on every chart
+    global _STYLE
+    if _STYLE is None:
+        _, mpf = _plotting()
+        _STYLE = mpf.make_mpf_style(base_mpf_style='yahoo', gridstyle='--')
+    return _STYLE
+
+def generate_chart_image(df: "pd.DataFrame", title: str, annotations: Optional[List[Tuple["pd.Timestamp", str]]] = None) -> bytes:
     """
     Generates a PNG image of a price chart with MACD.
     
     Args:
         df: DataFrame containing OHLCV and MACD data.
         title: The chart title.
+        annotations: (candle time, label) arrows to draw; defaults to 'Signal' on the last candle.
         
     Returns:
         The PNG image as a bytes object.
@@ -19,22 +49,24 @@ def generate_chart_image(df: pd.DataFrame, title: str) -> bytes:
         logging.warning("Attempted to generate chart from an empty DataFrame.")
         return b""
 
+    plt, mpf = _plotting()
+    fig = None
     try:
         # Ensure the index is a DatetimeIndex, required by mplfinance
         df.index.name = 'Date'
 
         # Define MACD plot
-        macd_plot = mpf.make_addplot(df['macd'], panel=2, color='blue', title="MACD")
-        signal_plot = mpf.make_addplot(df['macd_signal'], panel=2, color='orange')
+        # Panel 1 sits directly below the price panel (no volume panel is drawn)
+        macd_plot = mpf.make_addplot(df['macd'], panel=1, color='blue', title="MACD")
+        signal_plot = mpf.make_addplot(df['macd_signal'], panel=1, color='orange')
         # Histogram plotted with a secondary_y axis to avoid scaling issues
-        hist_plot = mpf.make_addplot(df['macd_histogram'], panel=2, type='bar', color='gray', alpha=0.5, secondary_y=True)
+        hist_plot = mpf.make_addplot(df['macd_histogram'], panel=1, type='bar', color='gray', alpha=0.5, secondary_y=True)
 
-        # Create the plot style and figure
-        style = mpf.make_mpf_style(base_mpf_style='yahoo', gridstyle='--')
+        # Create the figure
         fig, _ = mpf.plot(
             df,
             type='candle',
-            style=style,
+            style=_get_style(),
             title=f"\n{title}",
             ylabel='Price',
             addplot=[macd_plot, signal_plot, hist_plot],
@@ -43,18 +75,25 @@ def generate_chart_image(df: pd.DataFrame, title: str) -> bytes:
             returnfig=True # Return the figure object
         )
         
-        # Add an arrow pointing to the last candle where the signal occurred
-        last_row = df.iloc[-1]
-        arrow_y_pos = last_row['high'] * 1.02 # A little above the high
-        fig.axes[0].annotate(
-            'Signal',
-            xy=(df.index[-1], last_row['close']),
-            xytext=(df.index[-20], arrow_y_pos),
-            arrowprops=dict(facecolor='red', shrink=0.05, width=2, headwidth=8),
-            fontsize=12,
-            color='red',
-            fontweight='bold'
-        )
+        # Add an arrow pointing to each candle where a signal occurred.
+        # Labels on the same candle are merged into one arrow. mplfinance places
+        # candles at x = 0..n-1 (not at their dates), so positions are used as x.
+        labels: Dict[int, List[str]] = {}
+        for when, label in annotations or [(df.index[-1], 'Signal')]:
+            pos = df.index.get_indexer([when])[0]
+            labels.setdefault(pos if pos >= 0 else len(df) - 1, []).append(label)
+        for pos, names in labels.items():
+            row = df.iloc[pos]
+            arrow_y_pos = row['high'] * 1.02 # A little above the high
+            fig.axes[0].annotate(
+                ' + '.join(dict.fromkeys(names)),
+                xy=(pos, row['close']),
+                xytext=(max(0, pos - 20), arrow_y_pos),
+                arrowprops=dict(facecolor='red', shrink=0.05, width=2, headwidth=8),
+                fontsize=12,
+                color='red',
+                fontweight='bold'
+            )
         
         # Save the figure to a bytes buffer
         buf = io.BytesIO()
@@ -65,4 +104,148 @@ def generate_chart_image(df: pd.DataFrame, title: str) -> bytes:
 
     except Exception as e:
         logging.error(f"Failed to generate chart image: {e}", exc_info=True)
-        return b""
\ No newline at end of file
+        return b""
+    finally:
+        # Figures returned with returnfig=True stay registered with pyplot until closed.
+        # If mpf.plot itself failed we never got the figure, so drop whatever it created.
+        plt.close(fig if fig is not None else "all")
+
+# --- Off-loop rendering service ---
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+def _init_worker():
+    """Runs once in each render process so its first chart does not pay the import and style cost."""
+    _get_style()
+
+def _warmup() -> bool:
+    return True
+
+def _render_timed(df: "pd.DataFrame", title: str, annotations) -> Tuple[bytes, float]:
+    # Timed inside the worker so the metric excludes pool queueing and pickling
+    start = time.perf_counter()
+    png = generate_chart_image(df, title, annotations)
+    return png, time.perf_counter() - start
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.CHART_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+    return _executor
+
+async def start_renderer():
+    """Starts the render processes ahead of the first alert."""
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    await asyncio.gather(*(loop.run_in_executor(executor, _warmup) for _ in range(settings.CHART_WORKERS)))
+    logging.info(f"Chart renderer ready with {settings.CHART_WORKERS} worker process(es).")
+
+def shutdown_renderer():
+    """Stops the render processes, waiting for them so none is left behind when the caller exits."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+class ChartCache:
+    """LRU cache of rendered PNGs, bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        png = self._entries.get(key)
+        if png is not None:
+            self._entries.move_to_end(key)
+        return png
+
+    def put(self, key: Hashable, png: bytes):
+        if not png or len(png) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= len(old)
+        self._entries[key] = png
+        self.nbytes += len(png)
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= len(evicted)
+
+_CACHE: Optional[ChartCache] = None
+_IN_FLIGHT: Dict[Hashable, "asyncio.Future[bytes]"] = {}
+
+def _get_cache() -> ChartCache:
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = ChartCache(int(settings.CHART_CACHE_MB * 1024 * 1024))
+    return _CACHE
+
+async def _render(df: "pd.DataFrame", title: str, annotations) -> bytes:
+    global _executor
+    loop = asyncio.get_running_loop()
+    try:
+        png, elapsed = await loop.run_in_executor(_get_executor(), _render_timed, df, title, annotations)
+        STAGE_SECONDS.observe(elapsed, stage="generate_chart_image")
+        return png
+    except BrokenProcessPool as e:
+        logging.error(f"Chart render process died, restarting pool: {e}")
+        _executor = None
+        return b""
+    except Exception as e:
+        # E.g. the pool could not start its processes; the alert still goes out as text
+        logging.error(f"Chart render failed: {e}", exc_info=True)
+        return b""
+
+async def render_chart(df: "pd.DataFrame", title: str,
+                       annotations: Optional[List[Tuple["pd.Timestamp", str]]] = None,
+                       cache_key: Optional[Hashable] = None) -> bytes:
+    """
+    Renders a chart in the process pool without blocking the event loop.
+
+    Several calls can be awaited together (e.g. with asyncio.gather) to render
+    the charts of one cycle in parallel. Returns b"" on failure, like
+    generate_chart_image.
+
+    With a `cache_key` (e.g. `(symbol, timeframe)`), the PNG is cached under that
+    key plus the window's last candle, length, title and annotations: a repeat
+    is served from the cache, and identical renders already running are shared.
+    """
+    if cache_key is None or df.empty:
+        CHART_RENDERS.inc(result="rendered")
+        return await _render(df, title, annotations)
+
+    key = (cache_key, df.index[-1], len(df), title, tuple(annotations or ()))
+    cache = _get_cache()
+    png = cache.get(key)
+    if png is not None:
+        CHART_RENDERS.inc(result="cached")
+        return png
+
+    pending = _IN_FLIGHT.get(key)
+    if pending is not None:
+        CHART_RENDERS.inc(result="shared")
+        return await asyncio.shield(pending)
+
+    CHART_RENDERS.inc(result="rendered")
+    future = asyncio.get_running_loop().create_future()
+    _IN_FLIGHT[key] = future
+    try:
+        png = await _render(df, title, annotations)
+        cache.put(key, png)
+        future.set_result(png)
+        return png
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # Mark retrieved; waiters still receive it
+        raise
+    finally:
+        _IN_FLIGHT.pop(key, None)
\ No newline at end of file
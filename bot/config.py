@@ -1,5 +1,11 @@
 import os
 from dataclasses import dataclass
+from typing import Tuple
+
+def _env_list(name: str, default: str) -> Tuple[str, ...]:
+    """Reads a comma-separated environment variable into a tuple of stripped, non-empty items."""
+    raw = os.environ.get(name, default)
+    return tuple(item.strip() for item in raw.split(",") if item.strip())
 
 @dataclass(frozen=True)
 class Settings:
@@ -7,24 +13,99 @@ class Settings:
     # API Keys & Webhooks
     DISCORD_WEBHOOK: str = os.environ.get("DISCORD_WEBHOOK", "").strip()
     CRYPTOPANIC_API_KEY: str = os.environ.get("CRYPTOPANIC_API_KEY", "").strip()
+    COINMARKETCAL_API_KEY: str = os.environ.get("COINMARKETCAL_API_KEY", "").strip()
 
     # Market Settings
     SYMBOL: str = os.environ.get("SYMBOL", "BTC-USD").strip()
+    # Comma-separated watchlist; defaults to the single SYMBOL
+    SYMBOLS: Tuple[str, ...] = _env_list("SYMBOLS", SYMBOL)
     TIMEFRAME_15M: str = "15m"
     TIMEFRAME_1D: str = "1d"
+    # Higher timeframes built locally from the 15m candles (no extra downloads)
+    RESAMPLED_TIMEFRAMES: Tuple[str, ...] = _env_list("RESAMPLED_TIMEFRAMES", "1h,4h")
 
     # MACD Parameters
     MACD_FAST: int = int(os.environ.get("MACD_FAST", "8"))
     MACD_SLOW: int = int(os.environ.get("MACD_SLOW", "15"))
     MACD_SIGNAL: int = int(os.environ.get("MACD_SIGNAL", "9"))
+    # Cross-check the streaming MACD against a full pandas_ta pass (debug only)
+    MACD_VERIFY: bool = os.environ.get("MACD_VERIFY", "").lower() in ("1", "true", "yes")
+    MACD_VERIFY_TOLERANCE: float = float(os.environ.get("MACD_VERIFY_TOLERANCE", "1e-9"))
+
+    # Signal Behavior
+    SIGNAL_HYSTERESIS: float = float(os.environ.get("SIGNAL_HYSTERESIS", "0")) # Dead band around zero, fraction of price
+    EARLY_WARNING_DEBOUNCE: int = int(os.environ.get("EARLY_WARNING_DEBOUNCE", "1")) # Polls a cross must persist
 
     # Bot Behavior
-    POLL_SECONDS: int = int(os.environ.get("POLL_SECONDS", "60"))
-    LOOKBACK_PERIOD_15M: str = "5d" # How much 15m data to fetch
+    POLL_SECONDS: int = int(os.environ.get("POLL_SECONDS", "60")) # Early-warning poll interval
+    CANDLE_CLOSE_DELAY: float = float(os.environ.get("CANDLE_CLOSE_DELAY", "5")) # Seconds after a candle close before checking it
+    SCHEDULER_JITTER: float = float(os.environ.get("SCHEDULER_JITTER", "2")) # Max random delay added to each job run
+    # How much 15m data to keep; also the base for resampled timeframes (Yahoo caps 15m at 60 days)
+    LOOKBACK_PERIOD_15M: str = os.environ.get("LOOKBACK_PERIOD_15M", "1mo").strip()
     LOOKBACK_PERIOD_1D: str = "1y" # How much 1d data to fetch
 
+    # Market Data Source: 'yahoo' polls on the scheduler, 'replay' streams stored candles (offline testing)
+    MARKET_DATA_SOURCE: str = os.environ.get("MARKET_DATA_SOURCE", "yahoo").strip().lower()
+    REPLAY_START: str = os.environ.get("REPLAY_START", "").strip() # First replayed candle (UTC); default mid-history
+    REPLAY_TICKS: int = int(os.environ.get("REPLAY_TICKS", "4")) # Updates pushed per replayed candle
+    REPLAY_SPEED: float = float(os.environ.get("REPLAY_SPEED", "0")) # Multiple of real time; 0 = as fast as possible
+
+    # Yahoo Chart Requests
+    # 'aiohttp' requests the chart endpoint directly on the shared session; 'yfinance' uses yf.download in a thread
+    YAHOO_FETCHER: str = os.environ.get("YAHOO_FETCHER", "aiohttp").strip().lower()
+    YAHOO_BASE_URL: str = os.environ.get("YAHOO_BASE_URL", "https://query2.finance.yahoo.com").strip().rstrip("/")
+    YAHOO_CONCURRENCY: int = int(os.environ.get("YAHOO_CONCURRENCY", "4")) # Chart requests in flight (see also HTTP_POOL_LIMIT_PER_HOST)
+
+    # Candle Store
+    CANDLE_STORE_PATH: str = os.environ.get("CANDLE_STORE_PATH", "data/candles.sqlite3").strip()
+    # Stored candles are kept this long, well past the lookback windows, so replay.py can use them; 0 = forever
+    CANDLE_RETENTION_DAYS: float = float(os.environ.get("CANDLE_RETENTION_DAYS", "730"))
+    # Keep in-memory candles as float32 (half the memory; MACD is still computed in float64)
+    CANDLE_FLOAT32: bool = os.environ.get("CANDLE_FLOAT32", "").lower() in ("1", "true", "yes")
+
+    # State Snapshots
+    STATE_PATH: str = os.environ.get("STATE_PATH", "data/state.json").strip()
+    STATE_SNAPSHOT_SECONDS: int = int(os.environ.get("STATE_SNAPSHOT_SECONDS", "300"))
+    STATE_TTL_HOURS: float = float(os.environ.get("STATE_TTL_HOURS", "0")) # 0 keeps entries forever
+
+    # News & Events
+    SEEN_IDS_MAX: int = int(os.environ.get("SEEN_IDS_MAX", "5000")) # Remembered IDs per source
+    SEEN_IDS_TTL_HOURS: float = float(os.environ.get("SEEN_IDS_TTL_HOURS", "720")) # Forget an ID after this; 0 = never
+    ENRICHMENT_TIMEOUT: float = float(os.environ.get("ENRICHMENT_TIMEOUT", "30")) # Seconds per source before it is skipped
+
+    # Discord Delivery
+    DISCORD_QUEUE_SIZE: int = int(os.environ.get("DISCORD_QUEUE_SIZE", "200"))
+    DISCORD_MAX_RATE_LIMITED: int = int(os.environ.get("DISCORD_MAX_RATE_LIMITED", "5")) # 429s tolerated per request
+
+    # Shared HTTP Client
+    HTTP_POOL_LIMIT: int = int(os.environ.get("HTTP_POOL_LIMIT", "20"))
+    HTTP_POOL_LIMIT_PER_HOST: int = int(os.environ.get("HTTP_POOL_LIMIT_PER_HOST", "4"))
+    HTTP_DNS_CACHE_SECONDS: int = int(os.environ.get("HTTP_DNS_CACHE_SECONDS", "300"))
+    HTTP_KEEPALIVE_SECONDS: float = float(os.environ.get("HTTP_KEEPALIVE_SECONDS", "60"))
+    HTTP_CACHE_SIZE: int = int(os.environ.get("HTTP_CACHE_SIZE", "128")) # Cached responses (LRU)
+    HTTP_CACHE_TTL: float = float(os.environ.get("HTTP_CACHE_TTL", "300")) # When the server sends no max-age
+
+    # Circuit Breakers & Retry Budget
+    BREAKER_FAILURES: int = int(os.environ.get("BREAKER_FAILURES", "5")) # Consecutive failures that open an endpoint's circuit
+    BREAKER_RESET_SECONDS: float = float(os.environ.get("BREAKER_RESET_SECONDS", "60")) # Open time before one trial call
+    RETRY_BUDGET: int = int(os.environ.get("RETRY_BUDGET", "10")) # Retries shared by everything in one job run
+    CYCLE_BUDGET_SECONDS: float = float(os.environ.get("CYCLE_BUDGET_SECONDS", "45")) # No retry may end later than this into a job run
+
+    # Charting
+    CHART_WORKERS: int = int(os.environ.get("CHART_WORKERS", "2"))
+    CHART_CACHE_MB: float = float(os.environ.get("CHART_CACHE_MB", "16")) # Rendered PNGs kept for reuse (LRU)
+    # Start render processes at boot instead of on the first alert
+    CHART_PREWARM: bool = os.environ.get("CHART_PREWARM", "").lower() in ("1", "true", "yes")
+
+    # Sharded Worker Mode (run.py --workers)
+    WORKERS: int = int(os.environ.get("WORKERS", "1")) # Worker processes; 1 runs everything in one process
+    SHARD_MAX_RESTARTS: int = int(os.environ.get("SHARD_MAX_RESTARTS", "5")) # Before a shard's symbols move to the others
+    SHARD_STALL_SECONDS: float = float(os.environ.get("SHARD_STALL_SECONDS", "300")) # Silence before a worker is restarted; 0 = never
+
     # System
     PORT: int = int(os.environ.get("PORT", "10000"))
+    # Seconds `run.py --import-report` allows for /health to come up
+    HEALTH_STARTUP_BUDGET: float = float(os.environ.get("HEALTH_STARTUP_BUDGET", "1.5"))
 
 
 settings = Settings()
\ No newline at end of file
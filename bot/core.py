@@ -1,86 +1,318 @@
+import math
+import time
 import asyncio
 import logging
 from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import pandas as pd
 from .config import settings
 from .state import STATE
-from .data import fetch_ohlcv
-from .analysis import calculate_macd, find_signals
-from .charting import generate_chart_image
-from .services.discord import send_message, send_file
-from .services.news import get_daily_news
-from .services.events import get_upcoming_events
+from .metrics import STAGE_SECONDS
+from .data import candle_capacity, fetch_ohlcv_batch
+from .candles import get_book
+from .analysis import MACDPanel, calculate_macd_panel, default_signal_specs, find_signals
+from .resample import resample_frames
+from .scheduler import Job, Scheduler
+from .feeds import LiveCandles, MarketDataSource, get_source
+from .charting import render_chart, shutdown_renderer, start_renderer
+from .services.discord import send_message, send_file, stop_delivery
+from .services.http_client import close_session
+from .services.enrichment import collect as collect_enrichment
+from .services.news import NewsSource
+from .services.events import EventsSource
+from .persistence import restore_state, snapshot_periodically, snapshot_state
+
+# Latest (fetch time, candles, MACD panel) per downloaded timeframe, shared between jobs
+_MARKET: Dict[str, Tuple[float, Dict[str, pd.DataFrame], Optional[MACDPanel]]] = {}
+_MARKET_LOCKS: Dict[str, asyncio.Lock] = {}
+
+# Daily informational messages, fetched concurrently
+ENRICHMENT_SOURCES = [NewsSource(), EventsSource()]
 
 async def startup_message():
     """Sends a startup message to Discord."""
     logging.info("Sending startup message.")
+    symbols = settings.SYMBOLS
+    watched = ", ".join(symbols) if len(symbols) <= 10 else f"{len(symbols)} symbols"
     await send_message(
         f"✅ **ZeroZoro Bot Started**\n"
-        f"Monitoring `{settings.SYMBOL}` with MACD(`{settings.MACD_FAST}`,`{settings.MACD_SLOW}`,`{settings.MACD_SIGNAL}`)\n"
-        f"Polling every {settings.POLL_SECONDS / 60:.0f} minutes."
+        f"Monitoring `{watched}` with MACD(`{settings.MACD_FAST}`,`{settings.MACD_SLOW}`,`{settings.MACD_SIGNAL}`)\n"
+        f"Early warnings every {settings.POLL_SECONDS / 60:.0f} minute(s), confirmations at each candle close."
     )
 
-async def check_market_signals():
-    """Fetches market data, analyzes for signals, and sends alerts."""
-    # Fetch data for both timeframes concurrently
-    data_15m_task = fetch_ohlcv(settings.SYMBOL, settings.TIMEFRAME_15M, settings.LOOKBACK_PERIOD_15M)
-    data_1d_task = fetch_ohlcv(settings.SYMBOL, settings.TIMEFRAME_1D, settings.LOOKBACK_PERIOD_1D)
-    df_15m, df_1d = await asyncio.gather(data_15m_task, data_1d_task)
+def _seconds(timeframe: str) -> float:
+    return pd.Timedelta(timeframe).total_seconds()
+
+def _slot_start(interval: float) -> float:
+    """Epoch time of the latest wake-up slot of a job with this cadence (see scheduler.Job)."""
+    offset = settings.CANDLE_CLOSE_DELAY
+    return math.floor((time.time() - offset) / interval) * interval + offset
+
+async def _market_data(timeframe: str, period: str, not_before: float) -> Tuple[Dict[str, pd.DataFrame], Optional[MACDPanel]]:
+    """
+    Returns the candles and MACD panel of `timeframe`, fetched no earlier than `not_before`.
+
+    Jobs that wake for the same slot (e.g. the early-warning poll and the 15m
+    confirmation at a candle close) share one download instead of each fetching.
+    """
+    lock = _MARKET_LOCKS.setdefault(timeframe, asyncio.Lock())
+    async with lock:
+        cached = _MARKET.get(timeframe)
+        if cached is not None and cached[0] >= not_before:
+            return cached[1], cached[2]
 
-    # Calculate MACD for both
-    df_15m_macd = calculate_macd(df_15m)
-    df_1d_macd = calculate_macd(df_1d)
+        fetched_at = time.time()
+        # Candles live in the ring buffers; the fetch only returns what is new since the newest held one
+        book = get_book()
+        fresh = await fetch_ohlcv_batch(settings.SYMBOLS, timeframe, period, known=book.last_timestamps(settings.SYMBOLS, timeframe))
+        book.ingest(timeframe, fresh, capacity=candle_capacity(timeframe, period))
+        STATE.last_candle_times[timeframe] = book.last_timestamps(settings.SYMBOLS, timeframe)
+        frames = book.frames(timeframe, settings.SYMBOLS)
+        with STAGE_SECONDS.time(stage="calculate_macd"):
+            panel = calculate_macd_panel(frames, key=timeframe)
+        _MARKET[timeframe] = (fetched_at, frames, panel)
+        return frames, panel
 
-    # Find signals
-    signals = find_signals(df_15m_macd, df_1d_macd)
-    
+def _signal_names(timeframes: Iterable[str], per_candle: bool) -> List[str]:
+    return [s.name for s in default_signal_specs() if s.timeframe in timeframes and s.per_candle == per_candle]
+
+async def _deliver(content: str, chart_bytes: Optional[bytes] = None, filename: str = "chart.png"):
+    """Sends an alert to Discord, or to STATE.alert_sink when one is set (shard workers)."""
+    if STATE.alert_sink is not None:
+        await STATE.alert_sink(content, chart_bytes, filename)
+    elif chart_bytes:
+        await send_file(content=content, file_bytes=chart_bytes, filename=filename)
+    else: # Fallback to text if chart fails
+        await send_message(content)
+
+async def _send_alerts(signals: List[dict]):
+    """
+    Renders the charts of `signals` in parallel and queues the alerts.
+
+    Signals on the same chart window (same symbol, timeframe, last candle and
+    length) share one render with all their annotations, and go out as one message.
+    """
+    groups: Dict[tuple, List[dict]] = {}
     for signal in signals:
         logging.info(f"Signal found: {signal['title']}")
-        
-        # Generate chart
-        chart_bytes = generate_chart_image(signal['dataframe'], signal['title'])
-        
+        df = signal['dataframe']
+        key = (signal['symbol'], signal['timeframe'], df.index[-1] if len(df) else None, len(df))
+        groups.setdefault(key, []).append(signal)
+
+    # Generate all charts in parallel, off the event loop
+    charts = await asyncio.gather(*(
+        render_chart(
+            group[0]['dataframe'],
+            "\n".join(s['title'] for s in group),
+            annotations=[(s['candle_time'], s['label']) for s in group],
+            cache_key=(group[0]['symbol'], group[0]['timeframe']),
+        )
+        for group in groups.values()
+    ))
+
+    for group, chart_bytes in zip(groups.values(), charts):
         # Send alert with chart
-        content = f"**🚨 ALERT: {signal['title']}**\n{signal['description']}"
-        if chart_bytes:
-            await send_file(
-                content=content,
-                file_bytes=chart_bytes,
-                filename=f"{settings.SYMBOL}_alert.png"
-            )
-        else: # Fallback to text if chart fails
-            await send_message(content)
+        content = "\n".join(f"**🚨 ALERT: {s['title']}**\n{s['description']}" for s in group)
+        await _deliver(content, chart_bytes, f"{group[0]['symbol']}_alert.png")
+
+def _early_warnings(frames: Dict[str, pd.DataFrame], panel: Optional[MACDPanel]) -> List[dict]:
+    tf = settings.TIMEFRAME_15M
+    with STAGE_SECONDS.time(stage="find_signals"):
+        return find_signals({tf: panel}, {tf: frames}, names=_signal_names([tf], per_candle=True))
+
+def _15m_confirmations(frames_15m: Dict[str, pd.DataFrame], panel_15m: Optional[MACDPanel]) -> List[dict]:
+    tf = settings.TIMEFRAME_15M
+    panels = {tf: panel_15m}
+    frames = {tf: frames_15m}
+
+    # Higher timeframes are aggregated from the 15m candles instead of downloaded
+    for timeframe in settings.RESAMPLED_TIMEFRAMES:
+        with STAGE_SECONDS.time(stage="resample"):
+            frames[timeframe] = resample_frames(timeframe, frames_15m, tf)
+        with STAGE_SECONDS.time(stage="calculate_macd"):
+            panels[timeframe] = calculate_macd_panel(frames[timeframe], key=timeframe)
+
+    with STAGE_SECONDS.time(stage="find_signals"):
+        return find_signals(panels, frames, names=_signal_names(panels, per_candle=False))
+
+def _poll_on_15m_close() -> bool:
+    """
+    Whether the current early-warning poll slot is also a 15m candle close.
+
+    Both jobs wake for such a slot. The confirmation job then runs the early
+    warnings too, so alerts on the same window share one chart and one message.
+    """
+    return _slot_start(settings.POLL_SECONDS) == _slot_start(_seconds(settings.TIMEFRAME_15M))
+
+async def check_early_warnings():
+    """Polls the open 15m candle for intra-candle MACD crosses."""
+    if _poll_on_15m_close():
+        return  # check_15m_confirmations covers this slot
+    tf = settings.TIMEFRAME_15M
+    frames, panel = await _market_data(tf, settings.LOOKBACK_PERIOD_15M, _slot_start(settings.POLL_SECONDS))
+    await _send_alerts(_early_warnings(frames, panel))
+
+async def check_15m_confirmations():
+    """
+    Checks the just-closed 15m candle and the timeframes resampled from it, plus
+    the early warnings when an early-warning poll falls on this close.
+    """
+    tf = settings.TIMEFRAME_15M
+    frames, panel = await _market_data(tf, settings.LOOKBACK_PERIOD_15M, _slot_start(_seconds(tf)))
+    signals = _early_warnings(frames, panel) if _poll_on_15m_close() else []
+    # One batch, so alerts on the same window share a chart
+    await _send_alerts(signals + _15m_confirmations(frames, panel))
+
+async def stream_market_signals(source: MarketDataSource):
+    """
+    Checks the 15m signals on every update pushed by `source` instead of polling.
+
+    Early warnings are evaluated on every batch of updates. When a batch opens a
+    new candle, the one before it has closed and the confirmations run as well.
+    """
+    tf = settings.TIMEFRAME_15M
+    history = await source.history(list(settings.SYMBOLS), tf, settings.LOOKBACK_PERIOD_15M)
+    live = LiveCandles(history, capacity=candle_capacity(tf, settings.LOOKBACK_PERIOD_15M))
+    logging.info(f"Streaming {tf} updates for {len(settings.SYMBOLS)} symbol(s) from {type(source).__name__}.")
+
+    candle_times = STATE.last_candle_times.setdefault(tf, {})
+    async for updates in source.stream(list(settings.SYMBOLS), tf):
+        start = time.perf_counter()
+        opened = live.apply(updates)
+        candle_times.update((u.symbol, u.time) for u in updates)
+        with STAGE_SECONDS.time(stage="calculate_macd"):
+            panel = calculate_macd_panel(live.frames, key=tf)
+        signals = _early_warnings(live.frames, panel)
+        if opened:
+            signals += _15m_confirmations(live.frames, panel)
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="stream_update")
+        await _send_alerts(signals)
+
+    logging.info(f"{type(source).__name__} stream ended.")
+
+async def check_daily_signals():
+    """Checks the just-closed daily candle."""
+    tf = settings.TIMEFRAME_1D
+    frames, panel = await _market_data(tf, settings.LOOKBACK_PERIOD_1D, _slot_start(_seconds(tf)))
+    with STAGE_SECONDS.time(stage="find_signals"):
+        signals = find_signals({tf: panel}, {tf: frames}, names=_signal_names([tf], per_candle=False))
+    await _send_alerts(signals)
 
 async def check_daily_updates():
     """Checks for and sends daily news and events."""
     today = datetime.utcnow().strftime('%Y-%m-%d')
     if STATE.last_daily_update_date != today:
         logging.info("Performing daily news and events check...")
-        
-        # Get news from CryptoPanic
-        news_messages = await get_daily_news()
-        for msg in news_messages:
-            await send_message(msg)
-            await asyncio.sleep(1)
-            
-        # Get events from CoinMarketCal
-        event_messages = await get_upcoming_events()
-        for msg in event_messages:
-            await send_message(msg)
-            await asyncio.sleep(1)
+
+        # News (CryptoPanic) and events (CoinMarketCal) are fetched concurrently.
+        # Messages are queued; the delivery worker packs them into as few
+        # webhook requests as the rate limit allows.
+        for messages in await collect_enrichment(ENRICHMENT_SOURCES):
+            for msg in messages:
+                await send_message(msg)
 
         STATE.last_daily_update_date = today
 
+async def _report_job_error(job: Job, e: Exception):
+    await _deliver(f"🔥 **ERROR:** The `{job.name}` job failed: `{e}`. The bot is still running but may need attention.")
+
+def build_scheduler(streaming: bool = False, daily_updates: bool = True, market_checks: bool = True,
+                    on_complete: Optional[Callable[[Job, float], None]] = None) -> Scheduler:
+    """
+    The bot's jobs, each on its own cadence:
+
+    - early warnings poll the open 15m candle every POLL_SECONDS,
+    - confirmations wake CANDLE_CLOSE_DELAY seconds after each 15m / 1d candle close;
+      a poll that falls on a 15m close is run by the 15m confirmation job,
+    - news and events run once a day (unless `daily_updates` is False).
+
+    With `streaming`, the 15m checks are driven by a MarketDataSource instead and
+    are left out; without `market_checks`, all market jobs are (sharding coordinator).
+    """
+    def _completed(job: Job, lag: float):
+        STATE.last_job_runs[job.name] = time.time()
+        if on_complete is not None:
+            on_complete(job, lag)
+
+    delay, jitter = settings.CANDLE_CLOSE_DELAY, settings.SCHEDULER_JITTER
+    scheduler = Scheduler(on_error=_report_job_error, on_complete=_completed,
+                          retries=settings.RETRY_BUDGET, time_budget=settings.CYCLE_BUDGET_SECONDS)
+    if market_checks and not streaming:
+        scheduler.add(Job("early_warnings", check_early_warnings, settings.POLL_SECONDS, delay, jitter, run_at_start=True))
+        scheduler.add(Job("confirm_15m", check_15m_confirmations, _seconds(settings.TIMEFRAME_15M), delay, jitter, run_at_start=True))
+    if market_checks:
+        scheduler.add(Job("confirm_1d", check_daily_signals, _seconds(settings.TIMEFRAME_1D), delay, jitter, run_at_start=True))
+    if daily_updates:
+        scheduler.add(Job("daily_updates", check_daily_updates, 86400, delay, jitter, run_at_start=True))
+    return scheduler
+
 async def monitor():
     """The main monitoring loop of the bot."""
+    # Warm restart: signal regimes, seen news/events and the daily-update date
+    restore_state()
+
     await startup_message()
-    
-    while True:
+    if settings.CHART_PREWARM:
+        await start_renderer()
+    snapshot_task = asyncio.create_task(snapshot_periodically())
+
+    source = get_source(settings.MARKET_DATA_SOURCE)
+    try:
+        scheduler = build_scheduler(streaming=source is not None)
+        if source is None:
+            await scheduler.run()
+        else:
+            await asyncio.gather(scheduler.run(), stream_market_signals(source))
+    finally:
+        if source is not None:
+            await source.close()
+        snapshot_task.cancel()
+        try:
+            snapshot_state()
+        except OSError as e:
+            logging.error(f"Final state snapshot failed: {e}")
+        shutdown_renderer()
+        await stop_delivery()
+        await close_session()
+
+async def run_shard(alert_sink: Callable[[str, Optional[bytes], str], Awaitable[None]],
+                    on_complete: Callable[[Job, float], None], restore_paths: Iterable[str] = ()):
+    """
+    Runs the market checks for one shard of the watchlist (see bot.sharding).
+    The shard's symbols are settings.SYMBOLS, set by the worker process.
+
+    Same jobs as `monitor` minus news and events, which the coordinator runs.
+    Alerts go to `alert_sink` instead of Discord, and `on_complete` is told the
+    lag of every job run.
+
+    Args:
+        alert_sink: Async callable(content, chart_bytes, filename).
+        on_complete: Scheduler.on_complete callback.
+        restore_paths: Snapshots to restore signal state from, in order. After a
+            rebalance these include the snapshots of the shards the symbols came from.
+    """
+    for path in restore_paths:
+        restore_state(path)
+    STATE.alert_sink = alert_sink
+
+    if settings.CHART_PREWARM:
+        await start_renderer()
+    snapshot_task = asyncio.create_task(snapshot_periodically())
+
+    source = get_source(settings.MARKET_DATA_SOURCE)
+    try:
+        scheduler = build_scheduler(streaming=source is not None, daily_updates=False, on_complete=on_complete)
+        if source is None:
+            await scheduler.run()
+        else:
+            await asyncio.gather(scheduler.run(), stream_market_signals(source))
+    finally:
+        if source is not None:
+            await source.close()
+        snapshot_task.cancel()
         try:
-            await check_market_signals()
-            await check_daily_updates()
-            
-        except Exception as e:
-            logging.error(f"An unexpected error occurred in the monitor loop: {e}", exc_info=True)
-            await send_message(f"🔥 **ERROR:** An unexpected error occurred: `{e}`. The bot is still running but may need attention.")
-            
-        await asyncio.sleep(settings.POLL_SECONDS)
\ No newline at end of file
+            snapshot_state()
+        except OSError as e:
+            logging.error(f"Final shard state snapshot failed: {e}")
+        shutdown_renderer()
+        await close_session()
@@ -1,44 +1,236 @@
 import asyncio
 import logging
+from typing import Dict, List, Optional
 import pandas as pd
-import yfinance as yf
 from .config import settings
+from .metrics import FETCH_SECONDS
+from .store import get_store, to_utc_index
+from .utils import get_breaker
+from .yahoo import exchange_timezone, fetch_charts, wall_clock_interval
+
+# Widest UTC offset of any exchange (UTC+14)
+_MAX_UTC_OFFSET = pd.Timedelta(hours=14)
+_PERIOD_UNITS = {"d": 1, "wk": 7, "mo": 30, "y": 365}
+
+def _period_to_timedelta(period: str) -> Optional[pd.Timedelta]:
+    """Converts a yfinance period string (e.g. '5d', '1y') to a Timedelta. Returns None for 'max'/'ytd'."""
+    for unit, days in _PERIOD_UNITS.items():
+        if period.endswith(unit) and period[:-len(unit)].isdigit():
+            return pd.Timedelta(days=int(period[:-len(unit)]) * days)
+    return None
+
+def candle_capacity(timeframe: str, period: str, default: int = 10_000) -> int:
+    """How many `timeframe` candles fit in `period` (e.g. 2881 for 15m over '1mo')."""
+    window = _period_to_timedelta(period)
+    if window is None:
+        return default
+    return int(window / pd.Timedelta(timeframe)) + 1
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Renames yfinance columns to lowercase OHLCV and moves the index to UTC."""
+    # Basic validation
+    required_cols = ["Open", "High", "Low", "Close", "Volume"]
+    if not all(col in df.columns for col in required_cols):
+        raise ValueError(f"Yahoo Finance data is missing required columns. Got: {df.columns}")
+
+    df = df[required_cols].rename(columns={col: col.lower() for col in required_cols})
+    df = df.dropna(how="all")
+    df.index = to_utc_index(df.index)
+    df.index.name = "Date"
+    return df
+
+def _download(symbols: List[str], timeframe: str, **window) -> Dict[str, pd.DataFrame]:
+    """
+    Downloads candles for all `symbols` in one yf.download call.
+
+    Returns:
+        A normalized DataFrame per symbol; symbols Yahoo returned nothing for are omitted.
+    """
+    import yfinance as yf  # Deferred: only needed once the first fetch happens
+
+    # yfinance logs errors and returns nothing instead of raising, so an empty download counts as a failure
+    breaker = get_breaker("yahoo")
+    breaker.before_call()
+    try:
+        with FETCH_SECONDS.time(interval=timeframe):
+            df = yf.download(tickers=symbols, interval=timeframe, group_by="ticker", progress=False, **window)
+    except Exception:
+        breaker.record_failure()
+        raise
+    if df is None or df.empty:
+        breaker.record_failure()
+        return {}
+    breaker.record_success()
+    return _split_download(df, symbols)
+
+def _split_download(df: pd.DataFrame, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    """Splits a yf.download(group_by='ticker') result into one normalized DataFrame per symbol."""
+    if df.empty:
+        return {}
+
+    # A single ticker comes back with flat columns, several with a (ticker, field) MultiIndex
+    if not isinstance(df.columns, pd.MultiIndex):
+        return {symbols[0]: _normalize(df)}
+
+    by_upper = {symbol.upper(): symbol for symbol in symbols}
+    frames = {}
+    for ticker in df.columns.get_level_values(0).unique():
+        frame = _normalize(df[ticker])
+        if not frame.empty:
+            frames[by_upper.get(ticker, ticker)] = frame
+    return frames
+
+async def _download_charts(symbols: List[str], timeframe: str, **window) -> Dict[str, pd.DataFrame]:
+    """Downloads candles for all `symbols` with concurrent chart requests (see bot.yahoo)."""
+    charts = await fetch_charts(symbols, timeframe, **window)
+    return {symbol: chart.to_frame() for symbol, chart in charts.items()}
+
+async def _fetch(symbols: List[str], timeframe: str, **window) -> Dict[str, pd.DataFrame]:
+    """Downloads with the fetcher selected by YAHOO_FETCHER; both return the same frames."""
+    if settings.YAHOO_FETCHER == "yfinance":
+        # yfinance is synchronous, so it runs in a thread to avoid blocking asyncio
+        return await asyncio.to_thread(_download, symbols, timeframe, **window)
+    return await _download_charts(symbols, timeframe, **window)
+
+def _retention_start(since: Optional[pd.Timestamp]) -> Optional[pd.Timestamp]:
+    """Oldest candle time the store keeps (CANDLE_RETENTION_DAYS), never inside the lookback window starting at `since`."""
+    if settings.CANDLE_RETENTION_DAYS <= 0 or since is None:
+        return None
+    return min(since, pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=settings.CANDLE_RETENTION_DAYS))
+
+def _store_and_load(store, symbols: List[str], timeframe: str, fresh: Dict[str, pd.DataFrame],
+                    since: Optional[pd.Timestamp], known: Optional[Dict[str, pd.Timestamp]]) -> Dict[str, pd.DataFrame]:
+    store.write_batch(timeframe, fresh)
+    retention = _retention_start(since)
+    if retention is not None:
+        store.prune(list(fresh), timeframe, retention)
+    known = {s: ts for s, ts in (known or {}).items() if s in symbols and (since is None or ts >= since)}
+    frames = store.load_many([s for s in symbols if s not in known], timeframe, since) if len(known) < len(symbols) else {}
+    if known:
+        frames.update(store.load_many(list(known), timeframe, min(known.values())))
+    return frames
+
+def _request_start(symbol: str, timeframe: str, last: pd.Timestamp) -> pd.Timestamp:
+    """
+    The UTC time to request `symbol` from so that `last`, its newest stored candle, is fetched again.
+
+    For wall-clock intervals (see yahoo.wall_clock_interval) the store holds exchange
+    local times labelled as UTC. East of UTC such a label is later than the real
+    candle, so it is converted back with the exchange timezone. When that is not
+    known yet (e.g. with the yfinance fetcher), the widest UTC offset is subtracted.
+    """
+    if not wall_clock_interval(timeframe):
+        return last
+    tz = exchange_timezone(symbol)
+    if tz is None:
+        return last - _MAX_UTC_OFFSET
+    local = last.tz_localize(None).tz_localize(tz, ambiguous=True, nonexistent="shift_backward")
+    return local.tz_convert("UTC")
+
+async def _fetch_with_store(symbols: List[str], timeframe: str, period: str,
+                            known: Optional[Dict[str, pd.Timestamp]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Returns the candle window for `period` per symbol, downloading only the tail missing from the store.
+
+    Symbols in `known` (newest candle the caller already holds) only get the
+    candles from that one on, instead of the whole window.
+
+    The newest stored candle is re-fetched on every call because it may still have been
+    open when it was written; the upsert overwrites it with the latest values. Symbols
+    without usable history are fetched in one full-window batch, all others in one
+    batch starting at the oldest of their last stored candles. SQLite is synchronous,
+    so the store is read and written in a thread.
+    """
+    store = await asyncio.to_thread(get_store, settings.CANDLE_STORE_PATH)
+    if store is None:
+        return await _fetch(symbols, timeframe, period=period)
+
+    window = _period_to_timedelta(period)
+    since = pd.Timestamp.now(tz="UTC") - window if window is not None else None
+    last_ts = await asyncio.to_thread(store.last_timestamps, symbols, timeframe)
+
+    cold = [s for s in symbols if s not in last_ts or (since is not None and last_ts[s] < since)]
+    warm = [s for s in symbols if s not in cold]
+
+    downloads = []
+    if cold:
+        logging.info(f"Candle store cold for {len(cold)} symbol(s) ({timeframe}), downloading full {period} window.")
+        downloads.append(_fetch(cold, timeframe, period=period))
+    if warm:
+        start = min(_request_start(s, timeframe, last_ts[s]) for s in warm)
+        downloads.append(_fetch(warm, timeframe, start=start))
+    fresh = {}
+    for part in await asyncio.gather(*downloads):
+        fresh.update(part)
+
+    return await asyncio.to_thread(_store_and_load, store, symbols, timeframe, fresh, since, known)
 
 async def fetch_ohlcv(symbol: str, timeframe: str, period: str) -> pd.DataFrame:
     """
     Fetches OHLCV data from Yahoo Finance asynchronously.
-    
+
+    Candles are persisted in the local candle store, so after the first call
+    only the candles since the last stored timestamp are downloaded.
+
     Args:
         symbol: The market symbol (e.g., 'BTC-USD').
         timeframe: The candle interval (e.g., '15m', '1d').
         period: The duration to fetch data for (e.g., '5d', '1y').
-    
+
     Returns:
         A pandas DataFrame with OHLCV data.
     """
     try:
-        # yfinance is synchronous, so we run it in a thread to avoid blocking asyncio
-        df = await asyncio.to_thread(
-            yf.download,
-            tickers=symbol,
-            period=period,
-            interval=timeframe,
-            progress=False
-        )
+        frames = await _fetch_with_store([symbol], timeframe, period)
+        df = frames.get(symbol, pd.DataFrame())
 
         if df.empty:
             raise ValueError(f"No data returned from Yahoo Finance for {symbol} on {timeframe}.")
 
-        # Basic validation
-        required_cols = ["Open", "High", "Low", "Close", "Volume"]
-        if not all(col in df.columns for col in required_cols):
-            raise ValueError(f"Yahoo Finance data is missing required columns. Got: {df.columns}")
-            
-        df.rename(columns={col: col.lower() for col in required_cols}, inplace=True)
-
         return df
-        
+
     except Exception as e:
         logging.error(f"Failed to fetch data from Yahoo Finance for {symbol} ({timeframe}): {e}")
         # Return an empty DataFrame on failure to prevent crashing the main loop
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame()
+
+async def fetch_history(symbols: List[str], timeframe: str, period: str) -> Dict[str, pd.DataFrame]:
+    """
+    Downloads the whole `period` window for many symbols without reading or writing
+    the candle store, e.g. for backtests over periods the bot does not keep.
+
+    Uses the fetcher selected by YAHOO_FETCHER and its circuit breaker like the other
+    fetches, but raises instead of logging, since callers have nothing to fall back to.
+
+    Returns:
+        A dict of symbol -> OHLCV DataFrame. Symbols without data are left out.
+    """
+    frames = await _fetch(list(symbols), timeframe, period=period)
+    return {symbol: df for symbol, df in frames.items() if not df.empty}
+
+async def fetch_ohlcv_batch(symbols: List[str], timeframe: str, period: str,
+                            known: Optional[Dict[str, pd.Timestamp]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Fetches OHLCV data for many symbols, with concurrent chart requests (or one
+    batched yf.download when YAHOO_FETCHER is 'yfinance').
+
+    Args:
+        symbols: The market symbols to fetch.
+        timeframe: The candle interval (e.g., '15m', '1d').
+        period: The duration to fetch data for (e.g., '5d', '1y').
+        known: Newest candle per symbol the caller already has; those symbols
+            only get the candles from there on.
+
+    Returns:
+        A dict of symbol -> OHLCV DataFrame. Symbols without data are left out.
+    """
+    try:
+        frames = await _fetch_with_store(list(symbols), timeframe, period, known)
+    except Exception as e:
+        logging.error(f"Failed to fetch batch data from Yahoo Finance ({timeframe}): {e}")
+        return {}
+
+    missing = [symbol for symbol in symbols if frames.get(symbol) is None or frames[symbol].empty]
+    if missing:
+        logging.warning(f"No {timeframe} data from Yahoo Finance for: {', '.join(missing)}")
+    return {symbol: df for symbol, df in frames.items() if not df.empty}
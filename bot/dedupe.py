@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional
+
+class SeenStore:
+    """
+    Bounded set of seen IDs whose entries expire, for de-duplicating news and events.
+
+    Each ID is kept with the time it was first seen and dropped `ttl` seconds
+    later. Beyond `max_entries`, the least recently checked IDs are evicted
+    first, so memory stays flat however long the bot runs. Supports `in`,
+    `add`, `update`, `len` and iteration like the set it replaces.
+    """
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self._first_seen: "OrderedDict[str, float]" = OrderedDict()
+
+    def _expired(self, first_seen: float, now: float) -> bool:
+        return self.ttl is not None and now - first_seen >= self.ttl
+
+    def __contains__(self, key: str) -> bool:
+        first_seen = self._first_seen.get(key)
+        if first_seen is None:
+            return False
+        if self._expired(first_seen, time.time()):
+            del self._first_seen[key]
+            return False
+        self._first_seen.move_to_end(key)
+        return True
+
+    def add(self, key: str, first_seen: Optional[float] = None):
+        """Records `key`; an ID that is already present keeps its first-seen time."""
+        if key in self._first_seen:
+            self._first_seen.move_to_end(key)
+            return
+        now = time.time()
+        if first_seen is not None and self._expired(first_seen, now):
+            return
+        self._first_seen[key] = now if first_seen is None else first_seen
+        while len(self._first_seen) > self.max_entries:
+            self._first_seen.popitem(last=False)
+
+    def update(self, first_seen: Dict[str, float]):
+        """Adds IDs with their first-seen times (e.g. from a snapshot), oldest first."""
+        for key, stamp in sorted(first_seen.items(), key=lambda item: item[1]):
+            self.add(key, stamp)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Drops every expired ID.
+
+        Returns:
+            The number of IDs dropped.
+        """
+        if self.ttl is None:
+            return 0
+        now = time.time() if now is None else now
+        expired = [key for key, stamp in self._first_seen.items() if self._expired(stamp, now)]
+        for key in expired:
+            del self._first_seen[key]
+        return len(expired)
+
+    def stamps(self) -> Dict[str, float]:
+        """Unexpired IDs and their first-seen times (for snapshots)."""
+        self.expire()
+        return dict(self._first_seen)
+
+    def __len__(self) -> int:
+        return len(self._first_seen)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._first_seen))
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from .config import settings
+from .candles import CandleBook
+from .store import OHLCV_COLUMNS, get_store
+
+@dataclass
+class CandleUpdate:
+    """The latest state of one candle, as pushed by a market data source."""
+    symbol: str
+    time: pd.Timestamp  # Candle open time (UTC)
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    closed: bool = False  # True once the candle is final
+
+class MarketDataSource(ABC):
+    """
+    Push-based market data.
+
+    A source provides the candle history to start from and then an async
+    iterator of candle updates. Each item of the stream is the batch of
+    updates that arrived together (typically one per symbol), so consumers
+    can re-evaluate once per batch instead of once per symbol.
+    """
+
+    @abstractmethod
+    async def history(self, symbols: List[str], timeframe: str, period: str) -> Dict[str, pd.DataFrame]:
+        """Returns the OHLCV candles per symbol that precede the stream."""
+
+    @abstractmethod
+    def stream(self, symbols: List[str], timeframe: str) -> AsyncIterator[List[CandleUpdate]]:
+        """Yields batches of candle updates as they happen."""
+
+    async def close(self):
+        """Releases connections held by the source."""
+
+def _tick_path(o: float, h: float, l: float, c: float) -> List[float]:
+    # The usual OHLC path: a rising candle is assumed to dip to its low first, a falling one to peak first
+    return [o, l, h, c] if c >= o else [o, h, l, c]
+
+class ReplayFeed(MarketDataSource):
+    """
+    Replays stored candles as a live feed, standing in for an exchange WebSocket.
+
+    Candles before `start` form the history. Every later candle is pushed as
+    `ticks` partial updates along its OHLC path, the last one marked closed.
+    With `speed` > 0 the replay is paced at `speed` times real time; with 0 it
+    runs as fast as the consumer takes it.
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], timeframe: str, start: Optional[pd.Timestamp] = None,
+                 ticks: int = 4, speed: float = 0.0):
+        self.frames = {s: df[OHLCV_COLUMNS] for s, df in frames.items() if not df.empty}
+        self.timeframe = timeframe
+        self.ticks = max(1, ticks)
+        self.speed = speed
+        if start is None:
+            # Default: first half is history, second half is replayed
+            times = sorted(set().union(*(df.index for df in self.frames.values()))) if self.frames else []
+            start = times[len(times) // 2] if times else None
+        self.start = start
+
+    @classmethod
+    def from_store(cls, symbols: Iterable[str], timeframe: str, **kwargs) -> "ReplayFeed":
+        """Builds a feed from the candles in the local candle store."""
+        store = get_store(settings.CANDLE_STORE_PATH)
+        frames = store.load_many(symbols, timeframe) if store is not None else {}
+        return cls(frames, timeframe, **kwargs)
+
+    async def history(self, symbols: List[str], timeframe: str, period: str) -> Dict[str, pd.DataFrame]:
+        if self.start is None:
+            return {}
+        return {s: self.frames[s][self.frames[s].index < self.start] for s in symbols if s in self.frames}
+
+    async def stream(self, symbols: List[str], timeframe: str) -> AsyncIterator[List[CandleUpdate]]:
+        if self.start is None:
+            return
+        tail = {s: self.frames[s][self.frames[s].index >= self.start] for s in symbols if s in self.frames}
+        times = sorted(set().union(*(df.index for df in tail.values()))) if tail else []
+        tick_seconds = pd.Timedelta(timeframe).total_seconds() / self.ticks / self.speed if self.speed > 0 else 0.0
+
+        for ts in times:
+            rows = {s: df.loc[ts] for s, df in tail.items() if ts in df.index}
+            paths = {s: _tick_path(r["open"], r["high"], r["low"], r["close"]) for s, r in rows.items()}
+            for k in range(1, self.ticks + 1):
+                # Tick k has seen the first `seen` of the path's four points
+                seen = 1 + 3 * k // self.ticks
+                batch = []
+                for s, path in paths.items():
+                    part = path[:seen]
+                    batch.append(CandleUpdate(
+                        symbol=s, time=ts, open=part[0], high=max(part), low=min(part), close=part[-1],
+                        volume=float(rows[s]["volume"]) * k / self.ticks, closed=k == self.ticks,
+                    ))
+                yield batch
+                if tick_seconds:
+                    await asyncio.sleep(tick_seconds)
+                else:
+                    await asyncio.sleep(0)  # Let other tasks run between ticks
+
+class LiveCandles:
+    """
+    Per-symbol candles kept current from pushed updates, in fixed-capacity ring buffers.
+
+    Each symbol keeps its newest `capacity` candles, so a long-running stream does
+    not grow without bound, and an update is written in place without copying.
+    """
+
+    _INTERVAL = "live"
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], capacity: int, book: Optional[CandleBook] = None):
+        self.book = book or CandleBook()
+        self.capacity = capacity
+        self.book.ingest(self._INTERVAL, frames, capacity)
+
+    @property
+    def frames(self) -> Dict[str, pd.DataFrame]:
+        """Zero-copy frames over the ring buffers (valid until the next `apply`)."""
+        return self.book.frames(self._INTERVAL, self.book.symbols(self._INTERVAL))
+
+    def apply(self, updates: Iterable[CandleUpdate]) -> bool:
+        """
+        Applies a batch of updates.
+
+        Returns:
+            True if any update started a new candle, i.e. the previous one has closed.
+        """
+        opened = False
+        for u in updates:
+            ring = self.book.ensure_ring(u.symbol, self._INTERVAL, self.capacity)
+            ts = np.array([pd.Timestamp(u.time).value], dtype=np.int64)
+            if ring.last_ts is not None and ts[0] < ring.last_ts:
+                logging.debug(f"Ignoring out-of-order update for {u.symbol} at {u.time}.")
+                continue
+            had_candles = len(ring) > 0
+            if ring.upsert(ts, np.array([[u.open, u.high, u.low, u.close, u.volume]])) and had_candles:
+                opened = True
+        return opened
+
+def get_source(name: str) -> Optional[MarketDataSource]:
+    """
+    Returns the streaming source configured by MARKET_DATA_SOURCE, or None for
+    'yahoo', which keeps the scheduled polling jobs.
+    """
+    if name == "yahoo":
+        return None
+    if name == "replay":
+        start = pd.Timestamp(settings.REPLAY_START, tz="UTC") if settings.REPLAY_START else None
+        return ReplayFeed.from_store(settings.SYMBOLS, settings.TIMEFRAME_15M, start=start,
+                                     ticks=settings.REPLAY_TICKS, speed=settings.REPLAY_SPEED)
+    raise ValueError(f"Unknown MARKET_DATA_SOURCE '{name}'.")
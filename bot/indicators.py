@@ -0,0 +1,376 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Below this many values, StreamingEMA.run advances one value at a time
+_VECTORIZE_MIN = 32
+
+class StreamingEMA:
+    """
+    Exponential moving average advanced one value at a time.
+
+    Matches pandas_ta's `ema` (seeded with the SMA of the first `length` values,
+    then `ewm(adjust=False)`). Works on scalars or on numpy arrays, in which case
+    each element is an independent series. NaN inputs leave that element unchanged.
+    """
+
+    def __init__(self, length: int):
+        self.length = int(length)
+        self.alpha = 2.0 / (self.length + 1)
+        self.count = np.zeros((), dtype=np.int64)
+        self.total = np.zeros((), dtype=float)
+        self.value = np.full((), np.nan)
+
+    def _advance(self, x):
+        x = np.asarray(x, dtype=float)
+        valid = ~np.isnan(x)
+        count = self.count + valid
+        total = self.total + np.where(valid, x, 0.0)
+        seeded = valid & (self.count >= self.length)
+        value = np.where(seeded, self.value + self.alpha * (x - self.value), self.value)
+        value = np.where(valid & (count == self.length), total / self.length, value)
+        return count, total, value
+
+    def update(self, x):
+        """Commits one value (a closed candle) and returns the new EMA."""
+        self.count, self.total, self.value = self._advance(x)
+        return self.current()
+
+    def peek(self, x):
+        """Returns the EMA that `x` would produce, without committing it."""
+        count, _, value = self._advance(x)
+        return np.where(count >= self.length, value, np.nan)[()]
+
+    def current(self):
+        """Returns the last committed EMA (NaN until seeded)."""
+        return np.where(self.count >= self.length, self.value, np.nan)[()]
+
+    def run(self, values: np.ndarray) -> np.ndarray:
+        """
+        Commits every value in `values` (along the first axis) and returns the EMA after each.
+
+        From a fresh state a long history is computed in one vectorized pass
+        (see ema_history) instead of value by value, which is what makes a cold
+        start on years of candles cheap.
+        """
+        values = np.asarray(values, dtype=float)
+        if len(values) < _VECTORIZE_MIN or np.any(self.count):
+            out = np.empty(values.shape)
+            for i, x in enumerate(values):
+                out[i] = self.update(x)
+            return out
+
+        ema = ema_history(values, self.length)
+        valid = ~np.isnan(values)
+        self.count = valid.sum(axis=0)
+        self.total = np.where(valid, values, 0.0).sum(axis=0)
+        self.value = np.asarray(ema[-1], dtype=float)
+        return ema
+
+class StreamingMACD:
+    """
+    MACD with constant-time updates, matching `pandas_ta.macd`.
+
+    `update` advances the fast, slow and signal EMA state with a closed candle;
+    `peek` evaluates the still-open candle without touching committed state.
+    Both return a `(macd, histogram, signal)` tuple. A NaN close (no candle)
+    carries all three values and does not advance the signal line either.
+    """
+
+    def __init__(self, fast: int, slow: int, signal: int):
+        if slow < fast:
+            fast, slow = slow, fast
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+
+    def update(self, close) -> Tuple:
+        macd = self.fast.update(close) - self.slow.update(close)
+        signal = self.signal.update(_skip_gaps(macd, close))
+        return macd, macd - signal, signal
+
+    def peek(self, close) -> Tuple:
+        macd = self.fast.peek(close) - self.slow.peek(close)
+        signal = self.signal.peek(_skip_gaps(macd, close))
+        return macd, macd - signal, signal
+
+    def run(self, closes: np.ndarray) -> np.ndarray:
+        """Commits every value in `closes` (along the first axis) and returns the outputs stacked as (n, 3, ...)."""
+        closes = np.asarray(closes, dtype=float)
+        macd = self.fast.run(closes) - self.slow.run(closes)
+        signal = self.signal.run(_skip_gaps(macd, closes))
+        return np.stack([macd, macd - signal, signal], axis=1)
+
+def _skip_gaps(macd, closes):
+    # The MACD carried over a missing candle is not a new value for the signal EMA
+    return np.where(np.isnan(closes), np.nan, macd)
+
+def ema_history(values: np.ndarray, length: int) -> np.ndarray:
+    """
+    EMA over a whole history in one vectorized pass, matching StreamingEMA.
+
+    `values` is (n,) or (n, symbols). Each column is seeded with the mean of its
+    first `length` valid values; NaN cells are skipped and carry the last value.
+    """
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return values.copy()
+    matrix = values.reshape(len(values), -1)
+    valid = ~np.isnan(matrix)
+    counts = np.cumsum(valid, axis=0)
+    seeded = counts[-1] >= length
+    # Row of each column's `length`-th valid value, where its SMA seed goes
+    seed = np.argmax(counts >= length, axis=0)
+    cols = np.arange(matrix.shape[1])
+    sums = np.cumsum(np.where(valid, matrix, 0.0), axis=0)
+
+    start = np.where(np.arange(len(matrix))[:, None] < seed, np.nan, matrix)
+    start[seed, cols] = sums[seed, cols] / length
+    start[:, ~seeded] = np.nan
+    return _ewm(start, 2.0 / (length + 1)).reshape(values.shape)
+
+def _ewm(matrix: np.ndarray, alpha: float) -> np.ndarray:
+    """ewm(alpha, adjust=False, ignore_na=True).mean() down the columns of `matrix`."""
+    if len(matrix) >= 32 * matrix.shape[1]:
+        # Long and narrow: pandas' compiled loop per column is fastest
+        return pd.DataFrame(matrix).ewm(alpha=alpha, adjust=False, ignore_na=True).mean().to_numpy()
+    # Wide (many symbols or stacked configurations): step all columns together, row by row
+    out = np.empty(matrix.shape)
+    prev = out[0] = matrix[0]
+    for i in range(1, len(matrix)):
+        x = matrix[i]
+        step = np.where(np.isnan(prev), x, prev + alpha * (x - prev))
+        prev = out[i] = np.where(np.isnan(x), prev, step)
+    return out
+
+def macd_history(closes: np.ndarray, fast: int, slow: int, signal: int) -> np.ndarray:
+    """Full-history MACD as an (n, 3, ...) array of (macd, histogram, signal), matching StreamingMACD."""
+    return compute_indicators(closes, [MACDSpec(fast, slow, signal)]).values
+
+class MACDSeries:
+    """
+    Keeps a StreamingMACD in step with a candle frame that grows over time.
+
+    The last row of the frame is treated as the open candle. Closed candles
+    that were not seen before are committed once; the open candle is only
+    peeked. Committed outputs are kept so the full MACD columns can be
+    returned without recomputing them.
+
+    `closes` may be 1-D (one symbol) or 2-D (time x symbol), in which case every
+    symbol is advanced in the same vectorized step and NaN cells (no candle for
+    that symbol at that time) carry the previous values forward.
+    """
+
+    def __init__(self, fast: int, slow: int, signal: int):
+        self.params = (fast, slow, signal)
+        self._shape: Optional[tuple] = None
+        self._reset()
+
+    def _reset(self):
+        self.engine = StreamingMACD(*self.params)
+        self.timestamps: Optional[np.ndarray] = None
+        self.outputs: Optional[np.ndarray] = None
+        self._size = 0
+
+    def _append(self, timestamps: np.ndarray, outputs: np.ndarray):
+        needed = self._size + len(outputs)
+        allocated = 0 if self.outputs is None else len(self.outputs)
+        if needed > allocated:
+            capacity = max(needed, 2 * allocated, 64)
+            grown_out = np.empty((capacity,) + outputs.shape[1:])
+            grown_ts = np.empty(capacity, dtype=timestamps.dtype)
+            if self._size:
+                grown_out[:self._size] = self.outputs[:self._size]
+                grown_ts[:self._size] = self.timestamps[:self._size]
+            self.outputs, self.timestamps = grown_out, grown_ts
+        self.outputs[self._size:needed] = outputs
+        self.timestamps[self._size:needed] = timestamps
+        self._size = needed
+
+    def compute(self, index: pd.Index, closes: np.ndarray) -> np.ndarray:
+        """
+        Returns an (n, 3, ...) array of (macd, histogram, signal) aligned with `index`.
+
+        Args:
+            index: Candle open times, oldest first. The last entry is the open candle.
+            closes: Close prices aligned with `index`, shaped (n,) or (n, symbols).
+        """
+        closes = np.asarray(closes, dtype=float)
+        ts = np.asarray(index.asi8)
+        n_closed = len(ts) - 1
+        if n_closed < 0:
+            return np.empty((0, 3) + closes.shape[1:])
+
+        if self._shape != closes.shape[1:]:
+            self._reset()
+            self._shape = closes.shape[1:]
+
+        start = 0
+        if self._size:
+            last = self.timestamps[self._size - 1]
+            pos = int(np.searchsorted(ts[:n_closed], last))
+            if pos < n_closed and ts[pos] == last:
+                start = pos + 1
+            else:
+                self._reset()
+
+        if start < n_closed:
+            self._append(ts[start:n_closed], self.engine.run(closes[start:n_closed]))
+
+        # The committed history must cover the frame's closed candles one-to-one.
+        first = self._size - n_closed
+        if first < 0 or (n_closed and self.timestamps[first] != ts[0]) or \
+                (n_closed and self.timestamps[self._size - 1] != ts[n_closed - 1]):
+            self._reset()
+            return self.compute(index, closes)
+
+        out = np.empty((n_closed + 1, 3) + closes.shape[1:])
+        if n_closed:
+            out[:n_closed] = self.outputs[first:self._size]
+        out[n_closed] = self.engine.peek(closes[n_closed])
+
+        # Drop committed history that has scrolled out of the frame to bound memory.
+        if first > len(ts):
+            keep = self._size - first
+            self.outputs[:keep] = self.outputs[first:self._size]
+            self.timestamps[:keep] = self.timestamps[first:self._size]
+            self._size = keep
+        return out
+
+@dataclass(frozen=True)
+class EMASpec:
+    """Exponential moving average of the close, as `EMA_{length}`."""
+    length: int
+
+    @property
+    def columns(self) -> List[str]:
+        return [f"EMA_{self.length}"]
+
+@dataclass(frozen=True)
+class MACDSpec:
+    """MACD as `MACD_f_s_g`, `MACDh_f_s_g` (histogram) and `MACDs_f_s_g` (signal), like pandas_ta."""
+    fast: int
+    slow: int
+    signal: int
+
+    @property
+    def columns(self) -> List[str]:
+        suffix = f"{self.fast}_{self.slow}_{self.signal}"
+        return [f"MACD_{suffix}", f"MACDh_{suffix}", f"MACDs_{suffix}"]
+
+@dataclass(frozen=True)
+class RSISpec:
+    """Wilder's RSI of the close, as `RSI_{length}` (matches pandas_ta.rsi)."""
+    length: int = 14
+
+    @property
+    def columns(self) -> List[str]:
+        return [f"RSI_{self.length}"]
+
+IndicatorSpec = Union[EMASpec, MACDSpec, RSISpec]
+
+@dataclass
+class IndicatorBlock:
+    """All outputs of one compute_indicators call, as an (n, column, ...) array."""
+    columns: List[str]
+    values: np.ndarray
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """One output, shaped like the input closes."""
+        return self.values[:, self.columns.index(column)]
+
+    def to_frame(self, index: pd.Index) -> pd.DataFrame:
+        """The block as a DataFrame (only for 1-D input, i.e. one symbol)."""
+        return pd.DataFrame(self.values, index=index, columns=self.columns)
+
+def parse_indicator_specs(text: str) -> List[IndicatorSpec]:
+    """
+    Parses a comma-separated list such as "macd:12:26:9,ema:200,rsi:14".
+
+    Raises:
+        ValueError: On an unknown indicator or a wrong number of parameters.
+    """
+    kinds = {"ema": (EMASpec, 1), "macd": (MACDSpec, 3), "rsi": (RSISpec, 1)}
+    specs = []
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, *params = item.lower().split(":")
+        if name not in kinds or len(params) != kinds[name][1]:
+            raise ValueError(f"Cannot parse indicator '{item}'; expected one of ema:N, macd:F:S:G, rsi:N.")
+        specs.append(kinds[name][0](*(int(p) for p in params)))
+    return specs
+
+def _rma(values: np.ndarray, length: int) -> np.ndarray:
+    # pandas_ta's rma: Wilder smoothing, i.e. ewm(alpha=1/length) with the default adjust=True
+    matrix = values.reshape(len(values), -1)
+    rma = pd.DataFrame(matrix).ewm(alpha=1.0 / length, min_periods=length).mean().to_numpy()
+    return rma.reshape(values.shape)
+
+def compute_indicators(closes: np.ndarray, specs: Iterable[IndicatorSpec]) -> IndicatorBlock:
+    """
+    Computes many indicators over the same closes, sharing intermediate results.
+
+    Every distinct EMA span (EMA lengths and MACD fast/slow lengths) is computed
+    once and reused by every indicator that needs it, and each distinct MACD
+    line is computed once. Signal-line EMAs with the same span are stacked and
+    smoothed together, so a sweep over many MACD configurations costs one EMA
+    pass per distinct length rather than one pandas_ta call per configuration.
+
+    Args:
+        closes: (n,) or (n, symbols) close prices, oldest first.
+        specs: Indicators to compute; duplicates are computed once.
+
+    Returns:
+        An IndicatorBlock with the columns of the specs, in order.
+    """
+    closes = np.asarray(closes, dtype=float)
+    specs = list(dict.fromkeys(specs))
+    # pandas_ta swaps fast and slow when given the wrong way round
+    lines = list(dict.fromkeys(
+        (min(s.fast, s.slow), max(s.fast, s.slow)) for s in specs if isinstance(s, MACDSpec)
+    ))
+
+    spans = {s.length for s in specs if isinstance(s, EMASpec)} | {span for line in lines for span in line}
+    emas: Dict[int, np.ndarray] = {span: ema_history(closes, span) for span in sorted(spans)}
+    macd: Dict[Tuple[int, int], np.ndarray] = {line: emas[line[0]] - emas[line[1]] for line in lines}
+
+    # Signal lines: one EMA pass per distinct signal length over all MACD lines that need it
+    signal: Dict[Tuple[int, int, int], np.ndarray] = {}
+    by_length: Dict[int, List[Tuple[int, int]]] = {}
+    for s in specs:
+        if isinstance(s, MACDSpec):
+            by_length.setdefault(s.signal, [])
+            line = (min(s.fast, s.slow), max(s.fast, s.slow))
+            if line not in by_length[s.signal]:
+                by_length[s.signal].append(line)
+    for length, group in by_length.items():
+        smoothed = ema_history(np.stack([_skip_gaps(macd[line], closes) for line in group], axis=1), length)
+        for i, line in enumerate(group):
+            signal[line + (length,)] = smoothed[:, i]
+
+    rsi: Dict[int, np.ndarray] = {}
+    rsi_lengths = sorted({s.length for s in specs if isinstance(s, RSISpec)})
+    if rsi_lengths:
+        change = np.diff(closes, axis=0, prepend=np.nan)
+        gains, losses = np.clip(change, 0, None), np.clip(-change, 0, None)
+        for length in rsi_lengths:
+            up, down = _rma(gains, length), _rma(losses, length)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                rsi[length] = 100 * up / (up + down)
+
+    columns = [column for s in specs for column in s.columns]
+    block = np.empty((len(closes), len(columns)) + closes.shape[1:])
+    col = 0
+    for s in specs:
+        if isinstance(s, EMASpec):
+            block[:, col] = emas[s.length]
+        elif isinstance(s, MACDSpec):
+            line = (min(s.fast, s.slow), max(s.fast, s.slow))
+            smoothed = signal[line + (s.signal,)]
+            block[:, col] = macd[line]
+            np.subtract(macd[line], smoothed, out=block[:, col + 1])
+            block[:, col + 2] = smoothed
+        else:
+            block[:, col] = rsi[s.length]
+        col += len(s.columns)
+    return IndicatorBlock(columns, block)
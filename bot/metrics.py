@@ -0,0 +1,188 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Standard library only: the web server imports this before pandas & co. are loaded
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_REGISTRY: List["_Metric"] = []
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()  # Observed from the bot loop and worker threads, read by the web server
+        _REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    """A monotonically increasing count, one per label combination."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def items(self) -> List[Tuple[Tuple[str, ...], float]]:
+        """(label values, count) of every series."""
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(list(zip(self.labelnames, key)))} {_format_value(value)}")
+        return lines
+
+class Gauge(_Metric):
+    """A value that can go up and down, one per label combination."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def remove(self, **labels):
+        """Drops every series whose labels include `labels`."""
+        match = [(self.labelnames.index(k), str(v)) for k, v in labels.items()]
+        with self._lock:
+            for key in [k for k in self._values if all(k[i] == v for i, v in match)]:
+                del self._values[key]
+
+    def value(self, **labels) -> Optional[float]:
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+    def items(self) -> List[Tuple[Tuple[str, ...], float]]:
+        """(label values, value) of every series."""
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(list(zip(self.labelnames, key)))} {_format_value(value)}")
+        return lines
+
+class Histogram(_Metric):
+    """Observations (normally durations in seconds) counted into cumulative buckets."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label combination: [count per bucket (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[slot] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the wall time of the `with` block, measured on the monotonic clock."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                pairs = list(zip(self.labelnames, key))
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', _format_value(bound))])} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{_format_labels(pairs)} {cumulative}")
+        return lines
+
+def render() -> str:
+    """Returns every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# --- Pipeline metrics ---
+
+FETCH_SECONDS = Histogram(
+    "zorozero_fetch_seconds", "Yahoo Finance download time per candle interval.", ["interval"])
+STAGE_SECONDS = Histogram(
+    "zorozero_stage_seconds", "Time spent in one pipeline stage.", ["stage"])
+JOB_SECONDS = Histogram(
+    "zorozero_job_seconds", "Duration of one run of a scheduled job.", ["job"])
+JOB_OVERRUNS = Counter(
+    "zorozero_job_overruns_total", "Scheduled slots skipped because the job's previous run was still going.", ["job"])
+RETRIES = Counter(
+    "zorozero_retries_total", "Retries scheduled by async_backoff.", ["operation", "reason"])
+RETRIES_ABANDONED = Counter(
+    "zorozero_retries_abandoned_total", "Retries not attempted because the cycle's retry or time budget was spent.", ["operation", "reason"])
+CIRCUIT_STATE = Gauge(
+    "zorozero_circuit_state", "Circuit breaker state per endpoint: 0 closed, 1 half-open, 2 open.", ["endpoint"])
+CIRCUIT_REJECTED = Counter(
+    "zorozero_circuit_rejected_total", "Calls refused without trying because the endpoint's circuit was open.", ["endpoint"])
+CHART_RENDERS = Counter(
+    "zorozero_chart_renders_total", "Chart requests by outcome: rendered, served from cache, or shared with a running render.", ["result"])
+SHARD_LAG = Gauge(
+    "zorozero_shard_lag_seconds", "How late a shard worker finished its last job run, relative to the scheduled time.", ["shard", "job"])
+SHARD_SYMBOLS = Gauge(
+    "zorozero_shard_symbols", "Symbols assigned to each shard worker.", ["shard"])
+SHARD_RESTARTS = Counter(
+    "zorozero_shard_restarts_total", "Shard worker processes restarted after dying or stalling.", ["shard"])
+DISCORD_RESPONSES = Counter(
+    "zorozero_discord_responses_total", "Discord webhook responses by HTTP status.", ["status"])
@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Dict, Optional
+from .config import settings
+from .state import STATE
+from .analysis import default_signal_specs
+from .signals import SignalEngine
+
+SNAPSHOT_VERSION = 1
+
+def _ttl_seconds() -> Optional[float]:
+    return settings.STATE_TTL_HOURS * 3600 if settings.STATE_TTL_HOURS > 0 else None
+
+def snapshot_state(path: Optional[str] = None):
+    """
+    Writes the restorable parts of STATE to `path` atomically.
+
+    The snapshot is written to a temporary file in the same directory and moved
+    over the old one, so a crash mid-write never leaves a truncated snapshot.
+    """
+    path = path or settings.STATE_PATH
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "last_daily_update_date": STATE.last_daily_update_date,
+        "seen_news_ids": STATE.seen_news_ids.stamps(),
+        "seen_event_ids": STATE.seen_event_ids.stamps(),
+        "signals": STATE.signal_engine.to_dict() if STATE.signal_engine is not None else None,
+    }
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def restore_state(path: Optional[str] = None) -> bool:
+    """
+    Restores STATE from the snapshot at `path`, dropping entries older than STATE_TTL_HOURS.
+
+    Returns:
+        True if a snapshot was loaded.
+    """
+    path = path or settings.STATE_PATH
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError) as e:
+        logging.error(f"Could not read state snapshot {path}: {e}")
+        return False
+
+    if data.get("version") != SNAPSHOT_VERSION:
+        logging.warning(f"Ignoring state snapshot {path} with unknown version {data.get('version')}.")
+        return False
+
+    ttl = _ttl_seconds()
+    cutoff = time.time() - ttl if ttl is not None else None
+
+    def _fresh(stamped: Dict[str, float]) -> Dict[str, float]:
+        return {i: t for i, t in stamped.items() if cutoff is None or t >= cutoff}
+
+    news = _fresh(data.get("seen_news_ids", {}))
+    events = _fresh(data.get("seen_event_ids", {}))
+    STATE.seen_news_ids.update(news)
+    STATE.seen_event_ids.update(events)
+
+    if cutoff is None or data.get("saved_at", 0) >= cutoff:
+        STATE.last_daily_update_date = data.get("last_daily_update_date")
+
+    if data.get("signals"):
+        if STATE.signal_engine is None:
+            STATE.signal_engine = SignalEngine(default_signal_specs())
+        min_ts = int(cutoff * 1_000_000_000) if cutoff is not None else None
+        STATE.signal_engine.load_dict(data["signals"], min_ts=min_ts)
+
+    logging.info(f"Restored state snapshot from {path} ({len(news)} news, {len(events)} event IDs).")
+    return True
+
+async def snapshot_periodically(interval: Optional[float] = None):
+    """Background task that snapshots STATE every `interval` seconds."""
+    interval = interval or settings.STATE_SNAPSHOT_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            snapshot_state()
+        except OSError as e:
+            logging.error(f"State snapshot failed: {e}")
@@ -0,0 +1,67 @@
+import logging
+from typing import Dict
+import pandas as pd
+
+# How each OHLCV column aggregates into a higher-timeframe candle
+_AGGREGATION = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Aggregates OHLCV candles into a higher timeframe.
+
+    Buckets are labelled by their open time and anchored at the Unix epoch, so on
+    a UTC index '4h' candles start at 00:00/04:00/... and '1d' candles at UTC midnight.
+    """
+    if df.empty:
+        return df
+    out = df.resample(timeframe, origin="epoch", label="left", closed="left").agg(_AGGREGATION)
+    return out.dropna(subset=["close"])
+
+class Resampler:
+    """
+    Keeps one higher timeframe up to date from a base candle series.
+
+    Each update only re-aggregates base candles from the last (possibly still
+    forming) bucket onwards; earlier buckets are closed and reused as is.
+    """
+
+    def __init__(self, timeframe: str):
+        self.timeframe = timeframe
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+    def update(self, symbol: str, base: pd.DataFrame) -> pd.DataFrame:
+        """Returns the higher-timeframe candles for `symbol` given its latest base candles."""
+        if base.empty:
+            self._frames.pop(symbol, None)
+            return base
+
+        prev = self._frames.get(symbol)
+        if prev is None or prev.empty or prev.index[-1] < base.index[0]:
+            out = resample_ohlcv(base, self.timeframe)
+        else:
+            cut = prev.index[-1]
+            tail = resample_ohlcv(base[base.index >= cut], self.timeframe)
+            out = pd.concat([prev[prev.index < cut], tail])
+
+        # A leading bucket that starts before the base window is only partially covered
+        out = out[out.index >= base.index[0]]
+        self._frames[symbol] = out
+        return out
+
+_RESAMPLERS: Dict[str, Resampler] = {}
+
+def resample_frames(timeframe: str, frames: Dict[str, pd.DataFrame], base_timeframe: str) -> Dict[str, pd.DataFrame]:
+    """
+    Builds `timeframe` candles for every symbol from its `base_timeframe` candles.
+
+    Returns an empty dict if `timeframe` is not a whole multiple of the base.
+    """
+    target = pd.Timedelta(timeframe)
+    base = pd.Timedelta(base_timeframe)
+    if target < base or target % base:
+        logging.error(f"Cannot build {timeframe} candles from {base_timeframe} candles.")
+        return {}
+
+    resampler = _RESAMPLERS.setdefault(timeframe, Resampler(timeframe))
+    frames = {symbol: resampler.update(symbol, df) for symbol, df in frames.items()}
+    return {symbol: df for symbol, df in frames.items() if not df.empty}
@@ -0,0 +1,111 @@
+import math
+import time
+import random
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+from .metrics import JOB_OVERRUNS, JOB_SECONDS
+from .utils import retry_budget
+
+@dataclass
+class Job:
+    """
+    A coroutine run on a fixed, wall-clock aligned cadence.
+
+    Attributes:
+        name: Used in logs and metrics.
+        func: Coroutine function called with no arguments.
+        interval: Seconds between runs. Runs are aligned to multiples of it
+            since the Unix epoch (UTC), so a 900s job wakes on 15m candle closes.
+        offset: Seconds after each boundary to wake, e.g. to give the data
+            provider time to publish the closed candle.
+        jitter: Up to this many random seconds are added to every wake-up.
+        run_at_start: Also run once as soon as the scheduler starts.
+    """
+    name: str
+    func: Callable[[], Awaitable[None]]
+    interval: float
+    offset: float = 0.0
+    jitter: float = 0.0
+    run_at_start: bool = False
+
+    def next_run(self, now: float) -> float:
+        """The first scheduled time strictly after `now` (epoch seconds)."""
+        return (math.floor((now - self.offset) / self.interval) + 1) * self.interval + self.offset
+
+class Scheduler:
+    """
+    Runs every job in its own task, concurrently with the others.
+
+    Wake-ups are computed from the wall clock on every iteration instead of
+    sleeping a fixed interval after each run, so slow runs do not make the
+    cadence drift. A job never overlaps itself: if a run is still going when
+    its next slot comes, that slot is skipped and counted as an overrun.
+
+    Every run gets its own retry budget (see utils.retry_budget): at most
+    `retries` retries in total, none ending more than `time_budget` seconds
+    (capped at the job's interval) after the run started.
+    """
+
+    def __init__(self, on_error: Optional[Callable[[Job, Exception], Awaitable[None]]] = None,
+                 on_complete: Optional[Callable[[Job, float], None]] = None,
+                 retries: Optional[int] = None, time_budget: Optional[float] = None):
+        self.jobs: List[Job] = []
+        self.on_error = on_error
+        self.on_complete = on_complete  # Called with the job and its lag (finish time - scheduled time)
+        self.retries = retries
+        self.time_budget = time_budget
+
+    def add(self, job: Job):
+        if any(j.name == job.name for j in self.jobs):
+            raise ValueError(f"Job '{job.name}' is already scheduled.")
+        self.jobs.append(job)
+
+    async def _execute(self, job: Job, scheduled: float):
+        start = time.perf_counter()
+        try:
+            if self.retries is None:
+                await job.func()
+            else:
+                seconds = min(job.interval, self.time_budget) if self.time_budget else job.interval
+                with retry_budget(self.retries, seconds):
+                    await job.func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Job '{job.name}' failed: {e}", exc_info=True)
+            if self.on_error is not None:
+                try:
+                    await self.on_error(job, e)
+                except Exception as report_error:
+                    logging.error(f"Could not report failure of job '{job.name}': {report_error}")
+        finally:
+            JOB_SECONDS.observe(time.perf_counter() - start, job=job.name)
+
+        now = time.time()
+        if self.on_complete is not None:
+            self.on_complete(job, now - scheduled)
+        missed = math.floor((now - job.offset) / job.interval) - math.floor((scheduled - job.offset) / job.interval)
+        if missed > 0:
+            JOB_OVERRUNS.inc(missed, job=job.name)
+            logging.warning(f"Job '{job.name}' ran {time.perf_counter() - start:.1f}s and skipped {missed} slot(s) of {job.interval:g}s.")
+
+    async def _loop(self, job: Job):
+        if job.run_at_start:
+            await self._execute(job, time.time())
+        while True:
+            scheduled = job.next_run(time.time())
+            delay = scheduled - time.time() + (random.uniform(0, job.jitter) if job.jitter > 0 else 0.0)
+            await asyncio.sleep(max(0.0, delay))
+            await self._execute(job, scheduled)
+
+    async def run(self):
+        """Runs all jobs until cancelled."""
+        tasks = [asyncio.create_task(self._loop(job), name=f"job:{job.name}") for job in self.jobs]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
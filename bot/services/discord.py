@@ -1,51 +1,215 @@
+import json
+import time
+import asyncio
+import contextvars
 import logging
 import aiohttp
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
 from ..config import settings
+from ..metrics import DISCORD_RESPONSES, STAGE_SECONDS
 from ..state import STATE
-from ..utils import async_backoff
+from ..utils import CircuitOpenError, async_backoff, get_breaker
+from .http_client import get_session
 
-async def _ensure_session() -> aiohttp.ClientSession:
-    """Ensures a shared aiohttp session is available."""
-    if STATE.session and not STATE.session.closed:
-        return STATE.session
-    timeout = aiohttp.ClientTimeout(total=30, connect=10, sock_read=20)
-    STATE.session = aiohttp.ClientSession(timeout=timeout)
-    return STATE.session
+# Discord webhook limits per request
+MAX_CONTENT_LENGTH = 2000
+MAX_ATTACHMENTS = 10
+
+@dataclass
+class Delivery:
+    """One queued message, optionally with attachments as (filename, bytes) pairs."""
+    content: str
+    files: List[Tuple[str, bytes]] = field(default_factory=list)
+
+class RateLimitBucket:
+    """Tracks a webhook's rate-limit bucket from Discord's X-RateLimit-* and Retry-After headers."""
+
+    def __init__(self):
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+
+    def update(self, headers):
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_after = headers.get("X-RateLimit-Reset-After")
+        if remaining is not None:
+            self.remaining = int(remaining)
+        if reset_after is not None:
+            self.reset_at = time.monotonic() + float(reset_after)
+
+    def block(self, seconds: float):
+        """Marks the bucket exhausted for `seconds` (from a 429 response)."""
+        self.remaining = 0
+        self.reset_at = max(self.reset_at, time.monotonic() + seconds)
+
+    def delay(self) -> float:
+        if self.remaining == 0:
+            return max(0.0, self.reset_at - time.monotonic())
+        return 0.0
+
+    async def wait(self):
+        delay = self.delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.remaining == 0:
+            self.remaining = None  # Bucket has reset; the next response tells us the new count
+
+class DeliveryQueue:
+    """
+    Bounded queue drained by a background task that posts to one webhook.
+
+    Queued deliveries are packed into as few requests as Discord allows
+    (2000 characters of content and 10 attachments per request), and requests
+    are paced by the webhook's rate-limit bucket instead of fixed sleeps. A
+    batch that fails because Discord's circuit is open is held and sent again
+    once the circuit lets a trial call through.
+    """
+
+    def __init__(self, webhook: str, maxsize: int):
+        self.webhook = webhook
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.bucket = RateLimitBucket()
+        self.dropped = 0
+        self._carry: Optional[Delivery] = None
+        self._held: Optional[List[Delivery]] = None  # Batch waiting for the circuit to close
+        self._task: Optional[asyncio.Task] = None
+
+    def submit(self, delivery: Delivery) -> bool:
+        """Queues a delivery without waiting. Returns False if the queue is full."""
+        if len(delivery.content) > MAX_CONTENT_LENGTH:
+            delivery.content = delivery.content[:MAX_CONTENT_LENGTH - 1] + "…"
+        try:
+            self.queue.put_nowait(delivery)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logging.error(f"Discord delivery queue is full ({self.queue.maxsize}); dropping message.")
+            return False
+        if self._task is None or self._task.done():
+            # A fresh context, so the worker does not inherit the retry budget of the job that started it
+            self._task = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+        return True
+
+    def depth(self) -> int:
+        return self.queue.qsize() + (1 if self._carry else 0) + len(self._held or ())
+
+    def _take_batch(self, first: Delivery) -> List[Delivery]:
+        """Packs `first` and whatever else is already queued into one request's worth."""
+        batch = [first]
+        length = len(first.content)
+        files = len(first.files)
+        while not self.queue.empty():
+            candidate = self.queue.get_nowait()
+            if length + 1 + len(candidate.content) > MAX_CONTENT_LENGTH or files + len(candidate.files) > MAX_ATTACHMENTS:
+                self._carry = candidate
+                break
+            batch.append(candidate)
+            length += 1 + len(candidate.content)
+            files += len(candidate.files)
+        return batch
+
+    def _request_kwargs(self, batch: List[Delivery]) -> dict:
+        content = "\n".join(d.content for d in batch if d.content)
+        files = [f for d in batch for f in d.files]
+        if not files:
+            return {"json": {"content": content}}
+
+        # FormData is consumed when sent, so it is rebuilt for every attempt
+        form = aiohttp.FormData()
+        form.add_field('payload_json', json.dumps({"content": content}), content_type='application/json')
+        for i, (filename, file_bytes) in enumerate(files):
+            form.add_field(f'files[{i}]', file_bytes, filename=filename, content_type='image/png')
+        return {"data": form}
+
+    async def _deliver(self, batch: List[Delivery]) -> bool:
+        session = await get_session()
+        breaker = get_breaker("discord")
+        for attempt in range(1, settings.DISCORD_MAX_RATE_LIMITED + 1):
+            await self.bucket.wait()
+            # Hold the queue while Discord's circuit is open instead of dropping what is in it
+            while breaker.retry_in() > 0:
+                await asyncio.sleep(breaker.retry_in())
+
+            async def _post() -> bool:
+                start = time.perf_counter()
+                async with session.post(self.webhook, **self._request_kwargs(batch)) as resp:
+                    STAGE_SECONDS.observe(time.perf_counter() - start, stage="discord_post")
+                    DISCORD_RESPONSES.inc(status=str(resp.status))
+                    self.bucket.update(resp.headers)
+                    if resp.status == 429:
+                        retry_after = float(resp.headers.get("Retry-After", 0) or 0)
+                        if not retry_after:
+                            body = await resp.json(content_type=None)
+                            retry_after = float(body.get("retry_after", 1.0))
+                        self.bucket.block(retry_after)
+                        logging.warning(f"Discord rate limited, retry {attempt} in {retry_after:.1f}s")
+                        return False
+                    resp.raise_for_status()
+                    return True
+
+            # Rate limits are handled above from Discord's headers; backoff is only for errors
+            if await async_backoff(_post, retry_on_status=(500, 502, 503, 504), label="discord.deliver"):
+                return True
+        return False
+
+    async def _run(self):
+        while True:
+            if self._held:
+                batch, self._held = self._held, None
+            else:
+                first = self._carry or await self.queue.get()
+                if self._carry:
+                    self._carry = None
+                batch = self._take_batch(first)
+            try:
+                if not await self._deliver(batch):
+                    logging.error(f"Discord delivery of {len(batch)} message(s) gave up after repeated rate limits.")
+            except Exception as e:
+                breaker = get_breaker("discord")
+                if isinstance(e, CircuitOpenError) or breaker.state == "open":
+                    # The circuit (re)opened on this batch: keep it for the next trial instead of dropping it
+                    logging.warning(f"Discord circuit open; holding {len(batch)} message(s) until it recovers: {e}")
+                    self._held = batch
+                    await asyncio.sleep(breaker.retry_in() or 1.0)
+                    continue
+                logging.error(f"Discord delivery failed: {e}")
+            for _ in batch:
+                self.queue.task_done()
+
+    async def flush(self, timeout: Optional[float] = None):
+        """Waits until everything queued so far has been delivered (or given up on)."""
+        await asyncio.wait_for(self.queue.join(), timeout)
+
+    async def stop(self, timeout: float = 10.0):
+        """Flushes the queue and stops the background task."""
+        try:
+            await self.flush(timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Discord delivery queue not drained on shutdown ({self.depth()} pending).")
+        if self._task:
+            self._task.cancel()
+
+def _get_queue() -> DeliveryQueue:
+    if STATE.delivery is None:
+        STATE.delivery = DeliveryQueue(settings.DISCORD_WEBHOOK, settings.DISCORD_QUEUE_SIZE)
+    return STATE.delivery
 
 async def send_message(content: str):
-    """Sends a simple text message to the Discord webhook."""
+    """Queues a simple text message for the Discord webhook."""
     if not settings.DISCORD_WEBHOOK:
         logging.warning("Discord webhook not configured. Cannot send message.")
         return
 
-    session = await _ensure_session()
-
-    async def _post():
-        async with session.post(settings.DISCORD_WEBHOOK, json={"content": content}) as resp:
-            resp.raise_for_status()
-
-    try:
-        await async_backoff(_post, label="discord.send_message")
-    except Exception as e:
-        logging.error(f"Discord message failed: {e}")
+    _get_queue().submit(Delivery(content))
 
 async def send_file(content: str, file_bytes: bytes, filename: str):
-    """Sends a message with an image file to the Discord webhook."""
+    """Queues a message with an image file for the Discord webhook."""
     if not settings.DISCORD_WEBHOOK:
         logging.warning("Discord webhook not configured. Cannot send file.")
         return
 
-    session = await _ensure_session()
-    
-    async def _post():
-        with aiohttp.FormData() as form:
-            form.add_field('payload_json', f'{{"content": "{content}"}}')
-            form.add_field('file', file_bytes, filename=filename, content_type='image/png')
-            
-            async with session.post(settings.DISCORD_WEBHOOK, data=form) as resp:
-                resp.raise_for_status()
-
-    try:
-        await async_backoff(_post, label="discord.send_file")
-    except Exception as e:
-        logging.error(f"Discord file upload failed: {e}")
\ No newline at end of file
+    _get_queue().submit(Delivery(content, [(filename, file_bytes)]))
+
+async def stop_delivery(timeout: float = 10.0):
+    """Delivers whatever is still queued, then stops the delivery task."""
+    if STATE.delivery is not None:
+        await STATE.delivery.stop(timeout)
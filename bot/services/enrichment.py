@@ -0,0 +1,36 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional
+from ..config import settings
+from ..metrics import STAGE_SECONDS
+
+class EnrichmentSource(ABC):
+    """
+    A source of daily informational messages (news, events, ...).
+
+    Sources are collected concurrently by `collect`; each one has its own
+    timeout, so a slow API only costs its own messages.
+    """
+
+    name: str = "source"
+    timeout: Optional[float] = None  # Seconds; defaults to ENRICHMENT_TIMEOUT
+
+    @abstractmethod
+    async def messages(self) -> List[str]:
+        """Returns the formatted messages that have not been sent before."""
+
+async def _collect_one(source: EnrichmentSource) -> List[str]:
+    timeout = source.timeout or settings.ENRICHMENT_TIMEOUT
+    try:
+        with STAGE_SECONDS.time(stage=f"enrich_{source.name}"):
+            return await asyncio.wait_for(source.messages(), timeout)
+    except asyncio.TimeoutError:
+        logging.warning(f"Enrichment source '{source.name}' timed out after {timeout:g}s; skipping it this time.")
+    except Exception as e:
+        logging.error(f"Enrichment source '{source.name}' failed: {e}")
+    return []
+
+async def collect(sources: Iterable[EnrichmentSource]) -> List[List[str]]:
+    """Runs all sources concurrently. Returns each source's messages, in the order given."""
+    return list(await asyncio.gather(*(_collect_one(source) for source in sources)))
@@ -1,24 +1,16 @@
 import logging
-import aiohttp
 from typing import List
 from datetime import datetime
 from ..config import settings
 from ..state import STATE
-from ..utils import async_backoff
-
-async def _ensure_session() -> aiohttp.ClientSession:
-    if STATE.session and not STATE.session.closed:
-        return STATE.session
-    timeout = aiohttp.ClientTimeout(total=30, connect=10, sock_read=20)
-    STATE.session = aiohttp.ClientSession(timeout=timeout)
-    return STATE.session
+from .http_client import get_json
+from .enrichment import EnrichmentSource
 
 async def _fetch_coinmarketcal_events() -> List[dict]:
     """Fetches upcoming events from CoinMarketCal API."""
     if not settings.COINMARKETCAL_API_KEY:
         return []
 
-    session = await _ensure_session()
     url = "https://api.coinmarketcal.com/v1/events"
     # Get events for the next 30 days
     params = {
@@ -27,17 +19,12 @@ async def _fetch_coinmarketcal_events() -> List[dict]:
         "max": "5", # Get the top 5 most relevant events
     }
 
-    async def _get():
-        async with session.get(url, params=params) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
-            # The API returns a dictionary, the events are in the 'body' key
-            if isinstance(data, dict) and "body" in data:
-                return data["body"]
-            return [] # Return empty list if response format is unexpected
-
     try:
-        return await async_backoff(_get, label="coinmarketcal.get")
+        data = await get_json(url, params, label="coinmarketcal.get")
+        # The API returns a dictionary, the events are in the 'body' key
+        if isinstance(data, dict) and "body" in data:
+            return data["body"]
+        return [] # Return empty list if response format is unexpected
     except Exception as e:
         logging.error(f"CoinMarketCal API failed: {e}")
         return []
@@ -83,4 +70,11 @@ async def get_upcoming_events() -> List[str]:
     if new_events_count > 0:
         messages.insert(0, f"--- 🗓️ Upcoming Bitcoin Events ---")
 
-    return messages
\ No newline at end of file
+    return messages
+
+class EventsSource(EnrichmentSource):
+    """Upcoming CoinMarketCal events."""
+    name = "events"
+
+    async def messages(self) -> List[str]:
+        return await get_upcoming_events()
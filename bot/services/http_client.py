@@ -0,0 +1,154 @@
+import time
+import aiohttp
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from yarl import URL
+from ..config import settings
+from ..state import STATE
+from ..utils import async_backoff
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Returns the shared aiohttp session, creating it on first use.
+
+    All services (Discord, CryptoPanic, CoinMarketCal) go through this one pooled
+    connector, so connections and DNS lookups are reused between calls.
+    """
+    if STATE.session and not STATE.session.closed:
+        return STATE.session
+    connector = aiohttp.TCPConnector(
+        limit=settings.HTTP_POOL_LIMIT,
+        limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+        ttl_dns_cache=settings.HTTP_DNS_CACHE_SECONDS,
+        keepalive_timeout=settings.HTTP_KEEPALIVE_SECONDS,
+    )
+    timeout = aiohttp.ClientTimeout(total=30, connect=10, sock_read=20)
+    STATE.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    return STATE.session
+
+async def close_session():
+    """Closes the shared session and its pooled connections."""
+    if STATE.session and not STATE.session.closed:
+        await STATE.session.close()
+    STATE.session = None
+
+@dataclass
+class CacheEntry:
+    """A cached JSON response with its validators."""
+    data: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+
+def _freshness(headers) -> Tuple[bool, Optional[float]]:
+    """
+    Reads Cache-Control.
+
+    Returns:
+        (storable, max_age). max_age is None when the response does not set one,
+        and 0 for `no-cache` (store, but revalidate on every use).
+    """
+    directives = {}
+    for part in headers.get("Cache-Control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+    if "no-store" in directives:
+        return False, None
+    if "no-cache" in directives:
+        return True, 0.0
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name, "").isdigit():
+            return True, float(directives[name])
+    return True, None
+
+class HTTPCache:
+    """
+    LRU cache of JSON GET responses that revalidates with ETag / Last-Modified.
+
+    A fresh entry is served without a request. A stale one is revalidated with
+    If-None-Match / If-Modified-Since, so an unchanged resource costs a 304 with
+    no body. Entries live for the response's Cache-Control max-age, or
+    `default_ttl` seconds when the server does not say.
+    """
+
+    def __init__(self, max_entries: int, default_ttl: float):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(url: str, params: Optional[Dict[str, str]]) -> str:
+        return str(URL(url).update_query(params or {}))
+
+    def _store(self, key: str, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_json(self, url: str, params: Optional[Dict[str, str]] = None, label: str = "http.get") -> Any:
+        """
+        GETs `url` and returns the decoded JSON body, from the cache where possible.
+
+        Retries through async_backoff; errors are raised to the caller like a plain request.
+        """
+        key = self._key(url, params)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if entry.expires_at > now:
+                self.hits += 1
+                return entry.data
+
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        session = await get_session()
+
+        async def _get():
+            async with session.get(url, params=params, headers=headers) as resp:
+                storable, max_age = _freshness(resp.headers)
+                ttl = self.default_ttl if max_age is None else max_age
+                if resp.status == 304 and entry is not None:
+                    self.revalidated += 1
+                    entry.expires_at = time.monotonic() + ttl
+                    return entry.data
+                resp.raise_for_status()
+                data = await resp.json()
+                self.misses += 1
+                if storable and (ttl > 0 or resp.headers.get("ETag") or resp.headers.get("Last-Modified")):
+                    self._store(key, CacheEntry(
+                        data=data,
+                        etag=resp.headers.get("ETag"),
+                        last_modified=resp.headers.get("Last-Modified"),
+                        expires_at=time.monotonic() + ttl,
+                    ))
+                elif not storable:
+                    self._entries.pop(key, None)
+                return data
+
+        return await async_backoff(_get, label=label)
+
+    def clear(self):
+        self._entries.clear()
+
+_CACHE: Optional[HTTPCache] = None
+
+def get_cache() -> HTTPCache:
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = HTTPCache(settings.HTTP_CACHE_SIZE, settings.HTTP_CACHE_TTL)
+    return _CACHE
+
+async def get_json(url: str, params: Optional[Dict[str, str]] = None, label: str = "http.get") -> Any:
+    """Cached, conditional JSON GET through the shared session (see HTTPCache)."""
+    return await get_cache().get_json(url, params, label)
@@ -1,35 +1,21 @@
 import logging
-import aiohttp
 from typing import List
 from ..config import settings
 from ..state import STATE
-from ..utils import async_backoff
-
-# This function can be defined once in a shared http_client.py to avoid repetition
-async def _ensure_session() -> aiohttp.ClientSession:
-    if STATE.session and not STATE.session.closed:
-        return STATE.session
-    timeout = aiohttp.ClientTimeout(total=30, connect=10, sock_read=20)
-    STATE.session = aiohttp.ClientSession(timeout=timeout)
-    return STATE.session
+from .http_client import get_json
+from .enrichment import EnrichmentSource
 
 async def _fetch_cryptopanic_news() -> List[dict]:
     """Fetches the raw news data from the CryptoPanic API."""
     if not settings.CRYPTOPANIC_API_KEY:
         return []
 
-    session = await _ensure_session()
     url = "https://cryptopanic.com/api/v1/posts/"
     params = {"auth_token": settings.CRYPTOPANIC_API_KEY, "currencies": "BTC", "public": "true"}
 
-    async def _get():
-        async with session.get(url, params=params) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
-            return data.get("results", [])
-
     try:
-        return await async_backoff(_get, label="cryptopanic.get")
+        data = await get_json(url, params, label="cryptopanic.get")
+        return data.get("results", [])
     except Exception as e:
         logging.error(f"CryptoPanic API failed: {e}")
         return []
@@ -78,4 +64,11 @@ async def get_daily_news() -> List[str]:
     if new_articles_count > 0:
         messages.insert(0, f"--- 📰 Daily Crypto News Summary ---")
 
-    return messages
\ No newline at end of file
+    return messages
+
+class NewsSource(EnrichmentSource):
+    """Daily CryptoPanic headlines."""
+    name = "news"
+
+    async def messages(self) -> List[str]:
+        return await get_daily_news()
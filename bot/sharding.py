@@ -0,0 +1,226 @@
+import os
+import time
+import queue
+import asyncio
+import logging
+import multiprocessing as mp
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+from .config import settings
+from .state import STATE
+from .metrics import SHARD_LAG, SHARD_RESTARTS, SHARD_SYMBOLS
+from .worker import run_worker, shard_path
+from .core import build_scheduler, startup_message
+from .services.discord import send_file, send_message, stop_delivery
+from .services.http_client import close_session
+from .persistence import restore_state, snapshot_periodically, snapshot_state
+
+SUPERVISE_SECONDS = 5
+MAX_RESTART_BACKOFF = 60
+
+def split_symbols(symbols: Sequence[str], shards: int) -> List[List[str]]:
+    """Deals the symbols out round-robin, so each shard gets a similar share."""
+    return [list(symbols[i::shards]) for i in range(shards)]
+
+@dataclass
+class Shard:
+    """One worker process and the symbols it watches."""
+    index: int
+    symbols: List[str]
+    process: Optional[Any] = None   # multiprocessing Process
+    last_seen: float = 0.0          # Last message from the worker (time.time())
+    restarts: int = 0
+    restart_at: Optional[float] = None  # Set while waiting out the restart backoff
+
+class Coordinator:
+    """
+    Splits the watchlist across worker processes and supervises them.
+
+    Each worker runs the market checks for its shard (bot.worker.run_worker)
+    and sends alerts back over one queue; the coordinator delivers them through
+    the single Discord queue of this process. A worker that dies or goes silent
+    for SHARD_STALL_SECONDS is restarted with exponential backoff. After
+    SHARD_MAX_RESTARTS restarts its symbols are dealt out to the remaining
+    shards, which are restarted to pick them up.
+    """
+
+    def __init__(self, symbols: Sequence[str], workers: int):
+        self._ctx = mp.get_context("spawn")
+        self.outbox = self._ctx.Queue()
+        self.state_base = settings.STATE_PATH
+        self.store_base = settings.CANDLE_STORE_PATH
+        self.shards: Dict[int, Shard] = {
+            i: Shard(i, part) for i, part in enumerate(split_symbols(symbols, max(1, workers))) if part
+        }
+        self._retired: List[int] = []
+
+    def _restore_paths(self) -> List[str]:
+        """The main snapshot, then every shard snapshot, oldest first (newest regimes win)."""
+        paths = [shard_path(self.state_base, i) for i in [*self.shards, *self._retired]]
+        existing = [p for p in paths if os.path.exists(p)]
+        return [self.state_base] + sorted(existing, key=os.path.getmtime)
+
+    def spawn(self, target, args: tuple, name: str):
+        """
+        Starts a worker process. Workers are not daemonic, since daemonic processes
+        may not start children and every worker runs its own chart render pool;
+        `stop` terminates and joins them instead.
+        """
+        process = self._ctx.Process(target=target, args=args, name=name, daemon=False)
+        process.start()
+        return process
+
+    def _start(self, shard: Shard):
+        shard.process = self.spawn(
+            run_worker,
+            (shard.index, shard.symbols, self.outbox, self.state_base, self.store_base, self._restore_paths()),
+            f"zorozero-shard-{shard.index}",
+        )
+        shard.last_seen = time.time()
+        shard.restart_at = None
+        SHARD_SYMBOLS.set(len(shard.symbols), shard=str(shard.index))
+        logging.info(f"Started shard {shard.index} (pid {shard.process.pid}) with {len(shard.symbols)} symbol(s).")
+
+    @staticmethod
+    def _stop(shard: Shard, timeout: float = 10.0):
+        process, shard.process = shard.process, None
+        if process is None:
+            return
+        if process.is_alive():
+            process.terminate()  # The worker snapshots its state on SIGTERM
+            process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join(timeout)
+
+    def start(self):
+        for shard in self.shards.values():
+            self._start(shard)
+
+    async def stop(self):
+        await asyncio.gather(*(asyncio.to_thread(self._stop, shard) for shard in self.shards.values()))
+        await self._drain_pending()
+
+    async def _handle(self, message: tuple):
+        kind, index = message[0], message[1]
+        shard = self.shards.get(index)
+        if shard is not None:
+            shard.last_seen = time.time()
+        if kind == "alert":
+            _, _, content, chart_bytes, filename = message
+            if chart_bytes:
+                await send_file(content=content, file_bytes=chart_bytes, filename=filename)
+            else:
+                await send_message(content)
+        elif kind == "lag":
+            _, _, job, lag = message
+            SHARD_LAG.set(lag, shard=str(index), job=job)
+
+    async def _drain_pending(self):
+        # Alerts the workers sent while shutting down
+        while True:
+            try:
+                message = self.outbox.get_nowait()
+            except queue.Empty:
+                return
+            await self._handle(message)
+
+    async def _receive(self):
+        while True:
+            try:
+                message = await asyncio.to_thread(self.outbox.get, True, 1.0)
+            except queue.Empty:
+                continue
+            await self._handle(message)
+
+    async def _retire(self, shard: Shard):
+        """Hands the symbols of `shard` to the remaining shards and restarts those."""
+        del self.shards[shard.index]
+        self._retired.append(shard.index)
+        SHARD_SYMBOLS.remove(shard=str(shard.index))
+        SHARD_LAG.remove(shard=str(shard.index))
+        if not self.shards:
+            raise RuntimeError(f"Shard {shard.index} failed {shard.restarts} times and no other shard is left.")
+
+        remaining = sorted(self.shards.values(), key=lambda s: len(s.symbols))
+        for i, symbol in enumerate(shard.symbols):
+            remaining[i % len(remaining)].symbols.append(symbol)
+        logging.warning(f"Retired shard {shard.index}; moved its {len(shard.symbols)} symbol(s) to shard(s) "
+                        f"{', '.join(str(s.index) for s in remaining[:len(shard.symbols)])}.")
+        for target in remaining[:len(shard.symbols)]:
+            await asyncio.to_thread(self._stop, target)
+            self._start(target)
+
+    async def _check(self, shard: Shard, now: float):
+        if shard.restart_at is not None:
+            if now >= shard.restart_at:
+                self._start(shard)
+            return
+
+        dead = shard.process is None or not shard.process.is_alive()
+        stalled = settings.SHARD_STALL_SECONDS > 0 and now - shard.last_seen > settings.SHARD_STALL_SECONDS
+        if not (dead or stalled):
+            return
+
+        if dead:
+            exitcode = shard.process.exitcode if shard.process is not None else None
+            logging.error(f"Shard {shard.index} worker exited with code {exitcode}.")
+        else:
+            logging.error(f"Shard {shard.index} worker sent nothing for {now - shard.last_seen:.0f}s; restarting it.")
+        await asyncio.to_thread(self._stop, shard)
+
+        if shard.restarts >= settings.SHARD_MAX_RESTARTS:
+            await self._retire(shard)
+            return
+        shard.restarts += 1
+        SHARD_RESTARTS.inc(shard=str(shard.index))
+        shard.restart_at = now + min(MAX_RESTART_BACKOFF, 2 ** (shard.restarts - 1))
+
+    async def _supervise(self):
+        while True:
+            await asyncio.sleep(SUPERVISE_SECONDS)
+            now = time.time()
+            for shard in list(self.shards.values()):
+                if shard.index in self.shards:  # Not retired by an earlier check this round
+                    await self._check(shard, now)
+
+    def status(self) -> List[dict]:
+        """Per-shard summary for the web server's /state."""
+        now = time.time()
+        return [{
+            "shard": shard.index,
+            "symbols": shard.symbols,
+            "alive": shard.process is not None and shard.process.is_alive(),
+            "restarts": shard.restarts,
+            "seconds_since_seen": round(now - shard.last_seen, 1),
+            "lag_seconds": {job: lag for (index, job), lag in SHARD_LAG.items() if index == str(shard.index)},
+        } for shard in self.shards.values()] + [{"shard": index, "retired": True} for index in self._retired]
+
+    async def run(self):
+        """Receives worker messages and supervises the workers until cancelled."""
+        await asyncio.gather(self._receive(), self._supervise())
+
+async def coordinate(workers: int):
+    """
+    Sharded counterpart of core.monitor: market checks run in `workers` worker
+    processes, while news, events and Discord delivery stay in this one.
+    """
+    restore_state()
+    await startup_message()
+    snapshot_task = asyncio.create_task(snapshot_periodically())
+
+    coordinator = STATE.coordinator = Coordinator(settings.SYMBOLS, workers)
+    logging.info(f"Splitting {len(settings.SYMBOLS)} symbol(s) across {len(coordinator.shards)} worker(s).")
+    try:
+        coordinator.start()
+        scheduler = build_scheduler(market_checks=False)
+        await asyncio.gather(scheduler.run(), coordinator.run())
+    finally:
+        await coordinator.stop()
+        snapshot_task.cancel()
+        try:
+            snapshot_state()
+        except OSError as e:
+            logging.error(f"Final state snapshot failed: {e}")
+        await stop_delivery()
+        await close_session()
@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from .analysis import MACDPanel
+
+@dataclass(frozen=True)
+class SignalSpec:
+    """
+    Declares one zero-line cross signal.
+
+    Attributes:
+        name: Unique key, e.g. '15m_macd_early'.
+        timeframe: Which MACD panel the signal reads.
+        column: Panel series to watch ('macd', 'macd_signal' or 'macd_histogram').
+        title / description: Alert text; `title` may use {symbol} and {direction}.
+        curr_idx / prev_idx: Rows compared (-1 is the open candle, -2 the last closed one).
+        per_candle: The regime only lives for the candle at `curr_idx`, so the signal can
+            fire again (once per direction) on every new candle.
+        hysteresis: Dead band around zero as a fraction of the close price; the value has
+            to leave the band on the other side for a cross to count.
+        debounce: Consecutive evaluations a cross must persist before it fires.
+        window: Candles included in the alert chart.
+        label: Short name for the chart annotation.
+    """
+    name: str
+    timeframe: str
+    column: str
+    title: str
+    description: str
+    curr_idx: int = -1
+    prev_idx: int = -2
+    per_candle: bool = False
+    hysteresis: float = 0.0
+    debounce: int = 1
+    window: int = 100
+    label: str = "Signal"
+
+@dataclass
+class SignalEvent:
+    """An edge-triggered regime change of one signal for one symbol."""
+    spec: SignalSpec
+    symbol: str
+    direction: int  # 1 crossed above zero, -1 crossed below
+    value: float
+    candle_time: pd.Timestamp
+
+class SignalEngine:
+    """
+    Tracks the zero-line regime of every (signal, symbol) pair in (signals x symbols) arrays.
+
+    `evaluate` gathers the compared values of all signals and symbols into two
+    matrices and decides every cross in one set of array operations. Signal
+    types are data (`SignalSpec`), so adding one needs no new state fields.
+    """
+
+    def __init__(self, specs: Iterable[SignalSpec] = ()):
+        self.specs: List[SignalSpec] = []
+        self.symbols: List[str] = []
+        self._cols: Dict[str, int] = {}
+        self.regime = np.zeros((0, 0), dtype=np.int8)       # 1 above zero, -1 below, 0 unknown
+        self.regime_ts = np.zeros((0, 0), dtype=np.int64)   # candle the regime was last evaluated on
+        self.pending = np.zeros((0, 0), dtype=np.int8)      # direction waiting out the debounce
+        self.pending_count = np.zeros((0, 0), dtype=np.int16)
+        for spec in specs:
+            self.add_spec(spec)
+
+    def _resize(self, rows: int, cols: int):
+        for name in ("regime", "regime_ts", "pending", "pending_count"):
+            old = getattr(self, name)
+            new = np.zeros((rows, cols), dtype=old.dtype)
+            new[:old.shape[0], :old.shape[1]] = old
+            setattr(self, name, new)
+
+    def add_spec(self, spec: SignalSpec):
+        """Registers a signal type. Existing regimes are kept."""
+        if any(s.name == spec.name for s in self.specs):
+            raise ValueError(f"Signal '{spec.name}' is already registered.")
+        self.specs.append(spec)
+        self._resize(len(self.specs), len(self.symbols))
+
+    def _ensure_symbols(self, symbols: Iterable[str]):
+        new = [s for s in symbols if s not in self._cols]
+        if new:
+            for symbol in new:
+                self._cols[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            self._resize(len(self.specs), len(self.symbols))
+
+    def evaluate(self, panels: Dict[str, "MACDPanel"], names: Optional[Iterable[str]] = None) -> List[SignalEvent]:
+        """
+        Evaluates the registered signals for all symbols and commits the new regimes.
+
+        Args:
+            panels: MACD panel per timeframe (see analysis.MACDPanel).
+            names: Only evaluate these signals; the state of all others is left untouched.
+
+        Returns:
+            The signals that fired, in spec order.
+        """
+        for panel in panels.values():
+            if panel is not None:
+                self._ensure_symbols(panel.symbols)
+
+        shape = (len(self.specs), len(self.symbols))
+        prev = np.full(shape, np.nan)
+        curr = np.full(shape, np.nan)
+        band = np.zeros(shape)
+        ts = np.zeros(shape, dtype=np.int64)
+        active = np.zeros(shape, dtype=bool)
+
+        names = set(names) if names is not None else None
+        for row, spec in enumerate(self.specs):
+            if names is not None and spec.name not in names:
+                continue
+            panel = panels.get(spec.timeframe)
+            if panel is None or len(panel) < max(abs(spec.prev_idx), abs(spec.curr_idx)):
+                continue
+            cols = np.fromiter((self._cols[s] for s in panel.symbols), dtype=np.intp, count=len(panel.symbols))
+            values = getattr(panel, spec.column)
+            prev[row, cols] = values[spec.prev_idx]
+            curr[row, cols] = values[spec.curr_idx]
+            band[row, cols] = spec.hysteresis * np.abs(panel.close[spec.curr_idx])
+            ts[row, cols] = panel.times[spec.curr_idx]
+            active[row, cols] = True
+
+        per_candle = np.array([s.per_candle for s in self.specs], dtype=bool)[:, None]
+        debounce = np.array([s.debounce for s in self.specs], dtype=np.int16)[:, None]
+
+        # --- One pass over every (signal, symbol) pair ---
+        regime = np.where(per_candle & (self.regime_ts != ts), 0, self.regime)
+        band = np.nan_to_num(band)
+        crossed_up = (prev <= band) & (curr > band)
+        crossed_down = (prev >= -band) & (curr < -band)
+        direction = np.where(crossed_up, 1, np.where(crossed_down, -1, 0)).astype(np.int8)
+
+        candidate = active & (direction != 0) & (direction != regime)
+        count = np.where(candidate & (direction == self.pending), self.pending_count + 1, candidate.astype(np.int16))
+        fire = candidate & (count >= debounce)
+
+        waiting = candidate & ~fire
+        self.pending = np.where(active, np.where(waiting, direction, 0), self.pending).astype(np.int8)
+        self.pending_count = np.where(active, np.where(waiting, count, 0), self.pending_count).astype(np.int16)
+        self.regime = np.where(active, np.where(fire, direction, regime), self.regime).astype(np.int8)
+        self.regime_ts = np.where(active, ts, self.regime_ts)
+
+        events = []
+        for row, col in zip(*np.nonzero(fire)):
+            events.append(SignalEvent(
+                spec=self.specs[row],
+                symbol=self.symbols[col],
+                direction=int(direction[row, col]),
+                value=float(curr[row, col]),
+                candle_time=pd.Timestamp(int(ts[row, col]), tz="UTC"),
+            ))
+        return events
+
+    def summary(self) -> Dict[str, Dict[str, dict]]:
+        """Current regime per signal and symbol, JSON-ready (for the web server's /state)."""
+        out = {}
+        for row, spec in enumerate(self.specs):
+            out[spec.name] = {
+                symbol: {
+                    "regime": int(self.regime[row, col]),
+                    "candle_time": pd.Timestamp(int(self.regime_ts[row, col]), tz="UTC").isoformat() if self.regime_ts[row, col] else None,
+                }
+                for symbol, col in self._cols.items()
+            }
+        return out
+
+    def to_dict(self) -> dict:
+        """Serializable regime state, keyed by signal name and symbol."""
+        return {
+            "specs": [s.name for s in self.specs],
+            "symbols": list(self.symbols),
+            "regime": self.regime.tolist(),
+            "regime_ts": self.regime_ts.tolist(),
+        }
+
+    def load_dict(self, data: dict, min_ts: Optional[int] = None):
+        """
+        Restores regimes saved by `to_dict`. Signals or symbols that are no longer
+        registered are ignored; regimes last evaluated before `min_ts` (ns) are dropped.
+        """
+        rows = {name: i for i, name in enumerate(data.get("specs", []))}
+        if not rows or not data.get("symbols"):
+            return
+        self._ensure_symbols(data["symbols"])
+        regime = np.asarray(data.get("regime", []), dtype=np.int8).reshape(len(rows), -1)
+        regime_ts = np.asarray(data.get("regime_ts", []), dtype=np.int64).reshape(len(rows), -1)
+        cols = np.fromiter((self._cols[s] for s in data.get("symbols", [])), dtype=np.intp)
+        for row, spec in enumerate(self.specs):
+            saved = rows.get(spec.name)
+            if saved is None:
+                continue
+            keep = regime_ts[saved] >= min_ts if min_ts is not None else np.ones(len(cols), dtype=bool)
+            self.regime[row, cols[keep]] = regime[saved][keep]
+            self.regime_ts[row, cols[keep]] = regime_ts[saved][keep]
+
+    def regimes(self, name: str) -> Dict[str, int]:
+        """Returns the current regime per symbol for one signal (for inspection)."""
+        row = next(i for i, s in enumerate(self.specs) if s.name == name)
+        return {symbol: int(self.regime[row, col]) for symbol, col in self._cols.items()}
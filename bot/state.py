@@ -1,28 +1,44 @@
+import time
 from dataclasses import dataclass, field
-from typing import Dict, Optional, Set
+from typing import Any, Dict, Optional
 import aiohttp
+from .config import settings
+from .dedupe import SeenStore
+
+def _seen_store() -> SeenStore:
+    return SeenStore(settings.SEEN_IDS_MAX, settings.SEEN_IDS_TTL_HOURS * 3600)
 
 @dataclass
 class BotState:
     """Holds the runtime state of the bot."""
-    # Tracks state for "early warning" on the unclosed 15m candle
-    last_15m_macd_early_state: Optional[str] = None
-    
-    # Tracks state for "confirmation" on the closed 15m candle
-    last_15m_signal_confirm_state: Optional[str] = None
+    # Zero-line regime of every signal type and symbol (signals.SignalEngine)
+    signal_engine: Optional[Any] = None
     
-    # Tracks state for the daily chart
-    last_1d_macd_state: Optional[str] = None
-    
-    # Stores IDs of news/events already sent to avoid duplicates
-    seen_news_ids: Set[str] = field(default_factory=set)
-    seen_event_ids: Set[str] = field(default_factory=set)
+    # Stores IDs of news/events already sent to avoid duplicates (bounded, expiring)
+    seen_news_ids: SeenStore = field(default_factory=_seen_store)
+    seen_event_ids: SeenStore = field(default_factory=_seen_store)
     
     # Shared HTTP session for performance
     session: Optional[aiohttp.ClientSession] = None
+
+    # Outgoing Discord delivery queue (services.discord.DeliveryQueue)
+    delivery: Optional[Any] = None
+
+    # Async callable(content, chart_bytes, filename) that takes alerts instead of
+    # Discord; shard workers use it to forward alerts to the coordinator
+    alert_sink: Optional[Any] = None
     
     # Tracks last time daily updates were run
     last_daily_update_date: Optional[str] = None
 
+    # For the web server's /state and /health: open time (pd.Timestamp) of the newest
+    # candle per timeframe and symbol, and when each scheduler job last finished
+    last_candle_times: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    last_job_runs: Dict[str, float] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.time)
+
+    # sharding.Coordinator when running with worker processes
+    coordinator: Optional[Any] = None
+
 # Global state instance
 STATE = BotState()
\ No newline at end of file
@@ -0,0 +1,141 @@
+import os
+import sqlite3
+import threading
+import logging
+from typing import Dict, Iterable, List, Optional
+import pandas as pd
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    symbol   TEXT    NOT NULL,
+    interval TEXT    NOT NULL,
+    ts       INTEGER NOT NULL,
+    open     REAL,
+    high     REAL,
+    low      REAL,
+    close    REAL,
+    volume   REAL,
+    PRIMARY KEY (symbol, interval, ts)
+) WITHOUT ROWID
+"""
+
+def to_utc_index(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """Returns the index as a tz-aware UTC DatetimeIndex (naive timestamps are taken as UTC)."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is None:
+        return index.tz_localize("UTC")
+    return index.tz_convert("UTC")
+
+class CandleStore:
+    """
+    Append-only SQLite store of OHLCV candles keyed by (symbol, interval).
+
+    Candles are written with INSERT OR REPLACE on their open timestamp, so
+    re-writing the still-open candle simply overwrites the stored copy.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def last_timestamps(self, symbols: Iterable[str], interval: str) -> Dict[str, pd.Timestamp]:
+        """Returns the newest stored candle time for each symbol that has any candles."""
+        symbols = list(symbols)
+        placeholders = ",".join("?" * len(symbols))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT symbol, MAX(ts) FROM candles WHERE interval = ? AND symbol IN ({placeholders}) GROUP BY symbol",
+                [interval, *symbols],
+            ).fetchall()
+        return {symbol: pd.Timestamp(ts, unit="s", tz="UTC") for symbol, ts in rows if ts is not None}
+
+    def load_many(self, symbols: Iterable[str], interval: str, since: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Loads stored candles for several symbols with a single query.
+
+        Args:
+            symbols: The market symbols (e.g., 'BTC-USD').
+            interval: The candle interval (e.g., '15m', '1d').
+            since: Optional lower bound (inclusive) on the candle open time.
+
+        Returns:
+            A DataFrame indexed by UTC open time per symbol (empty if nothing is stored).
+        """
+        symbols = list(symbols)
+        placeholders = ",".join("?" * len(symbols))
+        query = f"SELECT symbol, ts, open, high, low, close, volume FROM candles WHERE interval = ? AND symbol IN ({placeholders})"
+        params = [interval, *symbols]
+        if since is not None:
+            query += " AND ts >= ?"
+            params.append(int(since.timestamp()))
+        query += " ORDER BY symbol, ts"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        frames = {symbol: pd.DataFrame(columns=OHLCV_COLUMNS) for symbol in symbols}
+        if rows:
+            df = pd.DataFrame(rows, columns=["symbol", "ts"] + OHLCV_COLUMNS)
+            df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("ts"), unit="s", utc=True), name="Date")
+            for symbol, group in df.groupby("symbol", sort=False):
+                frames[symbol] = group.drop(columns="symbol")
+        return frames
+
+    @staticmethod
+    def _rows(symbol: str, interval: str, df: pd.DataFrame) -> List[tuple]:
+        ts = (to_utc_index(df.index).asi8 // 1_000_000_000).tolist()
+        values = df[OHLCV_COLUMNS].astype(float).itertuples(index=False, name=None)
+        return [(symbol, interval, t, *v) for t, v in zip(ts, values)]
+
+    def write_batch(self, interval: str, frames: Dict[str, pd.DataFrame]) -> int:
+        """
+        Upserts candles for several symbols in one transaction.
+
+        Args:
+            interval: The candle interval shared by all frames.
+            frames: New candles per symbol.
+        """
+        rows = [row for symbol, df in frames.items() if not df.empty for row in self._rows(symbol, interval, df)]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO candles (symbol, interval, ts, open, high, low, close, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def prune(self, symbols: Iterable[str], interval: str, before: pd.Timestamp) -> int:
+        """Deletes the symbols' candles older than `before` to bound the store size."""
+        # One statement per symbol, so each delete is a range on the primary key
+        params = [(symbol, interval, int(before.timestamp())) for symbol in symbols]
+        with self._lock:
+            cur = self._conn.executemany("DELETE FROM candles WHERE symbol = ? AND interval = ? AND ts < ?", params)
+            self._conn.commit()
+        return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_store: Optional[CandleStore] = None
+
+def get_store(path: str) -> Optional[CandleStore]:
+    """Returns the process-wide candle store, or None if it cannot be opened."""
+    global _store
+    if _store is None:
+        try:
+            _store = CandleStore(path)
+        except sqlite3.Error as e:
+            logging.error(f"Could not open candle store at {path}: {e}")
+            return None
+    return _store
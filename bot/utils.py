@@ -1,11 +1,17 @@
+import time
 import asyncio
 import random
 import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
 import aiohttp
 from aiohttp import ClientResponseError, ClientConnectorError, ClientPayloadError, ServerTimeoutError
+from .config import settings
+from .metrics import CIRCUIT_REJECTED, CIRCUIT_STATE, RETRIES, RETRIES_ABANDONED
 
 # Timezone for display (IST)
 IST = timezone(timedelta(hours=5, minutes=30))
@@ -19,6 +25,121 @@ def jitter(base: float, frac: float = 0.3) -> float:
     delta = base * frac
     return base + random.uniform(-delta, delta)
 
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit breaker is open."""
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker for one upstream endpoint.
+
+    Closed: calls go through; `failure_threshold` consecutive failures open it.
+    Open: calls are refused with CircuitOpenError until `reset_timeout` seconds
+    have passed. Half-open: one trial call goes through; success closes the
+    circuit, failure opens it again for another `reset_timeout`.
+    """
+
+    _STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        CIRCUIT_STATE.set(0, endpoint=name)
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logging.warning(f"Circuit '{self.name}' {self.state} -> {state}.")
+            self.state = state
+            CIRCUIT_STATE.set(self._STATE_VALUES[state], endpoint=self.name)
+
+    def retry_in(self) -> float:
+        """Seconds until the circuit lets a call through again (0 if it does now)."""
+        if self.state == "open":
+            return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+        return 0.0
+
+    def before_call(self):
+        """
+        Admits one call.
+
+        Raises:
+            CircuitOpenError: The circuit is open, or half-open with its trial call in flight.
+        """
+        if self.state == "open" and self.retry_in() == 0:
+            self._set_state("half_open")
+        if self.state == "open" or (self.state == "half_open" and self._probing):
+            CIRCUIT_REJECTED.inc(endpoint=self.name)
+            raise CircuitOpenError(f"Circuit '{self.name}' is open; retrying in {self.retry_in():.0f}s.")
+        if self.state == "half_open":
+            self._probing = True
+
+    def record_success(self):
+        self._probing = False
+        self.failures = 0
+        self._set_state("closed")
+
+    def record_failure(self):
+        self._probing = False
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state("open")
+
+    def release(self):
+        """Ends an admitted call that neither succeeded nor failed (e.g. it was cancelled)."""
+        self._probing = False
+
+    def status(self) -> dict:
+        return {"state": self.state, "failures": self.failures, "retry_in": round(self.retry_in(), 1)}
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """The circuit breaker of endpoint `name` (e.g. 'discord', 'yahoo'), created on first use."""
+    breaker = _BREAKERS.get(name)
+    if breaker is None:
+        breaker = _BREAKERS[name] = CircuitBreaker(name, settings.BREAKER_FAILURES, settings.BREAKER_RESET_SECONDS)
+    return breaker
+
+def breaker_states() -> Dict[str, dict]:
+    """State of every circuit breaker, for monitoring."""
+    return {name: breaker.status() for name, breaker in sorted(_BREAKERS.items())}
+
+@dataclass
+class RetryBudget:
+    """Retries left to one cycle (a scheduled job run) and the time they must end by."""
+    retries: int
+    deadline: Optional[float] = None  # time.monotonic()
+
+    def spend(self, delay: float) -> Optional[str]:
+        """Takes one retry that sleeps `delay` seconds. Returns why not, or None if granted."""
+        if self.retries <= 0:
+            return "budget"
+        if self.deadline is not None and time.monotonic() + delay > self.deadline:
+            return "deadline"
+        self.retries -= 1
+        return None
+
+_RETRY_BUDGET: ContextVar[Optional[RetryBudget]] = ContextVar("retry_budget", default=None)
+
+@contextmanager
+def retry_budget(retries: int, seconds: Optional[float] = None):
+    """
+    Shares `retries` retries between every async_backoff call made inside the
+    block (including tasks it starts), none of which may end later than
+    `seconds` from now.
+    """
+    deadline = time.monotonic() + seconds if seconds else None
+    token = _RETRY_BUDGET.set(RetryBudget(retries, deadline))
+    try:
+        yield
+    finally:
+        _RETRY_BUDGET.reset(token)
+
 async def async_backoff(
     fn,
     *,
@@ -33,22 +154,50 @@ async def async_backoff(
         ServerTimeoutError,
     ),
     retry_on_status: Tuple[int, ...] = (429, 500, 502, 503, 504),
-    label: str = "operation"
+    label: str = "operation",
+    endpoint: Optional[str] = None,
 ):
-    """Generic async backoff wrapper for HTTP-like operations."""
-    for attempt in range(1, retries + 1):
+    """
+    Generic async backoff wrapper for HTTP-like operations.
+
+    Calls go through the circuit breaker of `endpoint` (default: `label` up to
+    the first dot, e.g. 'discord'), so an endpoint that keeps failing is not
+    called at all until its breaker lets a trial call through. Retries draw on
+    the retry budget of the current cycle (see retry_budget) and stop when it is
+    spent or its deadline would pass.
+    """
+    breaker = get_breaker(endpoint or label.split(".")[0])
+    attempt = 0
+    while True:
+        attempt += 1
+        breaker.before_call()
         try:
-            return await fn()
+            result = await fn()
         except ClientResponseError as cre:
-            if cre.status in retry_on_status:
-                delay = min(max_delay, jitter(base_delay * (2 ** (attempt - 1))))
-                logging.warning(f"{label} HTTP {cre.status}, retry {attempt}/{retries} in {delay:.1f}s")
-                await asyncio.sleep(delay)
-                continue
-            raise
+            if cre.status not in retry_on_status:
+                breaker.record_success()  # The endpoint is up; this request was refused
+                raise
+            breaker.record_failure()
+            error, reason = cre, f"http_{cre.status}"
         except exceptions as e:
-            delay = min(max_delay, jitter(base_delay * (2 ** (attempt - 1))))
-            logging.warning(f"{label} error {type(e).__name__}, retry {attempt}/{retries} in {delay:.1f}s: {e}")
-            await asyncio.sleep(delay)
-    # Final attempt (let exception bubble)
-    return await fn()
\ No newline at end of file
+            breaker.record_failure()
+            error, reason = e, type(e).__name__
+        except BaseException:
+            breaker.release()
+            raise
+        else:
+            breaker.record_success()
+            return result
+
+        if attempt > retries or breaker.state == "open":
+            raise error
+        delay = min(max_delay, jitter(base_delay * (2 ** (attempt - 1))))
+        budget = _RETRY_BUDGET.get()
+        refused = budget.spend(delay) if budget is not None else None
+        if refused:
+            RETRIES_ABANDONED.inc(operation=label, reason=refused)
+            logging.warning(f"{label} {reason}: not retrying, the cycle's retry {refused} is spent.")
+            raise error
+        logging.warning(f"{label} {reason}, retry {attempt}/{retries} in {delay:.1f}s: {error}")
+        RETRIES.inc(operation=label, reason=reason)
+        await asyncio.sleep(delay)
\ No newline at end of file
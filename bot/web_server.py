@@ -0,0 +1,72 @@
+import time
+from typing import Optional
+from aiohttp import web
+from .config import settings
+from .metrics import render as render_metrics
+from .state import STATE
+from .utils import breaker_states
+
+# Handlers run on the bot's event loop, so they read STATE between bot steps
+# and need no locks. Nothing heavy (pandas & co.) may be imported here: the
+# server has to answer /health while the bot is still loading.
+
+async def home(request: web.Request) -> web.Response:
+    """Provides a simple status page."""
+    return web.Response(text=f"✅ Bot is alive. Monitoring {', '.join(settings.SYMBOLS)}")
+
+async def health(request: web.Request) -> web.Response:
+    """
+    Health check endpoint for Render.
+
+    Answered from the bot's own event loop, so a response means the loop is
+    running; the body says how long ago each scheduled job last finished.
+    """
+    now = time.time()
+    return web.json_response({
+        "status": "ok",
+        "uptime_seconds": round(now - STATE.started_at, 1),
+        "seconds_since_job": {job: round(now - t, 1) for job, t in STATE.last_job_runs.items()},
+    })
+
+async def metrics(request: web.Request) -> web.Response:
+    """Per-stage latency histograms and counters in Prometheus text format."""
+    return web.Response(body=render_metrics().encode(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+async def state(request: web.Request) -> web.Response:
+    """Live view of BotState: signal regimes, newest candle times, Discord queue, circuit breakers and shards."""
+    engine, delivery, coordinator = STATE.signal_engine, STATE.delivery, STATE.coordinator
+    return web.json_response({
+        "symbols": list(settings.SYMBOLS),
+        "regimes": engine.summary() if engine is not None else {},
+        "last_candle_times": {
+            tf: {symbol: ts.isoformat() for symbol, ts in times.items()}
+            for tf, times in STATE.last_candle_times.items()
+        },
+        "delivery": {
+            "queue_depth": delivery.depth() if delivery is not None else 0,
+            "dropped": delivery.dropped if delivery is not None else 0,
+        },
+        "breakers": breaker_states(),
+        "last_daily_update_date": STATE.last_daily_update_date,
+        "shards": coordinator.status() if coordinator is not None else None,
+    })
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app.router.add_get("/", home)
+    app.router.add_get("/health", health)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/state", state)
+    return app
+
+async def start_web_server(port: Optional[int] = None) -> web.AppRunner:
+    """
+    Starts serving on `port` (default: PORT) in the running event loop.
+
+    Returns:
+        The runner; call `await runner.cleanup()` to stop.
+    """
+    runner = web.AppRunner(create_app(), access_log=None)  # Health checks would flood the log
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port or settings.PORT).start()
+    return runner
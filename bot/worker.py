@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import signal
+import asyncio
+import logging
+import multiprocessing as mp
+from dataclasses import replace
+from typing import List
+
+# Nothing from the bot is imported at module level: this module is loaded in
+# freshly spawned processes, and bot.core must only be imported after
+# run_worker has pointed the settings at the worker's shard.
+
+HEARTBEAT_SECONDS = 10
+
+def shard_path(base: str, shard: int) -> str:
+    """Where the worker of `shard` keeps a file (state snapshot, candle store), next to the main one."""
+    return f"{base}.shard{shard}"
+
+def _use_shard_settings(symbols: List[str], state_path: str, store_path: str):
+    """
+    Points the settings of this process at the shard.
+
+    Setting the environment is not enough: spawn re-imports the parent's main
+    module (e.g. run.py), which may already have loaded bot.config. The settings
+    are rebuilt, and bot modules loaded so far are pointed at the new object.
+    """
+    os.environ["SYMBOLS"] = ",".join(symbols)
+    os.environ["STATE_PATH"] = state_path
+    os.environ["CANDLE_STORE_PATH"] = store_path
+    # Every worker has its own render pool; keep it small unless configured
+    os.environ.setdefault("CHART_WORKERS", "1")
+
+    from . import config
+    stale = config.settings
+    config.settings = replace(stale, SYMBOLS=tuple(symbols), STATE_PATH=state_path, CANDLE_STORE_PATH=store_path,
+                              CHART_WORKERS=int(os.environ["CHART_WORKERS"]))
+    for name, module in list(sys.modules.items()):
+        if name.startswith("bot.") and getattr(module, "settings", None) is stale:
+            module.settings = config.settings
+
+async def _heartbeat(shard: int, outbox, task: asyncio.Task):
+    parent = mp.parent_process()
+    while True:
+        if parent is not None and not parent.is_alive():
+            # Workers are not daemonic: without a coordinator left to stop us, stop on our own
+            logging.error("Coordinator process is gone; stopping.")
+            task.cancel()
+            return
+        outbox.put(("heartbeat", shard, time.time()))
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+
+async def _serve(shard: int, outbox, restore_paths: List[str]):
+    from .core import run_shard
+
+    task = asyncio.current_task()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    except NotImplementedError: # Windows: terminate() kills without the final snapshot
+        pass
+
+    async def alert_sink(content, chart_bytes, filename):
+        outbox.put(("alert", shard, content, chart_bytes, filename))
+
+    def on_complete(job, lag):
+        outbox.put(("lag", shard, job.name, lag))
+
+    heartbeat = asyncio.create_task(_heartbeat(shard, outbox, task))
+    try:
+        await run_shard(alert_sink, on_complete, restore_paths)
+    finally:
+        heartbeat.cancel()
+
+def run_worker(shard: int, symbols: List[str], outbox, state_base: str, store_base: str, restore_paths: List[str]):
+    """
+    Process entry point of one shard worker (see bot.sharding).
+
+    Runs its own fetch, analysis and render pipeline for `symbols` and puts
+    ("alert", shard, content, chart_bytes, filename), ("lag", shard, job, seconds)
+    and ("heartbeat", shard, time) messages on `outbox`. The worker snapshots its
+    state to, and keeps its candles in, its own files next to `state_base` and
+    `store_base`, so shards never contend for the same SQLite database.
+    """
+    _use_shard_settings(symbols, shard_path(state_base, shard), shard_path(store_base, shard))
+
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s - %(levelname)s - [shard {shard}] %(message)s")
+    logging.info(f"Worker started with {len(symbols)} symbol(s).")
+    try:
+        asyncio.run(_serve(shard, outbox, restore_paths))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    logging.info("Worker stopped.")
@@ -0,0 +1,263 @@
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from .config import settings
+from .metrics import FETCH_SECONDS
+from .store import OHLCV_COLUMNS
+from .services.http_client import get_session
+from .utils import CircuitOpenError, async_backoff
+
+# Yahoo answers clients without a browser User-Agent with 429s
+_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"}
+_QUOTE_FIELDS = ("open", "high", "low", "close", "volume")
+_NS = 1_000_000_000
+_DAY_NS = 86_400 * _NS
+_HOUR_NS = 3_600 * _NS
+
+# Exchange timezone per symbol, from the latest chart response
+_TIMEZONES: Dict[str, str] = {}
+
+def wall_clock_interval(interval: str) -> bool:
+    """
+    Whether candles of `interval` are stamped at exchange wall-clock time labelled
+    as UTC. yf.download drops the timezone for these (e.g. '15m' and '1d', but
+    not '5m' or '1h'), and parse_chart does the same.
+    """
+    return interval[1:] not in ("m", "h")
+
+def exchange_timezone(symbol: str) -> Optional[str]:
+    """The exchange timezone of `symbol` (e.g. 'America/New_York'), or None if no chart of it was fetched yet."""
+    return _TIMEZONES.get(symbol)
+
+@dataclass
+class Chart:
+    """
+    Candles of one symbol as Yahoo's chart endpoint returned them, after the same
+    clean-up yfinance applies.
+
+    Attributes:
+        timestamps: int64 candle open times (ns since the epoch, UTC), stamped
+            like yf.download stamps them: daily candles at midnight of their
+            exchange date, most intraday intervals at exchange wall-clock time.
+        ohlcv: float64 matrix, one row per candle, columns as OHLCV_COLUMNS.
+        timezone: The exchange timezone the wall-clock times are in.
+    """
+    timestamps: np.ndarray
+    ohlcv: np.ndarray
+    timezone: str = "UTC"
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def to_frame(self) -> pd.DataFrame:
+        """The candles as data._download returns them (lowercase OHLCV, UTC index named 'Date')."""
+        index = pd.DatetimeIndex(self.timestamps.view("datetime64[ns]"), name="Date").tz_localize("UTC")
+        return pd.DataFrame(self.ohlcv, index=index, columns=OHLCV_COLUMNS, copy=False)
+
+def _empty(tz: str = "UTC") -> Chart:
+    return Chart(np.empty(0, dtype=np.int64), np.empty((0, len(OHLCV_COLUMNS))), tz)
+
+def _local_ns(ts: np.ndarray, tz: str) -> np.ndarray:
+    """Wall-clock times in `tz` of UTC epoch-ns `ts`, as ns since the epoch."""
+    if tz == "UTC":  # Crypto: nothing to convert
+        return ts
+    index = pd.DatetimeIndex(ts.view("datetime64[ns]")).tz_localize("UTC").tz_convert(tz)
+    return index.tz_localize(None).asi8
+
+def _merge_live_row(ts: np.ndarray, values: np.ndarray, local: np.ndarray, interval: str):
+    """
+    Yahoo often returns the still-open candle as an extra row after the last one.
+    Daily: the older of two rows on the same exchange date is dropped. Intraday:
+    a last row less than one interval after the previous one is folded into it.
+    """
+    n = len(ts)
+    if n < 2:
+        return ts, values, local
+    if interval == "1d":
+        if local[-1] // _DAY_NS == local[-2] // _DAY_NS:
+            keep = np.ones(n, dtype=bool)
+            keep[-2] = False
+            return ts[keep], values[keep], local[keep]
+        return ts, values, local
+    if ts[-1] - ts[-2] >= pd.Timedelta(interval).value or ts[-1] == ts[-2]:
+        return ts, values, local
+    live, prev = values[-1], values[-2].copy()
+    if np.isnan(prev[0]):
+        prev[0] = live[0]
+    if not np.isnan(live[1]):
+        prev[1] = np.nanmax([live[1], prev[1]])
+    if not np.isnan(live[2]):
+        prev[2] = np.nanmin([live[2], prev[2]])
+    prev[3] = live[3]
+    prev[4] = prev[4] + live[4]
+    prev[5] = live[5]
+    values = values[:-1].copy()
+    values[-1] = prev
+    return ts[:-1], values, local[:-1]
+
+def _regular_hours(ts: np.ndarray, local: np.ndarray, periods, tz: str) -> np.ndarray:
+    """Mask of the candles inside the regular session of their exchange date (dates without a session are kept)."""
+    if isinstance(periods, dict):
+        periods = periods.get("regular") or []
+    flat = [p for day in periods for p in (day if isinstance(day, list) else [day])]
+    if not flat:
+        return np.ones(len(ts), dtype=bool)
+    starts = np.array([p["start"] for p in flat], dtype=np.int64) * _NS
+    ends = np.array([p["end"] for p in flat], dtype=np.int64) * _NS
+    period_days = _local_ns(starts, tz) // _DAY_NS
+    # First session of each date, like the left merge on dates yfinance does
+    period_days, first = np.unique(period_days, return_index=True)
+    starts, ends = starts[first], ends[first]
+
+    days = local // _DAY_NS
+    pos = np.clip(np.searchsorted(period_days, days), 0, len(period_days) - 1)
+    has_session = period_days[pos] == days
+    inside = (ts >= starts[pos]) & (ts < ends[pos])
+    return ~has_session | inside
+
+def parse_chart(payload: dict, interval: str, end: Optional[int] = None) -> Chart:
+    """
+    Decodes a /v8/finance/chart response straight into arrays.
+
+    Applies the clean-up of yfinance's Ticker.history (prepost=False,
+    keepna=False): the live-row merge, the daily DST fix and exchange dates,
+    regular-hours filtering of intraday candles, duplicate removal, and
+    dropping rows with no non-zero value.
+
+    Args:
+        payload: The decoded JSON body.
+        interval: The requested interval (e.g. '15m', '1d').
+        end: The request's `period2` (epoch seconds); a trailing candle at or
+            after it is dropped.
+
+    Returns:
+        The candles; empty if Yahoo had none.
+
+    Raises:
+        ValueError: If Yahoo answered with an error (e.g. an unknown symbol).
+    """
+    chart = payload.get("chart") or {}
+    if chart.get("error"):
+        raise ValueError(chart["error"].get("description") or chart["error"])
+    results = chart.get("result")
+    if not results:
+        return _empty()
+    result = results[0]
+    meta = result.get("meta", {})
+    tz = meta.get("exchangeTimezoneName", "UTC")
+    if "timestamp" not in result:
+        return _empty(tz)
+    indicators = result["indicators"]
+    quote = indicators["quote"][0]
+
+    ts = np.asarray(result["timestamp"], dtype=np.int64) * _NS
+    # Columns: open, high, low, close, volume, adjusted close (only used to tell empty rows)
+    values = np.empty((len(ts), len(_QUOTE_FIELDS) + 1))
+    for i, field in enumerate(_QUOTE_FIELDS):
+        values[:, i] = np.asarray(quote[field], dtype=float)  # null -> NaN
+    adjclose = indicators.get("adjclose")
+    values[:, -1] = np.asarray(adjclose[0]["adjclose"], dtype=float) if adjclose else values[:, 3]
+
+    order = np.argsort(ts, kind="stable")
+    ts, values = ts[order], values[order]
+    if end is not None and len(ts) and ts[-1] >= end * _NS:
+        ts, values = ts[:-1], values[:-1]
+    if not len(ts):
+        return _empty(tz)
+
+    daily = interval == "1d"
+    local = _local_ns(ts, tz)
+    if daily:
+        # Yahoo sometimes stamps daily candles at 22:00/23:00 of the day before
+        hour, minute = (local % _DAY_NS) // _HOUR_NS, (local % _HOUR_NS) // (60 * _NS)
+        local = local + np.where((minute == 0) & ((hour == 22) | (hour == 23)), (24 - hour) * _HOUR_NS, 0)
+    ts, values, local = _merge_live_row(ts, values, local, interval)
+
+    if daily:
+        ts = local // _DAY_NS * _DAY_NS
+    else:
+        if meta.get("tradingPeriods") and meta["tradingPeriods"] != {"pre": [], "post": []}:
+            keep = _regular_hours(ts, local, meta["tradingPeriods"], tz)
+            ts, values, local = ts[keep], values[keep], local[keep]
+        if wall_clock_interval(interval):
+            # Like yf.download, so the candle store holds the same times whichever fetcher wrote them
+            ts = local
+
+    order = np.argsort(ts, kind="stable")
+    ts, values = ts[order], values[order]
+    _, first = np.unique(ts, return_index=True)
+    ts, values = ts[first], values[first]
+    values[:, 4] = np.nan_to_num(values[:, 4], nan=0.0)
+    keep = ~((np.isnan(values) | (values == 0)).all(axis=1))
+    return Chart(ts[keep], np.ascontiguousarray(values[keep, :len(_QUOTE_FIELDS)]), tz)
+
+def chart_params(interval: str, period: Optional[str] = None, start: Optional[pd.Timestamp] = None) -> Dict[str, str]:
+    """Query parameters of a chart request, as yfinance builds them."""
+    if start is not None:
+        params = {"period1": str(int(start.timestamp())), "period2": str(int(time.time()))}
+    else:
+        params = {"range": (period or "max").lower()}
+    params.update(interval=interval.lower(), includePrePost="false", events="div,splits,capitalGains")
+    return params
+
+async def fetch_chart(symbol: str, interval: str, period: Optional[str] = None,
+                      start: Optional[pd.Timestamp] = None) -> Chart:
+    """
+    Fetches the candles of one symbol from Yahoo's chart endpoint on the shared session.
+
+    Args:
+        symbol: The market symbol (e.g., 'BTC-USD').
+        interval: The candle interval (e.g., '15m', '1d').
+        period: The duration to fetch (e.g., '5d', '1y'); ignored if `start` is given.
+        start: Fetch the candles from this time up to now instead.
+
+    Returns:
+        The parsed candles (see parse_chart).
+    """
+    params = chart_params(interval, period, start)
+    url = f"{settings.YAHOO_BASE_URL}/v8/finance/chart/{symbol}"
+    session = await get_session()
+
+    async def _get():
+        async with session.get(url, params=params, headers=_HEADERS) as resp:
+            if resp.status == 404:  # Unknown symbol; the body carries Yahoo's error
+                return await resp.json(content_type=None)
+            resp.raise_for_status()
+            return await resp.json(content_type=None)
+
+    payload = await async_backoff(_get, label="yahoo.chart", endpoint="yahoo")
+    end = int(params["period2"]) if "period2" in params else None
+    chart = parse_chart(payload, interval, end)
+    _TIMEZONES[symbol] = chart.timezone
+    return chart
+
+async def fetch_charts(symbols: List[str], interval: str, period: Optional[str] = None,
+                       start: Optional[pd.Timestamp] = None) -> Dict[str, Chart]:
+    """
+    Fetches many symbols concurrently, at most YAHOO_CONCURRENCY requests at a time.
+
+    Returns:
+        A Chart per symbol; symbols that failed or returned nothing are left out.
+    """
+    limit = asyncio.Semaphore(max(1, settings.YAHOO_CONCURRENCY))
+    rejected = []
+
+    async def _one(symbol: str) -> Optional[Chart]:
+        async with limit:
+            try:
+                return await fetch_chart(symbol, interval, period, start)
+            except CircuitOpenError:
+                rejected.append(symbol)  # Reported once below instead of per symbol
+            except Exception as e:
+                logging.warning(f"Yahoo chart request for {symbol} ({interval}) failed: {e}")
+            return None
+
+    with FETCH_SECONDS.time(interval=interval):
+        charts = await asyncio.gather(*(_one(symbol) for symbol in symbols))
+    if rejected:
+        logging.warning(f"Yahoo circuit open: skipped {len(rejected)} {interval} chart request(s).")
+    return {symbol: chart for symbol, chart in zip(symbols, charts) if chart is not None and len(chart)}
@@ -0,0 +1,153 @@
+import asyncio
+import argparse
+import logging
+import time
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from bot.config import settings
+from bot.analysis import cross_history, gate_crosses
+from bot.indicators import macd_history
+from bot.resample import resample_ohlcv
+from bot.store import OHLCV_COLUMNS, get_store, to_utc_index
+
+def _read_file(path: str) -> pd.DataFrame:
+    """Reads an OHLCV history from CSV or Parquet (first column / index = candle open time)."""
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+    df.columns = [str(c).lower() for c in df.columns]
+    df.index = to_utc_index(df.index)
+    return df[OHLCV_COLUMNS].sort_index()
+
+async def _download_history(symbols: List[str], timeframe: str, period: str) -> Dict[str, pd.DataFrame]:
+    from bot.data import fetch_history
+    from bot.services.http_client import close_session
+
+    try:
+        return await fetch_history(symbols, timeframe, period)
+    finally:
+        await close_session()
+
+def load_history(symbols: List[str], timeframe: str, source: str, period: str) -> Dict[str, pd.DataFrame]:
+    """Loads candles per symbol from the candle store or from Yahoo Finance."""
+    if source == "yahoo":
+        return asyncio.run(_download_history(symbols, timeframe, period))
+
+    store = get_store(settings.CANDLE_STORE_PATH)
+    if store is None:
+        return {}
+    return {s: df for s, df in store.load_many(symbols, timeframe).items() if not df.empty}
+
+def _triggers(symbol: str, signal: str, timeframe: str, index: pd.DatetimeIndex,
+              directions: np.ndarray, values: np.ndarray, detected_after: pd.Timedelta) -> pd.DataFrame:
+    idx = np.flatnonzero(directions)
+    return pd.DataFrame({
+        "symbol": symbol,
+        "signal": signal,
+        "timeframe": timeframe,
+        "candle_time": index[idx],
+        "detected_at": index[idx] + detected_after,
+        "direction": np.where(directions[idx] > 0, "ABOVE", "BELOW"),
+        "value": values[idx],
+    })
+
+def _crosses(values: np.ndarray, df: pd.DataFrame) -> np.ndarray:
+    """cross_history with the SIGNAL_HYSTERESIS dead band of the live signals."""
+    return cross_history(values, settings.SIGNAL_HYSTERESIS * np.abs(df["close"].to_numpy(dtype=float)))
+
+def replay_symbol(symbol: str, df_15m: pd.DataFrame, df_1d: pd.DataFrame) -> pd.DataFrame:
+    """
+    Evaluates every signal of find_signals over a whole history in vectorized form.
+
+    Early warnings use each 15m candle's final value, since intra-candle ticks are
+    not part of the history; they are stamped at the candle's open time. Signals on
+    closed candles are stamped when that candle closed. SIGNAL_HYSTERESIS applies
+    as it does live. EARLY_WARNING_DEBOUNCE does not: it counts polls within a
+    candle, which the history does not have, so every early warning is treated as
+    having persisted long enough (as with a debounce of 1).
+    """
+    params = (settings.MACD_FAST, settings.MACD_SLOW, settings.MACD_SIGNAL)
+    frames = []
+
+    if not df_15m.empty:
+        macd = macd_history(df_15m["close"].to_numpy(dtype=float), *params)
+        step = pd.Timedelta(settings.TIMEFRAME_15M)
+        # The early-warning regime only lives for one candle, and each candle is
+        # evaluated once here, so every cross fires
+        frames.append(_triggers(symbol, "15m_macd_early", settings.TIMEFRAME_15M, df_15m.index,
+                                _crosses(macd[:, 0], df_15m), macd[:, 0], pd.Timedelta(0)))
+        frames.append(_triggers(symbol, "15m_signal_confirm", settings.TIMEFRAME_15M, df_15m.index,
+                                gate_crosses(_crosses(macd[:, 2], df_15m)), macd[:, 2], step))
+
+        for timeframe in settings.RESAMPLED_TIMEFRAMES:
+            higher = resample_ohlcv(df_15m, timeframe)
+            higher_macd = macd_history(higher["close"].to_numpy(dtype=float), *params)[:, 0]
+            frames.append(_triggers(symbol, f"{timeframe}_macd", timeframe, higher.index,
+                                    gate_crosses(_crosses(higher_macd, higher)), higher_macd, pd.Timedelta(timeframe)))
+
+    if not df_1d.empty:
+        daily_macd = macd_history(df_1d["close"].to_numpy(dtype=float), *params)[:, 0]
+        frames.append(_triggers(symbol, "1d_macd", settings.TIMEFRAME_1D, df_1d.index,
+                                gate_crosses(_crosses(daily_macd, df_1d)), daily_macd, pd.Timedelta(settings.TIMEFRAME_1D)))
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+def main():
+    """
+    Replays stored or downloaded history through the MACD zero-cross signals
+    and writes every trigger to CSV or Parquet. Nothing is sent to Discord.
+    """
+    parser = argparse.ArgumentParser(description="Replay history through the MACD zero-cross signals.")
+    parser.add_argument("--symbols", default=",".join(settings.SYMBOLS), help="Comma-separated symbols")
+    parser.add_argument("--source", choices=["store", "yahoo"], default="store", help="Where to load history from")
+    parser.add_argument("--period-15m", default="60d", help="Yahoo period for 15m candles (max 60d)")
+    parser.add_argument("--period-1d", default="5y", help="Yahoo period for daily candles")
+    parser.add_argument("--input-15m", help="OHLCV file with 15m candles (single symbol); overrides --source")
+    parser.add_argument("--input-1d", help="OHLCV file with daily candles (single symbol)")
+    parser.add_argument("--out", default="signals.csv", help="Output file (.csv or .parquet)")
+    args = parser.parse_args()
+
+    log_format = '%(asctime)s - %(levelname)s - %(message)s'
+    logging.basicConfig(level=logging.INFO, format=log_format)
+
+    if settings.EARLY_WARNING_DEBOUNCE > 1:
+        logging.warning(f"EARLY_WARNING_DEBOUNCE={settings.EARLY_WARNING_DEBOUNCE} is not replayed: "
+                        f"candle history has no intra-candle polls, so early warnings are not debounced.")
+
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    if args.input_15m or args.input_1d:
+        symbols = symbols[:1]
+        frames_15m = {symbols[0]: _read_file(args.input_15m)} if args.input_15m else {}
+        frames_1d = {symbols[0]: _read_file(args.input_1d)} if args.input_1d else {}
+    else:
+        frames_15m = load_history(symbols, settings.TIMEFRAME_15M, args.source, args.period_15m)
+        frames_1d = load_history(symbols, settings.TIMEFRAME_1D, args.source, args.period_1d)
+
+    start = time.perf_counter()
+    results = []
+    for symbol in symbols:
+        df_15m = frames_15m.get(symbol, pd.DataFrame())
+        # Without a daily history, build it from the 15m candles on UTC day boundaries
+        df_1d = frames_1d.get(symbol)
+        if df_1d is None:
+            df_1d = resample_ohlcv(df_15m, "1d") if not df_15m.empty else pd.DataFrame()
+        logging.info(f"Replaying {symbol}: {len(df_15m)} x 15m, {len(df_1d)} x 1d candles.")
+        results.append(replay_symbol(symbol, df_15m, df_1d))
+
+    triggers = pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+    if not triggers.empty:
+        triggers = triggers.sort_values(["detected_at", "symbol"], kind="stable")
+    elapsed = time.perf_counter() - start
+
+    if args.out.endswith(".parquet"):
+        triggers.to_parquet(args.out, index=False)
+    else:
+        triggers.to_csv(args.out, index=False)
+    logging.info(f"Wrote {len(triggers)} trigger(s) to {args.out} in {elapsed:.2f}s.")
+
+if __name__ == "__main__":
+    main()
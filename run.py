@@ -1,32 +1,128 @@
+import os
+import re
+import sys
+import socket
 import asyncio
-import threading
+import argparse
 import logging
-from bot.core import monitor
-from bot.web_server import run_flask
+import importlib
+import subprocess
+from bot.web_server import start_web_server
 from bot.config import settings
 
+# Modules that must not be imported just to answer health checks
+HEAVY_MODULES = ("pandas", "pandas_ta", "yfinance", "matplotlib", "mplfinance")
+
+# Runs in a fresh interpreter: brings up the web server and waits for /health
+_HEALTH_PROBE = """
+import sys, time, asyncio, threading, urllib.request
+start = time.perf_counter()
+from bot.web_server import start_web_server
+async def serve():
+    await start_web_server()
+    await asyncio.Event().wait()
+threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+while True:
+    try:
+        urllib.request.urlopen("http://127.0.0.1:{port}/health", timeout=0.5)
+        break
+    except Exception:
+        time.sleep(0.005)
+print("HEALTH_READY", time.perf_counter() - start)
+print("HEAVY_LOADED", ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+def import_report(budget: float, top: int = 15) -> int:
+    """
+    Measures how long the web server takes to answer /health from a cold
+    interpreter, using `-X importtime` to list the slowest imports on the way.
+
+    Returns:
+        A process exit code: 1 if /health took longer than `budget` seconds or
+        pulled in one of HEAVY_MODULES, 0 otherwise.
+    """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    env = dict(os.environ, PORT=str(port))
+    code = _HEALTH_PROBE.format(port=port, heavy=HEAVY_MODULES)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        capture_output=True, text=True, timeout=max(30.0, budget * 10),
+    )
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+        if m and len(m.group(3)) <= 1:  # Top-level imports only; nested ones are in their parent's total
+            imports.append((int(m.group(2)), m.group(4)))
+
+    results = dict(line.split(" ", 1) for line in proc.stdout.splitlines() if " " in line)
+    if "HEALTH_READY" not in results:
+        print(f"Health server did not come up:\n{proc.stderr[-2000:]}")
+        return 1
+    ready = float(results["HEALTH_READY"])
+    heavy = [m for m in results.get("HEAVY_LOADED", "").split(",") if m]
+
+    print("Slowest top-level imports before /health was up:")
+    for cumulative_us, module in sorted(imports, reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {module}")
+    print(f"/health answered after {ready * 1000:.0f} ms (budget {budget * 1000:.0f} ms)")
+    print(f"Heavy modules loaded: {', '.join(heavy) or 'none'}")
+
+    return 0 if ready <= budget and not heavy else 1
+
+async def serve(workers: int):
+    """
+    Runs the web server and the bot in one event loop.
+
+    The server starts first; the bot is then imported in a worker thread, so
+    health checks are answered while pandas & co. load.
+    """
+    logging.info(f"Starting web server on port {settings.PORT}...")
+    runner = await start_web_server()
+    try:
+        if workers > 1:
+            sharding = await asyncio.to_thread(importlib.import_module, "bot.sharding")
+            main_loop = sharding.coordinate(workers)
+        else:
+            core = await asyncio.to_thread(importlib.import_module, "bot.core")
+            main_loop = core.monitor()
+
+        # Start the main asynchronous bot logic
+        logging.info("Starting bot monitoring loop...")
+        await main_loop
+    finally:
+        await runner.cleanup()
+
 def main():
     """
-    Initializes and runs the bot and the keep-alive web server.
+    Initializes and runs the bot and its web server.
     """
+    parser = argparse.ArgumentParser(description="ZeroZoro MACD bot")
+    parser.add_argument("--import-report", action="store_true",
+                        help="Report import times for bringing up /health and exit (non-zero if over budget)")
+    parser.add_argument("--budget", type=float, default=settings.HEALTH_STARTUP_BUDGET,
+                        help="Seconds /health may take to come up in --import-report mode")
+    parser.add_argument("--workers", type=int, default=settings.WORKERS,
+                        help="Split the watchlist across this many worker processes")
+    args = parser.parse_args()
+
+    if args.import_report:
+        sys.exit(import_report(args.budget))
+
     # Configure logging
     log_format = '%(asctime)s - %(levelname)s - %(message)s'
     logging.basicConfig(level=logging.INFO, format=log_format)
 
-    # Start the Flask keep-alive server in a separate thread
-    # This is required for deployment on platforms like Render.
-    logging.info(f"Starting keep-alive web server on port {settings.PORT}...")
-    flask_thread = threading.Thread(target=run_flask, daemon=True)
-    flask_thread.start()
-
-    # Start the main asynchronous bot logic
-    logging.info("Starting bot monitoring loop...")
     try:
-        asyncio.run(monitor())
+        asyncio.run(serve(args.workers))
     except KeyboardInterrupt:
         logging.info("Bot shutting down manually.")
     except Exception as e:
         logging.error(f"A critical error occurred in the main loop: {e}", exc_info=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,519 @@
+import os
+import re
+import sys
+import json
+import math
+import time
+import zlib
+import bisect
+import random
+import socket
+import asyncio
+import argparse
+import logging
+import platform
+import tempfile
+import importlib
+import contextvars
+import multiprocessing as mp
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+import aiohttp
+import numpy as np
+from aiohttp import web
+
+# Nothing from the bot is imported at module level: the settings are read on
+# import, so they must only be loaded once main() has pointed them at the
+# stand-in servers. This module is also what the spawned server process loads.
+
+REPORT_VERSION = 1
+ALERT_TITLE = re.compile(r"\*\*🚨 ALERT: (.+?)\*\*")
+WEBHOOK_PATH = "/api/webhooks/0/soak"
+_PERIOD_DAYS = {"d": 1, "wk": 7, "mo": 30, "y": 365}
+# Candles of history per interval; at least the largest window the bot asks for
+_HISTORY_DAYS = {"1d": 730}
+_DEFAULT_HISTORY_DAYS = 60
+
+@dataclass
+class StubConfig:
+    """How one stand-in server misbehaves."""
+    latency: float = 0.0      # Mean seconds before answering (each request waits 0.5x-1.5x this)
+    error_rate: float = 0.0   # Fraction of requests answered with a 503
+    rate_limit: int = 0       # Requests allowed per `rate_window` seconds; 0 = unlimited
+    rate_window: float = 1.0
+
+class RateWindow:
+    """Fixed-window request limit, announced with Discord's X-RateLimit-* headers."""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.used = 0
+        self.reset_at = 0.0
+
+    def take(self) -> Tuple[bool, int, float]:
+        """Counts one request. Returns (allowed, remaining, seconds until the window resets)."""
+        now = time.monotonic()
+        if now >= self.reset_at:
+            self.used, self.reset_at = 0, now + self.window
+        if self.used >= self.limit:
+            return False, 0, self.reset_at - now
+        self.used += 1
+        return True, self.limit - self.used, self.reset_at - now
+
+def _interval_seconds(interval: str) -> int:
+    unit = {"m": 60, "h": 3600, "d": 86400, "wk": 7 * 86400}
+    for suffix, seconds in sorted(unit.items(), key=lambda item: -len(item[0])):
+        if interval.endswith(suffix) and interval[:-len(suffix)].isdigit():
+            return int(interval[:-len(suffix)]) * seconds
+    raise ValueError(f"Unsupported interval: {interval}")
+
+def _range_seconds(period: str) -> int:
+    for unit, days in _PERIOD_DAYS.items():
+        if period.endswith(unit) and period[:-len(unit)].isdigit():
+            return int(period[:-len(unit)]) * days * 86400
+    return 10 * 365 * 86400  # 'max' / 'ytd': everything there is
+
+class Series:
+    """
+    Random-walk candles of one symbol and interval, aligned to the wall clock.
+
+    Closed candles never change once created. The open candle's price moves on
+    every tick, so polling sees intra-candle MACD crosses like on a live market.
+    """
+
+    def __init__(self, rng: np.random.Generator, step: int, count: int, volatility: float, now: int):
+        self.rng = rng
+        self.step = step
+        self.volatility = volatility
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, volatility, count)))
+        opens = np.concatenate([closes[:1], closes[:-1]])
+        wicks = np.abs(rng.normal(0, volatility / 2, (2, count)))
+        live = now // step * step
+        self.ts = list(range(live - (count - 1) * step, live + 1, step))
+        self.open = opens.tolist()
+        self.high = (np.maximum(opens, closes) * (1 + wicks[0])).tolist()
+        self.low = (np.minimum(opens, closes) * (1 - wicks[1])).tolist()
+        self.close = closes.tolist()
+        self.volume = rng.integers(1, 10_000, count).astype(float).tolist()
+
+    def tick(self, now: int):
+        """Opens the candles up to `now`, then moves the open candle's price."""
+        live = now // self.step * self.step
+        while self.ts[-1] < live:
+            price = self.close[-1]
+            self.ts.append(self.ts[-1] + self.step)
+            for column in (self.open, self.high, self.low, self.close):
+                column.append(price)
+            self.volume.append(0.0)
+        price = self.close[-1] * math.exp(self.rng.normal(0, self.volatility))
+        self.close[-1] = price
+        self.high[-1] = max(self.high[-1], price)
+        self.low[-1] = min(self.low[-1], price)
+        self.volume[-1] += float(self.rng.integers(1, 100))
+
+    def payload(self, first: int) -> dict:
+        """The candles opened at or after `first`, shaped like Yahoo's /v8/finance/chart response."""
+        i = bisect.bisect_left(self.ts, first)
+        return {"chart": {"result": [{
+            "meta": {"exchangeTimezoneName": "UTC", "instrumentType": "CRYPTOCURRENCY", "gmtoffset": 0},
+            "timestamp": self.ts[i:],
+            "indicators": {"quote": [{
+                "open": self.open[i:], "high": self.high[i:], "low": self.low[i:],
+                "close": self.close[i:], "volume": self.volume[i:],
+            }]},
+        }], "error": None}}
+
+class Stubs:
+    """Stand-ins for Yahoo's chart endpoint and a Discord webhook, and what they were sent."""
+
+    def __init__(self, yahoo: StubConfig, discord: StubConfig, volatility: float, seed: int):
+        self.configs = {"yahoo": yahoo, "discord": discord}
+        self.limits = {name: RateWindow(c.rate_limit, c.rate_window) if c.rate_limit > 0 else None
+                       for name, c in self.configs.items()}
+        self.statuses: Dict[str, Dict[str, int]] = {"yahoo": {}, "discord": {}}
+        self.received: List[Tuple[float, str]] = []  # (time.time(), content) of every accepted webhook post
+        self.volatility = volatility
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.series: Dict[Tuple[str, str], Series] = {}
+
+    def _count(self, service: str, status: int):
+        counts = self.statuses[service]
+        counts[str(status)] = counts.get(str(status), 0) + 1
+
+    async def _gate(self, service: str) -> Tuple[Optional[web.Response], Dict[str, str]]:
+        """Latency, rate limit and injected errors. Returns the refusal (if any) and rate-limit headers."""
+        config = self.configs[service]
+        if config.latency > 0:
+            await asyncio.sleep(config.latency * self.random.uniform(0.5, 1.5))
+        headers = {}
+        limit = self.limits[service]
+        if limit is not None:
+            allowed, remaining, reset_after = limit.take()
+            headers = {
+                "X-RateLimit-Limit": str(limit.limit),
+                "X-RateLimit-Remaining": str(remaining),
+                "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            }
+            if not allowed:
+                body = {"message": "You are being rate limited.", "retry_after": round(reset_after, 3), "global": False}
+                return web.json_response(body, status=429, headers={**headers, "Retry-After": f"{reset_after:.3f}"}), headers
+        if self.random.random() < config.error_rate:
+            return web.json_response({"message": "Service Unavailable"}, status=503), headers
+        return None, headers
+
+    def _series(self, symbol: str, interval: str, now: int) -> Series:
+        key = (symbol, interval)
+        series = self.series.get(key)
+        if series is None:
+            step = _interval_seconds(interval)
+            count = _HISTORY_DAYS.get(interval, _DEFAULT_HISTORY_DAYS) * 86400 // step
+            rng = np.random.default_rng([self.seed, zlib.crc32(f"{symbol}/{interval}".encode())])
+            series = self.series[key] = Series(rng, step, count, self.volatility, now)
+        series.tick(now)
+        return series
+
+    async def chart(self, request: web.Request) -> web.Response:
+        refusal, _ = await self._gate("yahoo")
+        if refusal is not None:
+            self._count("yahoo", refusal.status)
+            return refusal
+        query = request.query
+        now = int(time.time())
+        try:
+            series = self._series(request.match_info["symbol"], query.get("interval", "1d"), now)
+        except ValueError as e:
+            self._count("yahoo", 400)
+            return web.json_response({"chart": {"result": None, "error": {"code": "Bad Request", "description": str(e)}}}, status=400)
+        first = int(query["period1"]) if "period1" in query else now - _range_seconds(query.get("range", "1mo"))
+        self._count("yahoo", 200)
+        return web.json_response(series.payload(first))
+
+    async def webhook(self, request: web.Request) -> web.Response:
+        refusal, headers = await self._gate("discord")
+        if refusal is not None:
+            self._count("discord", refusal.status)
+            return refusal
+        if request.content_type == "application/json":
+            content = (await request.json()).get("content", "")
+        else:  # multipart with attachments
+            form = await request.post()
+            content = json.loads(form["payload_json"]).get("content", "")
+        self.received.append((time.time(), content))
+        self._count("discord", 204)
+        return web.Response(status=204, headers=headers)
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({"statuses": self.statuses, "received": self.received})
+
+def run_stubs(yahoo: StubConfig, discord: StubConfig, volatility: float, seed: int,
+              ports: Tuple[int, int], ready):
+    """Process entry point: serves the Yahoo stand-in on ports[0] and the Discord one on ports[1]."""
+    async def _serve():
+        stubs = Stubs(yahoo, discord, volatility, seed)
+        yahoo_app = web.Application()
+        yahoo_app.router.add_get("/v8/finance/chart/{symbol}", stubs.chart)
+        discord_app = web.Application(client_max_size=64 * 1024 * 1024)  # Up to 10 charts per post
+        discord_app.router.add_post(WEBHOOK_PATH, stubs.webhook)
+        discord_app.router.add_get("/_soak/stats", stubs.stats)
+        for app, port in ((yahoo_app, ports[0]), (discord_app, ports[1])):
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, "127.0.0.1", port).start()
+        ready.set()
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Count and latency percentiles (seconds) of `values`."""
+    if not values:
+        return {"count": 0}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"count": len(values), "p50": float(p50), "p90": float(p90), "p99": float(p99), "max": float(max(values))}
+
+def _rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of process `pid` from /proc (Linux); None where unavailable."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return None
+
+_CYCLE_START: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("cycle_start", default=None)
+
+class Recorder:
+    """Collects cycle durations, raised alerts and memory samples while the bot runs."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.cycles: Dict[str, List[float]] = {}
+        self.alerts: List[dict] = []
+        self.repeated = 0  # Same signal raised twice on the same candle in the same direction
+        self._last: Dict[Tuple[str, str], Tuple[str, object]] = {}
+        self._unsubmitted: Dict[str, deque] = {}
+        self.memory: List[Tuple[float, float, float]] = []  # (seconds since start, bot MB, bot + children MB)
+
+    def timed(self, name: str, func: Callable):
+        """Wraps a job coroutine function to record how long each run takes."""
+        async def _run():
+            start = time.time()
+            token = _CYCLE_START.set(start)
+            try:
+                await func()
+            finally:
+                _CYCLE_START.reset(token)
+                self.cycles.setdefault(name, []).append(time.time() - start)
+        return _run
+
+    def raised(self, signals: List[dict]):
+        now = time.time()
+        cycle_start = _CYCLE_START.get() or now
+        for signal in signals:
+            key = (signal["symbol"], signal["signal"])
+            if self._last.get(key) == (signal["title"], signal["candle_time"]):
+                self.repeated += 1
+            self._last[key] = (signal["title"], signal["candle_time"])
+            alert = {"title": signal["title"], "cycle_start": cycle_start, "raised_at": now, "submitted": False}
+            self.alerts.append(alert)
+            self._unsubmitted.setdefault(signal["title"], deque()).append(alert)
+
+    def submitted(self, content: str):
+        """Marks the alerts in `content` as handed to the Discord queue."""
+        for title in ALERT_TITLE.findall(content):
+            queue = self._unsubmitted.get(title)
+            if queue:
+                queue.popleft()["submitted"] = True
+
+    async def sample_memory(self, every: float, exclude: int):
+        while True:
+            main = _rss_mb(os.getpid())
+            if main is not None:
+                children = [_rss_mb(p.pid) for p in mp.active_children() if p.pid != exclude]
+                self.memory.append((time.time() - self.started, main, main + sum(c for c in children if c)))
+            await asyncio.sleep(every)
+
+def match_alerts(alerts: List[dict], received: List[Tuple[float, str]]) -> Dict[str, object]:
+    """
+    Pairs every alert title the webhook received with the oldest raised alert of
+    that title not delivered yet. Received titles with nothing left to pair are
+    duplicates. Queued alerts never paired were lost; the others were still being
+    rendered when the bot stopped.
+    """
+    pending: Dict[str, deque] = {}
+    for alert in sorted(alerts, key=lambda a: a["raised_at"]):
+        pending.setdefault(alert["title"], deque()).append(alert)
+    latencies, duplicates = [], 0
+    for received_at, content in sorted(received):
+        for title in ALERT_TITLE.findall(content):
+            queue = pending.get(title)
+            if queue and queue[0]["raised_at"] <= received_at:
+                latencies.append(received_at - queue.popleft()["cycle_start"])
+            else:
+                duplicates += 1
+    undelivered = [alert for queue in pending.values() for alert in queue]
+    return {
+        "delivered": len(latencies),
+        "lost": sum(alert["submitted"] for alert in undelivered),
+        "unsent_at_stop": sum(not alert["submitted"] for alert in undelivered),
+        "duplicated": duplicates,
+        "latency": summarize(latencies),
+    }
+
+def memory_report(samples: List[Tuple[float, float, float]], warmup: float) -> Dict[str, object]:
+    """Start / end / peak memory and the growth rate after `warmup` seconds (least-squares slope)."""
+    if not samples:
+        return {"available": False}
+    steady = [s for s in samples if s[0] >= warmup] or samples
+    t = np.array([s[0] for s in steady])
+    total = np.array([s[2] for s in steady])
+    growth = float(np.polyfit(t, total, 1)[0] * 3600) if len(steady) >= 3 and np.ptp(t) > 0 else None
+    return {
+        "available": True,
+        "start_mb": round(steady[0][2], 1),
+        "end_mb": round(steady[-1][2], 1),
+        "peak_mb": round(max(s[2] for s in samples), 1),
+        "bot_end_mb": round(samples[-1][1], 1),
+        "growth_mb_per_hour": None if growth is None else round(growth, 2),
+        "samples": [[round(a, 1), round(b, 1), round(c, 1)] for a, b, c in samples],
+    }
+
+async def soak(args, stub_pid: int, stats_url: str) -> dict:
+    """Runs core.monitor against the stand-ins for `args.duration` seconds and builds the report."""
+    core = await asyncio.to_thread(importlib.import_module, "bot.core")
+    from bot.state import STATE
+    from bot.utils import breaker_states
+    from bot.metrics import JOB_OVERRUNS, RETRIES, RETRIES_ABANDONED
+
+    recorder = Recorder()
+    # build_scheduler looks the jobs up by name when monitor() starts, so wrapping them here is enough
+    for name in ("check_early_warnings", "check_15m_confirmations", "check_daily_signals"):
+        setattr(core, name, recorder.timed(name, getattr(core, name)))
+    send_alerts, deliver = core._send_alerts, core._deliver
+
+    async def _send_alerts(signals: List[dict]):
+        recorder.raised(signals)
+        await send_alerts(signals)
+
+    async def _deliver(content: str, *args, **kwargs):
+        recorder.submitted(content)
+        await deliver(content, *args, **kwargs)
+    core._send_alerts, core._deliver = _send_alerts, _deliver
+
+    sampler = asyncio.create_task(recorder.sample_memory(args.sample_seconds, exclude=stub_pid))
+    bot = asyncio.create_task(core.monitor())
+    done, _ = await asyncio.wait({bot}, timeout=args.duration)
+    error = None
+    if bot in done:
+        error = repr(bot.exception()) if bot.exception() else "monitor() returned early"
+    pending = STATE.delivery.depth() if STATE.delivery is not None else 0
+    queue_dropped = STATE.delivery.dropped if STATE.delivery is not None else 0
+    bot.cancel()  # monitor() flushes the Discord queue on the way out
+    await asyncio.gather(bot, return_exceptions=True)
+    sampler.cancel()
+
+    await asyncio.sleep(args.discord_latency * 1.5 + 0.5)  # Posts still in flight at the stand-in
+    async with aiohttp.ClientSession() as session:
+        async with session.get(stats_url) as resp:
+            stats = await resp.json()
+
+    alerts = match_alerts(recorder.alerts, [tuple(r) for r in stats["received"]])
+    alerts.update(raised=len(recorder.alerts), repeated_signals=recorder.repeated,
+                  pending_at_stop=pending, queue_full_drops=queue_dropped)
+    counters = lambda metric: {"/".join(key): value for key, value in sorted(metric.items())}
+    return {
+        "version": REPORT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "symbols": args.symbols, "duration_s": args.duration, "poll_seconds": args.poll_seconds,
+            "volatility": args.volatility, "seed": args.seed,
+            "yahoo": asdict(_stub_config(args, "yahoo")), "discord": asdict(_stub_config(args, "discord")),
+        },
+        "error": error,
+        "cycles": {name: summarize(values) for name, values in sorted(recorder.cycles.items())},
+        "alerts": alerts,
+        "servers": stats["statuses"],
+        "bot": {
+            "retries": counters(RETRIES),
+            "retries_abandoned": counters(RETRIES_ABANDONED),
+            "job_overruns": counters(JOB_OVERRUNS),
+            "breakers": breaker_states(),
+        },
+        "memory": memory_report(recorder.memory, args.warmup),
+    }
+
+def _stub_config(args, service: str) -> StubConfig:
+    return StubConfig(
+        latency=getattr(args, f"{service}_latency"),
+        error_rate=getattr(args, f"{service}_error_rate"),
+        rate_limit=getattr(args, f"{service}_rate_limit"),
+        rate_window=getattr(args, f"{service}_rate_window"),
+    )
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def print_summary(report: dict):
+    out = sys.stderr
+    print(f"Soak: {report['config']['symbols']} symbol(s) for {report['config']['duration_s']:g}s", file=out)
+    if report["error"]:
+        print(f"  monitor() stopped early: {report['error']}", file=out)
+    for name, stats in report["cycles"].items():
+        if stats["count"]:
+            print(f"  {name:<26} {stats['count']:5d} runs  p50 {stats['p50']:7.2f}s  p90 {stats['p90']:7.2f}s  "
+                  f"p99 {stats['p99']:7.2f}s  max {stats['max']:7.2f}s", file=out)
+    a = report["alerts"]
+    print(f"  alerts: {a['raised']} raised, {a['delivered']} delivered, {a['lost']} lost, {a['duplicated']} duplicated, "
+          f"{a['repeated_signals']} repeated signal(s); at stop {a['pending_at_stop']} queued, "
+          f"{a['unsent_at_stop']} not yet queued", file=out)
+    if a["latency"]["count"]:
+        lat = a["latency"]
+        print(f"  alert latency (cycle start -> webhook): p50 {lat['p50']:.2f}s  p90 {lat['p90']:.2f}s  "
+              f"p99 {lat['p99']:.2f}s  max {lat['max']:.2f}s", file=out)
+    for service, statuses in report["servers"].items():
+        print(f"  {service} responses: {', '.join(f'{k}: {v}' for k, v in sorted(statuses.items())) or 'none'}", file=out)
+    m = report["memory"]
+    if m["available"]:
+        growth = "n/a" if m["growth_mb_per_hour"] is None else f"{m['growth_mb_per_hour']:+.1f} MB/h"
+        print(f"  memory (bot + render workers): {m['start_mb']:.0f} -> {m['end_mb']:.0f} MB, peak {m['peak_mb']:.0f} MB, "
+              f"growth {growth}", file=out)
+
+def main():
+    """
+    Soak-tests the bot offline: runs the real monitor() loop over many
+    synthetic symbols against local stand-ins for Yahoo and the Discord
+    webhook, with configurable latency, errors and rate limits, and writes a
+    JSON report of cycle latency, alert delivery and memory growth. With
+    --strict, exits non-zero if an alert was lost, duplicated or repeated.
+    """
+    parser = argparse.ArgumentParser(description="Soak-test the MACD bot against fake Yahoo and Discord servers.")
+    parser.add_argument("--symbols", type=int, default=200, help="Synthetic symbols to watch")
+    parser.add_argument("--duration", type=float, default=600, help="Seconds to run the bot")
+    parser.add_argument("--poll-seconds", type=int, default=15, help="Early-warning poll interval (POLL_SECONDS)")
+    parser.add_argument("--volatility", type=float, default=0.004, help="Price move per candle and per poll (log-return std)")
+    parser.add_argument("--seed", type=int, default=7)
+    for service, latency, limit, window in (("yahoo", 0.05, 0, 1.0), ("discord", 0.1, 5, 2.0)):
+        parser.add_argument(f"--{service}-latency", type=float, default=latency, help=f"Mean {service} response time (s)")
+        parser.add_argument(f"--{service}-error-rate", type=float, default=0.0, help=f"Fraction of {service} requests failing with 503")
+        parser.add_argument(f"--{service}-rate-limit", type=int, default=limit, help=f"{service} requests per window before 429s; 0 = none")
+        parser.add_argument(f"--{service}-rate-window", type=float, default=window, help=f"{service} rate-limit window (s)")
+    parser.add_argument("--sample-seconds", type=float, default=5, help="Memory sampling interval")
+    parser.add_argument("--warmup", type=float, default=60, help="Seconds excluded from the memory growth rate (cold fetch)")
+    parser.add_argument("--out", default="soak-report.json", help="Where to write the JSON report")
+    parser.add_argument("--strict", action="store_true", help="Exit non-zero if an alert was lost, duplicated or repeated")
+    parser.add_argument("--verbose", action="store_true", help="Show the bot's INFO logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(levelname)s - %(message)s")
+
+    ports = (_free_port(), _free_port())
+    ctx = mp.get_context("spawn")
+    ready = ctx.Event()
+    stubs = ctx.Process(target=run_stubs, name="zorozero-soak-stubs", daemon=True,
+                        args=(_stub_config(args, "yahoo"), _stub_config(args, "discord"), args.volatility, args.seed, ports, ready))
+    stubs.start()
+    if not ready.wait(30):
+        stubs.terminate()
+        parser.error("The stand-in servers did not come up.")
+
+    with tempfile.TemporaryDirectory(prefix="zorozero-soak-") as workdir:
+        # Everything the bot talks to or writes is local and fresh for every run
+        os.environ.update({
+            "SYMBOLS": ",".join(f"SOAK{i:03d}-USD" for i in range(args.symbols)),
+            "MARKET_DATA_SOURCE": "yahoo",
+            "YAHOO_FETCHER": "aiohttp",
+            "YAHOO_BASE_URL": f"http://127.0.0.1:{ports[0]}",
+            "DISCORD_WEBHOOK": f"http://127.0.0.1:{ports[1]}{WEBHOOK_PATH}",
+            "CRYPTOPANIC_API_KEY": "",
+            "COINMARKETCAL_API_KEY": "",
+            "POLL_SECONDS": str(args.poll_seconds),
+            "CANDLE_STORE_PATH": os.path.join(workdir, "candles.sqlite3"),
+            "STATE_PATH": os.path.join(workdir, "state.json"),
+        })
+        try:
+            report = asyncio.run(soak(args, stubs.pid, f"http://127.0.0.1:{ports[1]}/_soak/stats"))
+        finally:
+            stubs.terminate()
+            stubs.join(10)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print_summary(report)
+    print(f"Wrote the report to {args.out}", file=sys.stderr)
+
+    alerts = report["alerts"]
+    if args.strict and (alerts["lost"] or alerts["duplicated"] or alerts["repeated_signals"] or report["error"]):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The bot is run from the repository root (python run.py); import it the same way
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from bot import analysis, yahoo
+from bot.analysis import calculate_macd_panel
+from bot.config import settings
+from bot.indicators import macd_history
+
+def _frame(index: pd.DatetimeIndex, seed: int) -> pd.DataFrame:
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.003, len(index))))
+    return pd.DataFrame({"open": close, "high": close, "low": close, "close": close, "volume": 1.0}, index=index)
+
+def _session(day: str) -> pd.DatetimeIndex:
+    # US 15m candles are stamped at New York wall-clock time labelled UTC, 09:30 to 15:45
+    return pd.date_range(f"{day} 09:30", f"{day} 15:45", freq="15min", tz="UTC")
+
+def _check(panel, frames):
+    for symbol, df in frames.items():
+        col = panel.symbols.index(symbol)
+        expected = macd_history(df["close"].to_numpy(), settings.MACD_FAST, settings.MACD_SLOW, settings.MACD_SIGNAL)
+        n = len(df)
+        np.testing.assert_array_equal(panel.times[-n:, col], df.index.asi8)
+        np.testing.assert_allclose(panel.macd[-n:, col], expected[:, 0], rtol=0, atol=1e-9)
+        np.testing.assert_allclose(panel.macd_signal[-n:, col], expected[:, 2], rtol=0, atol=1e-9)
+        attached = panel.frame_for(symbol, df.tail(50))
+        np.testing.assert_allclose(attached["macd"].to_numpy(), expected[-50:, 0], rtol=0, atol=1e-9)
+
+def test_mixed_watchlist_panel_aligns_each_exchange_at_its_newest_candle(monkeypatch):
+    monkeypatch.setattr(yahoo, "_TIMEZONES", {"BTC-USD": "UTC", "AAPL": "America/New_York", "MSFT": "America/New_York"})
+    monkeypatch.setattr(analysis, "_MACD_SERIES", {})
+
+    crypto = pd.date_range("2024-03-01 00:00", "2024-03-05 13:45", freq="15min", tz="UTC")
+    stocks = _session("2024-03-01").append(_session("2024-03-04")).append(_session("2024-03-05")[:2])
+    btc, aapl, msft = _frame(crypto, 1), _frame(stocks, 2), _frame(stocks, 3)
+
+    frames = {"BTC-USD": btc.iloc[:-1], "AAPL": aapl.iloc[:-1], "MSFT": msft.iloc[:-1]}
+    panel = calculate_macd_panel(frames, key="15m")
+    _check(panel, frames)
+    # The stocks' open candle (09:30) is on row -1, not carried below the coin's newer rows
+    assert panel.times[-1, panel.symbols.index("AAPL")] == pd.Timestamp("2024-03-05 09:30", tz="UTC").value
+    engines = {key: series.engine for key, series in analysis._MACD_SERIES.items()}
+    assert len(engines) == 2
+
+    # Next poll: every symbol has a new candle and its group only advances, without recomputing
+    frames = {"BTC-USD": btc, "AAPL": aapl, "MSFT": msft}
+    panel = calculate_macd_panel(frames, key="15m")
+    _check(panel, frames)
+    assert all(analysis._MACD_SERIES[key].engine is engine for key, engine in engines.items())
@@ -0,0 +1,37 @@
+import asyncio
+from bot import utils
+from bot.services.discord import Delivery, DeliveryQueue
+from bot.utils import CircuitOpenError
+
+def test_batch_is_held_while_the_circuit_is_open(monkeypatch):
+    monkeypatch.setattr(utils, "_BREAKERS", {})
+    attempts, sent = [], []
+
+    async def deliver(batch):
+        attempts.append([d.content for d in batch])
+        breaker = utils.get_breaker("discord")
+        if len(attempts) == 1:
+            # Discord keeps failing: the circuit opens on this batch
+            breaker.reset_timeout = 0.05
+            for _ in range(breaker.failure_threshold):
+                breaker.record_failure()
+            raise CircuitOpenError("Circuit 'discord' is open.")
+        breaker.before_call()  # The trial call once the circuit half-opens
+        breaker.record_success()
+        sent.append(attempts[-1])
+        return True
+
+    async def scenario():
+        queue = DeliveryQueue("http://127.0.0.1:9/webhook", maxsize=10)
+        monkeypatch.setattr(queue, "_deliver", deliver)
+        queue.submit(Delivery("first"))
+        queue.submit(Delivery("second"))
+        await queue.flush(timeout=5)
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert attempts == [["first", "second"], ["first", "second"]]
+    assert sent == [["first", "second"]]
+    assert queue.dropped == 0 and queue.depth() == 0
+    assert utils.get_breaker("discord").state == "closed"
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+import pytest
+from bot.indicators import (
+    EMASpec, MACDSeries, MACDSpec, RSISpec, StreamingEMA, StreamingMACD, compute_indicators, macd_history,
+    parse_indicator_specs,
+)
+
+FAST, SLOW, SIGNAL = 12, 26, 9
+# Measured differences are ~1e-13; anything near this bound is a real divergence
+ATOL = 1e-9
+
+def _closes(n: int, seed: int = 1) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01", periods=n, freq="15min", tz="UTC")
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, n))), index=index)
+
+def _reference(closes: pd.Series) -> np.ndarray:
+    """pandas_ta's (macd, histogram, signal), shaped (n, 3) like our outputs."""
+    return ta.macd(closes, fast=FAST, slow=SLOW, signal=SIGNAL).to_numpy()
+
+@pytest.mark.parametrize("n", [20, 400])  # Below and above the vectorized cold-start threshold
+def test_ema_cold_start_matches_pandas_ta(n):
+    closes = _closes(n)
+    expected = ta.ema(closes, length=SLOW)
+    expected = np.full(n, np.nan) if expected is None else expected.to_numpy()
+    np.testing.assert_allclose(StreamingEMA(SLOW).run(closes.to_numpy()), expected, rtol=0, atol=ATOL)
+
+def test_macd_cold_start_matches_pandas_ta():
+    closes = _closes(500)
+    out = StreamingMACD(FAST, SLOW, SIGNAL).run(closes.to_numpy())
+    np.testing.assert_allclose(out, _reference(closes), rtol=0, atol=ATOL)
+
+def test_macd_incremental_updates_match_pandas_ta():
+    closes = _closes(300)
+    engine = StreamingMACD(FAST, SLOW, SIGNAL)
+    out = np.array([engine.update(x) for x in closes.to_numpy()], dtype=float)
+    np.testing.assert_allclose(out, _reference(closes), rtol=0, atol=ATOL)
+
+def test_macd_continues_after_cold_start():
+    closes = _closes(300)
+    engine = StreamingMACD(FAST, SLOW, SIGNAL)
+    cold = engine.run(closes.to_numpy()[:200])
+    warm = np.array([engine.update(x) for x in closes.to_numpy()[200:]], dtype=float)
+    np.testing.assert_allclose(np.concatenate([cold, warm]), _reference(closes), rtol=0, atol=ATOL)
+
+def test_macd_peek_does_not_commit():
+    closes = _closes(100).to_numpy()
+    engine = StreamingMACD(FAST, SLOW, SIGNAL)
+    engine.run(closes[:-1])
+    peeked = engine.peek(closes[-1] * 1.05)
+    assert engine.peek(closes[-1] * 1.05) == peeked
+    np.testing.assert_allclose(engine.update(closes[-1]), _reference(pd.Series(closes))[-1], rtol=0, atol=ATOL)
+
+def test_macd_series_tracks_a_growing_frame():
+    closes = _closes(260)
+    series = MACDSeries(FAST, SLOW, SIGNAL)
+    rng = np.random.default_rng(2)
+    for end in range(200, 261):
+        frame = closes.iloc[:end].copy()
+        for _ in range(3):  # The open candle is polled several times before it closes
+            frame.iloc[-1] *= 1 + rng.normal(0, 0.002)
+            out = series.compute(frame.index, frame.to_numpy())
+            np.testing.assert_allclose(out, _reference(frame), rtol=0, atol=ATOL)
+
+def test_macd_series_symbols_with_gaps():
+    a, b = _closes(300, seed=3), _closes(300, seed=4)
+    b.iloc[:120] = np.nan  # Listed later: no candles before row 120
+    b.iloc[180:195] = np.nan  # Closed overnight
+    b.iloc[290:] = np.nan  # No candle yet for the newest rows, including the open one
+    closes = np.column_stack([a.to_numpy(), b.to_numpy()])
+    out = MACDSeries(FAST, SLOW, SIGNAL).compute(a.index, closes)
+    np.testing.assert_allclose(out[:, :, 0], _reference(a), rtol=0, atol=ATOL)
+    # Rows without a candle carry the last values: the signal line does not move across the gap
+    expected = pd.DataFrame(_reference(b.dropna()), index=b.dropna().index).reindex(b.index).ffill()
+    np.testing.assert_allclose(out[120:, :, 1], expected.iloc[120:].to_numpy(), rtol=0, atol=ATOL)
+    assert np.isnan(out[:120, :, 1]).all()
+
+@pytest.mark.parametrize("step", [1, 300])  # Value by value and vectorized
+def test_macd_signal_skips_gaps(step):
+    closes = _closes(300, seed=5).to_numpy()
+    closes[150:160] = np.nan
+    engine = StreamingMACD(FAST, SLOW, SIGNAL)
+    out = np.concatenate([engine.run(closes[i:i + step]) for i in range(0, len(closes), step)])
+    np.testing.assert_allclose(out, macd_history(closes, FAST, SLOW, SIGNAL), rtol=0, atol=ATOL)
+    assert (out[150:160] == out[149]).all()
+
+def test_parse_indicator_specs():
+    specs = parse_indicator_specs("macd:12:26:9, EMA:200,,rsi:14")
+    assert specs == [MACDSpec(12, 26, 9), EMASpec(200), RSISpec(14)]
+    for text in ("sma:20", "macd:12:26", "rsi"):
+        with pytest.raises(ValueError):
+            parse_indicator_specs(text)
+
+def test_compute_indicators_matches_pandas_ta():
+    # Specs sharing EMA spans (26), MACD lines (12/26) and signal lengths (9), one given slow-first, and a duplicate
+    specs = [EMASpec(26), EMASpec(200), MACDSpec(12, 26, 9), MACDSpec(12, 26, 5), MACDSpec(8, 15, 9),
+             MACDSpec(26, 12, 9), RSISpec(14), RSISpec(6), MACDSpec(8, 15, 9)]
+    symbols = [_closes(500, seed=6), _closes(500, seed=7)]
+    block = compute_indicators(np.column_stack([c.to_numpy() for c in symbols]), specs)
+    assert block.columns == [column for spec in dict.fromkeys(specs) for column in spec.columns]
+
+    for col, closes in enumerate(symbols):
+        for spec in dict.fromkeys(specs):
+            if isinstance(spec, EMASpec):
+                expected = ta.ema(closes, length=spec.length).to_numpy()[:, None]
+            elif isinstance(spec, MACDSpec):
+                expected = ta.macd(closes, fast=spec.fast, slow=spec.slow, signal=spec.signal).to_numpy()
+            else:
+                expected = ta.rsi(closes, length=spec.length).to_numpy()[:, None]
+            actual = np.column_stack([block[column][:, col] for column in spec.columns])
+            np.testing.assert_allclose(actual, expected, rtol=0, atol=ATOL, err_msg=str(spec))
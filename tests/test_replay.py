@@ -0,0 +1,44 @@
+import dataclasses
+import numpy as np
+import pandas as pd
+import pytest
+import replay
+from bot import analysis
+from bot.analysis import MACDPanel, default_signal_specs
+from bot.config import settings
+from bot.indicators import macd_history
+from bot.signals import SignalEngine
+
+SIGNALS = ("15m_macd_early", "15m_signal_confirm")
+
+def _candles(n: int = 1500) -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    index = pd.date_range("2024-01-01", periods=n, freq="15min", tz="UTC")
+    return pd.DataFrame({"open": np.r_[close[0], close[:-1]], "high": close * 1.001, "low": close * 0.999,
+                         "close": close, "volume": 1.0}, index=index)
+
+def _live(df: pd.DataFrame) -> dict:
+    """Candle times the SignalEngine fires on when every candle is evaluated once, like a poll per candle."""
+    macd = macd_history(df["close"].to_numpy(), settings.MACD_FAST, settings.MACD_SLOW, settings.MACD_SIGNAL)
+    engine = SignalEngine([s for s in default_signal_specs() if s.name in SIGNALS])
+    close = df["close"].to_numpy()[:, None]
+    fired = {name: [] for name in SIGNALS}
+    for t in range(3, len(df) + 1):
+        panel = MACDPanel(["X"], df.index.asi8[:t, None], close[:t], macd[:t, 0:1], macd[:t, 1:2], macd[:t, 2:3])
+        for event in engine.evaluate({settings.TIMEFRAME_15M: panel}):
+            fired[event.spec.name].append(event.candle_time)
+    return fired
+
+@pytest.mark.parametrize("hysteresis", [0.0, 5e-4])
+def test_replay_fires_where_the_live_engine_does(monkeypatch, hysteresis):
+    patched = dataclasses.replace(settings, SIGNAL_HYSTERESIS=hysteresis)
+    monkeypatch.setattr(replay, "settings", patched)
+    monkeypatch.setattr(analysis, "settings", patched)
+
+    df = _candles()
+    triggers = replay.replay_symbol("X", df, pd.DataFrame())
+    live = _live(df)
+    for name in SIGNALS:
+        assert list(triggers.loc[triggers["signal"] == name, "candle_time"]) == live[name], name
+    assert live["15m_signal_confirm"]  # The series does cross
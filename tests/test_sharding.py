@@ -0,0 +1,33 @@
+import asyncio
+import numpy as np
+import pandas as pd
+from bot.sharding import Coordinator, split_symbols
+
+def _render_in_worker(results):
+    """Worker body: renders one chart through the render pool, as a shard's _send_alerts does."""
+    from bot.charting import render_chart, shutdown_renderer
+
+    index = pd.date_range("2024-01-01", periods=60, freq="15min", tz="UTC")
+    close = 100 + np.cumsum(np.random.default_rng(1).normal(0, 1, 60))
+    df = pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1.0}, index=index)
+    df = df.assign(macd=close - close.mean(), macd_histogram=0.0, macd_signal=0.0)
+    try:
+        results.put(asyncio.run(render_chart(df, "TEST 15m")))
+    finally:
+        shutdown_renderer()
+
+def test_split_symbols_round_robin():
+    assert split_symbols(["a", "b", "c", "d", "e"], 2) == [["a", "c", "e"], ["b", "d"]]
+
+def test_shard_worker_can_render_charts():
+    # The render pool is a child of the worker, which daemonic workers may not have
+    coordinator = Coordinator(["BTC-USD"], 1)
+    process = coordinator.spawn(_render_in_worker, (coordinator.outbox,), "zorozero-test-render")
+    try:
+        png = coordinator.outbox.get(timeout=120)
+    finally:
+        process.join(30)
+        if process.is_alive():
+            process.terminate()
+    assert png.startswith(b"\x89PNG")
+    assert process.exitcode == 0
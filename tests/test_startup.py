@@ -0,0 +1,6 @@
+import run
+from bot.config import settings
+
+def test_health_is_up_within_budget(capsys):
+    # Cold interpreter: /health must answer within the budget without loading pandas & co.
+    assert run.import_report(settings.HEALTH_STARTUP_BUDGET) == 0, capsys.readouterr().out
@@ -0,0 +1,27 @@
+import dataclasses
+import numpy as np
+import pandas as pd
+from bot import data
+from bot.config import settings
+from bot.store import CandleStore
+
+def _candles(start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    index = pd.date_range(start.floor("D"), end.floor("D"), freq="1D", tz="UTC", name="Date")
+    close = np.linspace(100, 200, len(index))
+    return pd.DataFrame({"open": close, "high": close, "low": close, "close": close, "volume": 1.0}, index=index)
+
+def test_store_keeps_candles_past_the_lookback_until_retention(tmp_path, monkeypatch):
+    monkeypatch.setattr(data, "settings", dataclasses.replace(settings, CANDLE_RETENTION_DAYS=100))
+    store = CandleStore(str(tmp_path / "candles.sqlite3"))
+    now = pd.Timestamp.now(tz="UTC")
+    since = now - pd.Timedelta(days=30)  # The lookback window
+    df = _candles(now - pd.Timedelta(days=200), now)
+
+    frames = data._store_and_load(store, ["X"], "1d", {"X": df}, since, None)
+    assert frames["X"].index[0] >= since  # Callers still get the lookback window only
+
+    kept = store.load_many(["X"], "1d")["X"]
+    assert kept.index[0] >= now - pd.Timedelta(days=100)
+    assert kept.index[0] < since
+    assert kept.index[-1] == df.index[-1]
+    store.close()
@@ -0,0 +1,115 @@
+import asyncio
+import dataclasses
+import pytest
+from bot import utils
+from bot.config import settings
+from bot.utils import CircuitBreaker, CircuitOpenError, RetryBudget, async_backoff, retry_budget
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(utils.time, "monotonic", clock)
+    return clock
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    """Makes async_backoff's waits instant and records them."""
+    delays = []
+    sleep = asyncio.sleep
+
+    async def record(delay):
+        delays.append(delay)
+        await sleep(0)
+    monkeypatch.setattr(utils.asyncio, "sleep", record)
+    monkeypatch.setattr(utils, "_BREAKERS", {})
+    return delays
+
+def test_circuit_breaker_opens_half_opens_and_closes(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.retry_in() == 60
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock.now += 60
+    breaker.before_call()  # The trial call
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # Only one trial at a time
+
+    breaker.record_failure()  # A failed trial opens it again at once
+    assert breaker.state == "open" and breaker.retry_in() == 60
+    clock.now += 60
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.status() == {"state": "closed", "failures": 0, "retry_in": 0.0}
+
+def test_circuit_breaker_release_ends_the_trial(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    breaker.before_call()
+    breaker.release()  # E.g. the trial call was cancelled
+    breaker.before_call()
+    assert breaker.state == "half_open"
+
+def test_retry_budget_counts_retries_and_deadline(clock):
+    budget = RetryBudget(2, deadline=clock.now + 10)
+    assert budget.spend(1) is None
+    assert budget.spend(20) == "deadline"
+    assert budget.spend(1) is None
+    assert budget.spend(1) == "budget"
+
+def test_async_backoff_retries_until_success(no_sleep):
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise asyncio.TimeoutError()
+        return "ok"
+
+    assert asyncio.run(async_backoff(flaky, retries=5, base_delay=1, label="test.flaky")) == "ok"
+    assert len(calls) == 3 and len(no_sleep) == 2
+    assert utils.get_breaker("test").state == "closed"
+
+def test_async_backoff_stops_when_the_budget_is_spent(no_sleep):
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        raise asyncio.TimeoutError()
+
+    async def scenario():
+        with retry_budget(1):
+            await async_backoff(failing, retries=5, label="test.failing")
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(scenario())
+    assert len(calls) == 2  # The first try and the one retry the cycle had left
+
+def test_async_backoff_stops_when_the_circuit_opens(no_sleep, monkeypatch):
+    monkeypatch.setattr(utils, "settings", dataclasses.replace(settings, BREAKER_FAILURES=2))
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        raise asyncio.TimeoutError()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(async_backoff(failing, retries=5, label="test.failing"))
+    assert len(calls) == 2
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(async_backoff(failing, retries=5, label="test.failing"))
+    assert len(calls) == 2  # Refused without calling the endpoint
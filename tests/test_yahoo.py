@@ -0,0 +1,118 @@
+import json
+import socket
+import asyncio
+import dataclasses
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+from aiohttp import web
+from bot import data, yahoo
+from bot.config import settings
+from bot.services.http_client import close_session
+
+# Chart responses and what yf.download 0.2.40 made of them (see the "expected" key)
+FIXTURES = {path.stem: json.loads(path.read_text()) for path in sorted((Path(__file__).parent / "fixtures" / "yahoo").glob("*.json"))}
+CANDLES = [name for name, fixture in FIXTURES.items() if fixture["expected"] is not None]
+
+def _expected(fixture: dict) -> pd.DataFrame:
+    expected = fixture["expected"]
+    index = pd.DatetimeIndex(pd.to_datetime(expected["index"]), name="Date").tz_convert("UTC")
+    return pd.DataFrame(np.array(expected["ohlcv"], dtype=float), index=index, columns=["open", "high", "low", "close", "volume"])
+
+class StubYahoo:
+    """Serves the recorded chart responses on a local port and keeps the requests it got."""
+
+    def __init__(self):
+        self.requests = []
+        self.url = None
+        self._runner = None
+
+    async def _chart(self, request: web.Request) -> web.Response:
+        self.requests.append(request)
+        symbol, interval = request.match_info["symbol"], request.query["interval"]
+        fixture = FIXTURES.get(f"{symbol}_{interval}") or FIXTURES["NOPE_1d"]
+        return web.json_response(fixture["response"], status=fixture["status"])
+
+    async def __aenter__(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        app = web.Application()
+        app.router.add_get("/v8/finance/chart/{symbol}", self._chart)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", port).start()
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await close_session()
+        await self._runner.cleanup()
+
+@pytest.fixture
+def stub_settings(monkeypatch):
+    """Points bot.yahoo at a stub server: returns a function taking the stub's URL."""
+    def use(url: str):
+        monkeypatch.setattr(yahoo, "settings", dataclasses.replace(settings, YAHOO_BASE_URL=url, YAHOO_CONCURRENCY=2))
+    monkeypatch.setattr(yahoo, "_TIMEZONES", {})
+    return use
+
+@pytest.mark.parametrize("name", CANDLES)
+def test_parse_chart_matches_yfinance(name):
+    fixture = FIXTURES[name]
+    chart = yahoo.parse_chart(fixture["response"], fixture["interval"])
+    pd.testing.assert_frame_equal(chart.to_frame(), _expected(fixture), check_freq=False)
+
+def test_parse_chart_raises_on_yahoo_error():
+    with pytest.raises(ValueError, match="delisted"):
+        yahoo.parse_chart(FIXTURES["NOPE_1d"]["response"], "1d")
+
+def test_fetch_charts_from_stub_server(stub_settings):
+    async def scenario():
+        async with StubYahoo() as stub:
+            stub_settings(stub.url)
+            return await yahoo.fetch_charts(["BTC-USD", "AAPL", "NOPE"], "15m", period="1mo"), stub.requests
+
+    charts, requests = asyncio.run(scenario())
+    assert set(charts) == {"BTC-USD", "AAPL"}  # The unknown symbol is left out
+    for symbol, chart in charts.items():
+        pd.testing.assert_frame_equal(chart.to_frame(), _expected(FIXTURES[f"{symbol}_15m"]), check_freq=False)
+    assert charts["AAPL"].timezone == "America/New_York"
+    for request in requests:
+        assert request.query["range"] == "1mo" and request.query["interval"] == "15m"
+        assert "Mozilla" in request.headers["User-Agent"]
+
+def test_warm_start_refetches_newest_candle_east_of_utc(stub_settings):
+    # ASX daily candles open at 23:00 UTC the day before, but are stored at midnight of their date labelled UTC
+    fixture = FIXTURES["BHP.AX_1d"]
+    stored = _expected(fixture).index[-1]
+    opened = pd.Timestamp(fixture["response"]["chart"]["result"][0]["timestamp"][-2], unit="s", tz="UTC")
+    assert stored > opened
+
+    # Before any chart of the symbol was seen, the widest UTC offset is assumed
+    assert data._request_start("BHP.AX", "1d", stored) <= opened
+
+    async def scenario():
+        async with StubYahoo() as stub:
+            stub_settings(stub.url)
+            await yahoo.fetch_charts(["BHP.AX"], "1d", period="1y")
+            start = data._request_start("BHP.AX", "1d", stored)
+            await yahoo.fetch_charts(["BHP.AX"], "1d", start=start)
+            return start, stub.requests[-1]
+
+    start, request = asyncio.run(scenario())
+    assert start == pd.Timestamp(stored.date(), tz="Australia/Sydney")
+    assert int(request.query["period1"]) <= opened.timestamp()
+
+def test_fetch_history_bypasses_the_store(stub_settings, monkeypatch):
+    monkeypatch.setattr(data, "get_store", lambda path: pytest.fail("fetch_history must not open the candle store"))
+
+    async def scenario():
+        async with StubYahoo() as stub:
+            stub_settings(stub.url)
+            return await data.fetch_history(["BTC-USD", "NOPE"], "15m", "1mo")
+
+    frames = asyncio.run(scenario())
+    assert list(frames) == ["BTC-USD"]
+    pd.testing.assert_frame_equal(frames["BTC-USD"], _expected(FIXTURES["BTC-USD_15m"]), check_freq=False)